@@ -0,0 +1,81 @@
+"""Headless HTTP API for programmatic certificate verification.
+
+    GET  /health
+    GET  /certificates/{certificate_id}/verify
+    POST /verify/pdf      raw PDF bytes as the request body
+    POST /verify/batch    {"certificate_ids": ["...", ...]}
+
+Responses are the dicts built by utils.verification. Chain and signature
+checks are blocking, so they run on the server's thread pool and the event
+loop stays free for other requests. Each worker process keeps its own RPC
+session, ledger cache and key cache.
+
+Usage (from the application directory):
+    python api.py --workers 4
+    uvicorn api:app --host 0.0.0.0 --port 8000 --workers 4
+"""
+import argparse
+import os
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+
+from utils.verification import verify_certificate, verify_many, verify_pdf
+
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", 8000))
+API_WORKERS = int(os.getenv("API_WORKERS", os.cpu_count() or 1))
+API_MAX_BATCH_SIZE = int(os.getenv("API_MAX_BATCH_SIZE", 500))
+API_MAX_PDF_BYTES = int(float(os.getenv("API_MAX_PDF_MB", 10)) * 1024 * 1024)
+
+app = FastAPI(title="Certificate Verification API")
+
+
+class BatchVerificationRequest(BaseModel):
+    certificate_ids: list[str]
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+@app.get("/certificates/{certificate_id}/verify")
+async def verify_certificate_endpoint(certificate_id: str):
+    return await run_in_threadpool(verify_certificate, certificate_id)
+
+
+@app.post("/verify/pdf")
+async def verify_pdf_endpoint(request: Request):
+    content_length = request.headers.get("content-length")
+    if content_length and int(content_length) > API_MAX_PDF_BYTES:
+        raise HTTPException(status_code=413, detail="PDF is too large")
+    pdf_bytes = await request.body()
+    if not pdf_bytes:
+        raise HTTPException(status_code=400, detail="Request body must be the certificate PDF")
+    if len(pdf_bytes) > API_MAX_PDF_BYTES:
+        raise HTTPException(status_code=413, detail="PDF is too large")
+    return await run_in_threadpool(verify_pdf, pdf_bytes)
+
+
+@app.post("/verify/batch")
+async def verify_batch_endpoint(body: BatchVerificationRequest):
+    if len(body.certificate_ids) > API_MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"At most {API_MAX_BATCH_SIZE} certificate IDs per request")
+    return {"results": await run_in_threadpool(verify_many, body.certificate_ids)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the certificate verification API.")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--workers", type=int, default=API_WORKERS)
+    args = parser.parse_args()
+
+    uvicorn.run("api:app", host=args.host, port=args.port, workers=args.workers, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
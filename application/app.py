@@ -13,6 +13,8 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+auth.sync_session_cookie()
+
 if auth.is_authenticated():
     logout_btn = st.button("Logout")
 
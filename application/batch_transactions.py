@@ -0,0 +1,111 @@
+import os
+
+from connection import get_contract, get_w3
+
+# Fraction of the block gas limit a single batch transaction may use
+BATCH_BLOCK_GAS_FRACTION = float(os.getenv("BATCH_BLOCK_GAS_FRACTION", 0.8))
+BATCH_INITIAL_CHUNK_SIZE = int(os.getenv("BATCH_INITIAL_CHUNK_SIZE", 50))
+GAS_ESTIMATE_MARGIN = 1.1
+
+CERTIFICATE_INPUT_FIELDS = (
+    "certificate_id",
+    "uid",
+    "candidate_name",
+    "course_name",
+    "org_name",
+    "ipfs_hash",
+    "digital_signature",
+)
+
+
+class CertificateTooLargeError(ValueError):
+    """A single certificate's transaction would exceed the batch gas budget"""
+
+
+def _as_certificate_inputs(certificates):
+    """Converts certificate dicts into CertificateInput tuples for generateCertificatesBatch"""
+    return [tuple(certificate[field] for field in CERTIFICATE_INPUT_FIELDS) for certificate in certificates]
+
+
+def max_batch_gas():
+    """Gas budget for one batch transaction, derived from the latest block's gas limit"""
+    gas_limit = get_w3().eth.get_block("latest")["gasLimit"]
+    return int(gas_limit * BATCH_BLOCK_GAS_FRACTION)
+
+
+def _fit_chunk(certificates, institute_email, sender, chunk_size, max_gas):
+    """Shrinks chunk_size until the chunk's estimated gas fits max_gas; returns (size, gas)"""
+    while True:
+        chunk = certificates[:chunk_size]
+        estimated_gas = get_contract().functions.generateCertificatesBatch(
+            _as_certificate_inputs(chunk), institute_email
+        ).estimate_gas({'from': sender})
+        gas = int(estimated_gas * GAS_ESTIMATE_MARGIN)
+
+        if gas <= max_gas:
+            return chunk_size, gas
+        if chunk_size == 1:
+            raise CertificateTooLargeError(f"Certificate {chunk[0]['certificate_id']} alone exceeds the batch gas budget")
+
+        # Scale down in proportion to the overshoot and try again
+        chunk_size = max(1, min(chunk_size - 1, chunk_size * max_gas // gas))
+
+
+def existing_certificate_ids(certificate_ids):
+    """The subset of certificate_ids already stored on chain, read with one getCertificatesBatch call"""
+    if not certificate_ids:
+        return set()
+    verifications = get_contract().functions.getCertificatesBatch(list(certificate_ids)).call()
+    return {certificate_id for certificate_id, verification in zip(certificate_ids, verifications) if verification[0]}
+
+
+def issue_certificates_batch(certificates, institute_email, sender=None, max_gas=None,
+                             initial_chunk_size=BATCH_INITIAL_CHUNK_SIZE):
+    """Issues certificates with generateCertificatesBatch in gas-bounded chunks.
+
+    certificates is a list of dicts with the CERTIFICATE_INPUT_FIELDS keys.
+    Certificates whose ID is already on chain are left out, since one of them
+    would revert its whole chunk. All chunk transactions are submitted before
+    waiting for receipts, and every chunk starts again from initial_chunk_size.
+
+    Returns a list of (certificate_ids, outcome) pairs, one per chunk, where
+    outcome is the transaction receipt or the exception that stopped the chunk
+    from being sent. Already issued IDs come back as one group with a
+    ValueError."""
+    sender = sender or get_w3().eth.accounts[0]
+    max_gas = max_gas or max_batch_gas()
+    initial_chunk_size = max(1, initial_chunk_size)
+
+    results = []
+    existing = existing_certificate_ids([certificate["certificate_id"] for certificate in certificates])
+    if existing:
+        results.append(([certificate["certificate_id"] for certificate in certificates
+                         if certificate["certificate_id"] in existing],
+                        ValueError("Certificate with this ID already exists")))
+
+    submitted = []
+    remaining = [certificate for certificate in certificates if certificate["certificate_id"] not in existing]
+    while remaining:
+        chunk_size = min(initial_chunk_size, len(remaining))
+        try:
+            chunk_size, gas = _fit_chunk(remaining, institute_email, sender, chunk_size, max_gas)
+            chunk = remaining[:chunk_size]
+            tx_hash = get_contract().functions.generateCertificatesBatch(
+                _as_certificate_inputs(chunk), institute_email
+            ).transact({'from': sender, 'gas': gas})
+        except Exception as e:
+            # Chunks that were already sent must still be awaited and reported
+            if isinstance(e, CertificateTooLargeError):
+                chunk_size = 1
+            chunk = remaining[:chunk_size]
+            results.append(([certificate["certificate_id"] for certificate in chunk], e))
+        else:
+            submitted.append(([certificate["certificate_id"] for certificate in chunk], tx_hash))
+        remaining = remaining[chunk_size:]
+
+    for certificate_ids, tx_hash in submitted:
+        try:
+            results.append((certificate_ids, get_w3().eth.wait_for_transaction_receipt(tx_hash)))
+        except Exception as e:
+            results.append((certificate_ids, e))
+    return results
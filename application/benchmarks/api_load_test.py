@@ -0,0 +1,104 @@
+"""Load test for the verification API.
+
+Sends a fixed number of requests at a fixed concurrency and reports latency
+percentiles and throughput. Certificate IDs come from --certificate-id or,
+by default, from the contract the application is configured for (a local
+Ganache or eth-tester node with issued certificates).
+
+Usage (from the application directory, with `python api.py` running):
+    python -m benchmarks.api_load_test --requests 2000 --concurrency 50
+    python -m benchmarks.api_load_test --endpoint batch --batch-size 50
+    python -m benchmarks.api_load_test --endpoint pdf --pdf some_certificate.pdf
+"""
+import argparse
+import asyncio
+import itertools
+import statistics
+import time
+
+import httpx
+
+API_URL = "http://127.0.0.1:8000"
+
+
+def percentile(sorted_values, fraction):
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def load_certificate_ids(count):
+    from utils.cert_utils import iter_certificate_ids
+    return list(itertools.islice(iter_certificate_ids(), count))
+
+
+def build_request(args, certificate_ids, index):
+    """(method, path, kwargs) for the index-th request"""
+    if args.endpoint == "id":
+        return "GET", f"/certificates/{certificate_ids[index % len(certificate_ids)]}/verify", {}
+    if args.endpoint == "batch":
+        start = (index * args.batch_size) % len(certificate_ids)
+        ids = (certificate_ids * (args.batch_size // len(certificate_ids) + 2))[start:start + args.batch_size]
+        return "POST", "/verify/batch", {"json": {"certificate_ids": ids}}
+    return "POST", "/verify/pdf", {"content": args.pdf_bytes, "headers": {"Content-Type": "application/pdf"}}
+
+
+async def run(args, certificate_ids):
+    latencies = []
+    errors = 0
+    counter = itertools.count()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        async def worker():
+            nonlocal errors
+            while (index := next(counter)) < args.requests:
+                method, path, kwargs = build_request(args, certificate_ids, index)
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, path, **kwargs)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return latencies, errors, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the certificate verification API.")
+    parser.add_argument("--url", default=API_URL)
+    parser.add_argument("--endpoint", choices=("id", "batch", "pdf"), default="id")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--certificate-id", action="append", default=[])
+    parser.add_argument("--max-ids", type=int, default=500, help="IDs to read from the chain when none are given")
+    parser.add_argument("--pdf", help="Certificate PDF for the pdf endpoint")
+    args = parser.parse_args()
+
+    certificate_ids = []
+    if args.endpoint == "pdf":
+        if not args.pdf:
+            parser.error("--pdf is required for the pdf endpoint")
+        with open(args.pdf, "rb") as f:
+            args.pdf_bytes = f.read()
+    else:
+        certificate_ids = args.certificate_id or load_certificate_ids(args.max_ids)
+        if not certificate_ids:
+            parser.error("No certificate IDs given and none found on chain")
+
+    latencies, errors, elapsed = asyncio.run(run(args, certificate_ids))
+    latencies.sort()
+    print(f"endpoint: {args.endpoint}  requests: {len(latencies)}  concurrency: {args.concurrency}  errors: {errors}")
+    print(f"p50: {percentile(latencies, 0.50) * 1000:.1f} ms  p99: {percentile(latencies, 0.99) * 1000:.1f} ms  "
+          f"mean: {statistics.mean(latencies) * 1000:.1f} ms")
+    print(f"throughput: {len(latencies) / elapsed:.1f} requests/sec")
+
+
+if __name__ == "__main__":
+    main()
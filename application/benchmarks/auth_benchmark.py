@@ -0,0 +1,172 @@
+"""Login and role-check latency against a local fake Firebase token issuer.
+
+FakeTokenIssuer serves the endpoints the auth path talks to (sign-up, password
+sign-in, refresh-token exchange, signing certificates with Cache-Control) and
+mints RS256 ID tokens with its own key, so the whole path runs offline:
+- login: password sign-in plus the first role check (fetches the certs),
+- page load: role check for an already verified token (token cache hit),
+- uncached: full signature and claim verification with certs already cached,
+- refresh: re-authentication through the refresh token.
+
+Usage (from the application directory):
+    python -m benchmarks.auth_benchmark --page-loads 10000
+"""
+import argparse
+import base64
+import datetime
+import json
+import os
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from cryptography.x509.oid import NameOID
+
+PROJECT_ID = "fake-project"
+TOKEN_LIFETIME = 3600
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+class FakeTokenIssuer:
+    """Local stand-in for Firebase Auth's sign-in, token and certificate endpoints"""
+
+    def __init__(self, project_id=PROJECT_ID, certs_max_age=3600):
+        self.project_id = project_id
+        self.certs_max_age = certs_max_age
+        self.kid = "fake-key-1"
+        self.requests = Counter()
+        self._key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "fake-issuer")])
+        now = datetime.datetime.now(datetime.timezone.utc)
+        self._cert_pem = (
+            x509.CertificateBuilder()
+            .subject_name(name).issuer_name(name)
+            .public_key(self._key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now).not_valid_after(now + datetime.timedelta(days=1))
+            .sign(self._key, hashes.SHA256())
+            .public_bytes(serialization.Encoding.PEM).decode("ascii")
+        )
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+
+    def mint(self, uid, role, lifetime=TOKEN_LIFETIME):
+        now = int(time.time())
+        header = {"alg": "RS256", "kid": self.kid, "typ": "JWT"}
+        claims = {
+            "iss": f"https://securetoken.google.com/{self.project_id}",
+            "aud": self.project_id,
+            "sub": uid,
+            "iat": now,
+            "exp": now + lifetime,
+            "role": role,
+        }
+        signing_input = f"{_b64encode(json.dumps(header).encode())}.{_b64encode(json.dumps(claims).encode())}"
+        signature = self._key.sign(signing_input.encode("ascii"), padding.PKCS1v15(), hashes.SHA256())
+        return f"{signing_input}.{_b64encode(signature)}"
+
+    def _handler(self):
+        issuer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, body, headers=()):
+                data = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                issuer.requests["certs"] += 1
+                self._send_json({issuer.kid: issuer._cert_pem},
+                                [("Cache-Control", f"public, max-age={issuer.certs_max_age}")])
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()
+                if self.path.startswith("/signin") or self.path.startswith("/signup"):
+                    issuer.requests["sign_up" if self.path.startswith("/signup") else "sign_in"] += 1
+                    email = json.loads(body)["email"]
+                    self._send_json({"idToken": issuer.mint(email, "verifier"), "refreshToken": f"refresh:{email}",
+                                     "expiresIn": str(TOKEN_LIFETIME)})
+                else:
+                    issuer.requests["refresh"] += 1
+                    email = parse_qs(body)["refresh_token"][0].split(":", 1)[1]
+                    self._send_json({"id_token": issuer.mint(email, "verifier"), "refresh_token": f"refresh:{email}",
+                                     "expires_in": str(TOKEN_LIFETIME)})
+
+        return Handler
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        os.environ.update({
+            "FIREBASE_PROJECT_ID": self.project_id,
+            "FIREBASE_CERTS_URL": f"{self.url}/certs",
+            "FIREBASE_SIGN_IN_URL": f"{self.url}/signin",
+            "FIREBASE_SIGN_UP_URL": f"{self.url}/signup",
+            "FIREBASE_REFRESH_URL": f"{self.url}/token",
+        })
+        return self
+
+
+def timed(operation, repeat=1):
+    """Average seconds per call"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        operation()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the auth path against a fake token issuer.")
+    parser.add_argument("--page-loads", type=int, default=10000)
+    parser.add_argument("--uncached", type=int, default=500)
+    args = parser.parse_args()
+
+    issuer = FakeTokenIssuer().start()
+    # Endpoints are read from the environment at import time
+    from db.firebase_app import get_token_verifier, get_user_role, refresh_tokens, sign_in
+    from db.token_verifier import IdTokenVerifier, TokenVerificationError
+
+    tokens = {}
+
+    def login():
+        tokens.update(sign_in("user@example.com", "password"))
+        assert get_user_role(tokens["id_token"]) == "verifier"
+
+    print(f"login (sign-in + first role check): {timed(login) * 1000:8.2f} ms")
+    page_load = timed(lambda: get_user_role(tokens["id_token"]), args.page_loads)
+    print(f"role check on page load (cached):   {page_load * 1e6:8.2f} us")
+
+    uncached_verifier = IdTokenVerifier(PROJECT_ID, cache_size=0)
+    uncached_verifier.keys = get_token_verifier().keys
+    uncached = timed(lambda: uncached_verifier.verify(tokens["id_token"]), args.uncached)
+    print(f"full verification (certs cached):   {uncached * 1e6:8.2f} us")
+
+    refresh = timed(lambda: tokens.update(refresh_tokens(tokens["refresh_token"])), 20)
+    print(f"re-auth with refresh token:         {refresh * 1000:8.2f} ms")
+
+    try:
+        uncached_verifier.verify(issuer.mint("user@example.com", "verifier", lifetime=-3600))
+        expired_rejected = False
+    except TokenVerificationError:
+        expired_rejected = True
+    print(f"expired token rejected: {expired_rejected}")
+    print(f"issuer requests: {dict(issuer.requests)}  token cache: {get_token_verifier().stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Gas and latency comparison of Certification (v1) and CertificationV2.
+
+Registers a throwaway institute on both deployments, then issues, reads,
+verifies and revokes the same certificates on each and reports average gas
+and wall-clock latency per operation. Needs both contracts deployed on the
+node configured in connection.py (e.g. Ganache after truffle migrate).
+
+Reads make the same number of calls on both versions, so latency compares
+the storage layouts rather than round-trips:
+- read: getCertificate + isRevoked on each version,
+- verify: v1 verifyCertificateFull against v2 verifyCertificate, one call each.
+Read-only calls cost no gas when called; their gas column is the execution
+gas reported by estimate_gas (including the same 21000 base cost on both),
+which tracks the storage reads of each layout.
+
+Usage (from the application directory):
+    python -m benchmarks.contract_v2_benchmark --certificates 20
+"""
+import argparse
+import hashlib
+import statistics
+import tempfile
+import time
+
+from connection import contract, contract_v2, w3
+from utils.cert_utils import compute_certificate_id
+from utils.cert_v2_utils import (certificate_id_to_bytes32, certificate_input, digest_to_cid, fields_commitment,
+                                 institute_id)
+from utils.crypto_utils import DigitalCertificateAuth
+
+
+def timed_transaction(function, sender):
+    start = time.perf_counter()
+    receipt = w3.eth.wait_for_transaction_receipt(function.transact({'from': sender}))
+    return receipt["gasUsed"], time.perf_counter() - start
+
+
+def timed_calls(*functions):
+    """(execution gas, seconds) for calling functions one after another"""
+    gas = sum(function.estimate_gas() for function in functions)
+    start = time.perf_counter()
+    for function in functions:
+        function.call()
+    return gas, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare v1 and v2 contract gas and latency.")
+    parser.add_argument("--certificates", type=int, default=20)
+    args = parser.parse_args()
+
+    if contract_v2 is None:
+        print("❌ CertificationV2 is not deployed. Run truffle migrate first.")
+        return
+
+    sender = w3.eth.accounts[0]
+    institute_email = f"benchmark-{int(time.time())}@institute.edu"
+    crypto_auth = DigitalCertificateAuth()
+    crypto_auth.keys_dir = tempfile.mkdtemp()
+    crypto_auth.generate_institute_keys(institute_email)
+    public_key = crypto_auth.get_institute_public_key(institute_email)
+
+    for deployed in (contract, contract_v2):
+        timed_transaction(deployed.functions.registerInstitute(institute_email, "Benchmark Institute", public_key), sender)
+        timed_transaction(deployed.functions.verifyInstitute(institute_email), sender)
+
+    results = {name: {"v1": [], "v2": []} for name in ("issue", "read", "verify", "revoke")}
+    for i in range(args.certificates):
+        uid, candidate_name, course_name, org_name = str(i), f"Candidate {i}", "Benchmarking", "Benchmark Institute"
+        certificate_id = compute_certificate_id(f"{uid}-{institute_email}", candidate_name, course_name, org_name)
+        ipfs_hash = digest_to_cid(hashlib.sha256(certificate_id.encode()).digest())
+        signature = crypto_auth.sign_certificate_data(institute_email, {
+            "uid": uid, "candidate_name": candidate_name, "course_name": course_name, "org_name": org_name,
+            "ipfs_hash": ipfs_hash, "certificate_id": certificate_id
+        })
+
+        results["issue"]["v1"].append(timed_transaction(contract.functions.generateCertificate(
+            certificate_id, uid, candidate_name, course_name, org_name, ipfs_hash, institute_email, signature
+        ), sender))
+        results["issue"]["v2"].append(timed_transaction(contract_v2.functions.generateCertificate(
+            certificate_input(certificate_id, uid, candidate_name, course_name, org_name, ipfs_hash, signature),
+            institute_id(institute_email)
+        ), sender))
+
+        certificate_key = certificate_id_to_bytes32(certificate_id)
+        results["read"]["v1"].append(timed_calls(
+            contract.functions.getCertificate(certificate_id),
+            contract.functions.isRevoked(certificate_id),
+        ))
+        results["read"]["v2"].append(timed_calls(
+            contract_v2.functions.getCertificate(certificate_key),
+            contract_v2.functions.isRevoked(certificate_key),
+        ))
+        results["verify"]["v1"].append(timed_calls(contract.functions.verifyCertificateFull(certificate_id)))
+        results["verify"]["v2"].append(timed_calls(
+            contract_v2.functions.verifyCertificate(
+                certificate_key, fields_commitment(uid, candidate_name, course_name, org_name)
+            ),
+        ))
+
+        results["revoke"]["v1"].append(timed_transaction(contract.functions.revokeCertificate(certificate_id), sender))
+        results["revoke"]["v2"].append(timed_transaction(contract_v2.functions.revokeCertificate(certificate_key), sender))
+
+    # Gas for issue and revoke is gas used by the transaction; for read and verify it is execution gas
+    print(f"{'operation':<10}{'v1 gas':>12}{'v2 gas':>12}{'saved':>8}{'v1 ms':>10}{'v2 ms':>10}")
+    for name, versions in results.items():
+        v1_gas = statistics.mean(gas for gas, _ in versions["v1"])
+        v2_gas = statistics.mean(gas for gas, _ in versions["v2"])
+        v1_ms = statistics.mean(seconds for _, seconds in versions["v1"]) * 1000
+        v2_ms = statistics.mean(seconds for _, seconds in versions["v2"]) * 1000
+        saved = f"{(1 - v2_gas / v1_gas) * 100:.0f}%" if v1_gas else "-"
+        print(f"{name:<10}{v1_gas:>12.0f}{v2_gas:>12.0f}{saved:>8}{v1_ms:>10.2f}{v2_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Import-time profile of the Streamlit pages.
+
+Runs each page with Streamlit's AppTest in a fresh interpreter (streamlit
+itself already imported) and reports:
+- cold: the first run, i.e. imports plus module-level setup, which is what the
+  first visit to the page costs a new server process,
+- rerun: the average of later runs, which every widget interaction pays again.
+
+Pages run without a logged-in session, so protected pages stop at their
+auth redirect after their imports and setup.
+
+--detail PAGE prints the slowest modules imported by that page, from
+python -X importtime.
+
+Usage (from the application directory):
+    python -m benchmarks.import_profile
+    python -m benchmarks.import_profile --detail pages/verifier/verifier.py
+"""
+import argparse
+import ast
+import os
+import subprocess
+import sys
+
+PAGES = (
+    "app.py",
+    "pages/home.py",
+    "pages/verifier/verifier_login.py",
+    "pages/verifier/verifier.py",
+    "pages/institute/institute.py",
+)
+
+CHILD = """
+import sys, time
+from streamlit.testing.v1 import AppTest
+page, reruns = sys.argv[1], int(sys.argv[2])
+app = AppTest.from_file(page, default_timeout=120)
+start = time.perf_counter()
+app.run()
+cold = time.perf_counter() - start
+start = time.perf_counter()
+for _ in range(reruns):
+    app.run()
+print(cold, (time.perf_counter() - start) / reruns)
+"""
+
+
+def import_snippet(page_path):
+    """The page's module-level import statements as source code"""
+    with open(page_path) as f:
+        tree = ast.parse(f.read())
+    imports = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return "\n".join(ast.unparse(node) for node in imports)
+
+
+def child_env():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+    return env
+
+
+def profile(page, reruns):
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, page, str(reruns)],
+        capture_output=True, text=True, env=child_env(),
+    )
+    if output.returncode != 0:
+        raise RuntimeError(output.stderr.strip().splitlines()[-1])
+    cold, rerun = output.stdout.strip().splitlines()[-1].split()
+    return float(cold), float(rerun)
+
+
+def slowest_imports(snippet, top):
+    """(cumulative_us, module) for the slowest imports, from -X importtime"""
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", snippet],
+        capture_output=True, text=True, env=child_env(),
+    )
+    rows = []
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        # Only top-level entries of the import tree (no leading indentation)
+        if module.startswith(" ") and not module.startswith("  "):
+            rows.append((int(cumulative), module.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile page import time.")
+    parser.add_argument("--pages", nargs="*", default=PAGES)
+    parser.add_argument("--reruns", type=int, default=10)
+    parser.add_argument("--detail", help="Page to break down by module")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    if args.detail:
+        for cumulative, module in slowest_imports(import_snippet(args.detail), args.top):
+            print(f"{cumulative / 1000:>9.1f} ms  {module}")
+        return
+
+    print(f"{'page':<36} {'cold ms':>9} {'rerun ms':>9}")
+    for page in args.pages:
+        try:
+            cold, rerun = profile(page, args.reruns)
+        except RuntimeError as e:
+            print(f"{page:<36} failed: {e}")
+            continue
+        print(f"{page:<36} {cold * 1000:>9.0f} {rerun * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Certificate rendering throughput and size.
+
+Compares three ways of producing the same certificates:
+- original: generate_certificate as it was before templates were added (styles
+  rebuilt per certificate, full-size logo, no page compression, no payload),
+- template: one CertificateTemplate rendering a separate PDF per certificate,
+- combined: one CertificateTemplate rendering a single multi-page PDF.
+
+Usage (from the application directory):
+    python -m benchmarks.render_benchmark --certificates 200
+"""
+import argparse
+import time
+from io import BytesIO
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image
+
+from utils.certificate_render import CertificateTemplate
+
+LOGO_PATH = "../assets/logo.jpg"
+
+
+def sample_certificates(count):
+    return [
+        {
+            "uid": str(1000 + i),
+            "candidate_name": f"Candidate {i}",
+            "course_name": "Distributed Systems",
+            "org_name": "Example Institute",
+        }
+        for i in range(count)
+    ]
+
+
+def _render_original(output, uid, candidate_name, course_name, org_name, institute_logo_path):
+    """Copy of the pre-template generate_certificate, kept here as the baseline"""
+    doc = SimpleDocTemplate(output, pagesize=letter)
+    elements = []
+    if institute_logo_path:
+        elements.append(Image(institute_logo_path, width=150, height=150))
+    institute_style = ParagraphStyle("InstituteStyle", parent=getSampleStyleSheet()["Title"],
+                                     fontName="Helvetica-Bold", fontSize=15, spaceAfter=40)
+    elements.extend([Paragraph(org_name, institute_style), Spacer(1, 12)])
+    title_style = ParagraphStyle("TitleStyle", parent=getSampleStyleSheet()["Title"],
+                                 fontName="Helvetica-Bold", fontSize=25, spaceAfter=20)
+    elements.extend([Paragraph("Certificate of Completion", title_style), Spacer(1, 6)])
+    recipient_style = ParagraphStyle("RecipientStyle", parent=getSampleStyleSheet()["BodyText"],
+                                     fontSize=14, spaceAfter=6, leading=18, alignment=1)
+    recipient_text = f"This is to certify that<br/><br/>\
+                     <font color='red'> {candidate_name} </font><br/>\
+                     with UID <br/> \
+                    <font color='red'> {uid} </font> <br/><br/>\
+                     has successfully completed the course:<br/>\
+                     <font color='blue'> {course_name} </font>"
+    elements.extend([Paragraph(recipient_text, recipient_style), Spacer(1, 12)])
+    doc.build(elements)
+
+
+def render_original(certificates, logo_path):
+    total_bytes = 0
+    for cert in certificates:
+        buffer = BytesIO()
+        _render_original(buffer, cert["uid"], cert["candidate_name"], cert["course_name"], cert["org_name"], logo_path)
+        total_bytes += len(buffer.getvalue())
+    return total_bytes
+
+
+def render_template(certificates, logo_path):
+    pdfs = CertificateTemplate(logo_path).render_many(certificates)
+    return sum(len(pdf) for pdf in pdfs)
+
+
+def render_combined(certificates, logo_path):
+    buffer = BytesIO()
+    CertificateTemplate(logo_path).render_combined(buffer, certificates)
+    return len(buffer.getvalue())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark certificate PDF rendering.")
+    parser.add_argument("--certificates", type=int, default=200)
+    parser.add_argument("--logo", default=LOGO_PATH)
+    args = parser.parse_args()
+
+    certificates = sample_certificates(args.certificates)
+    print(f"{'mode':<10} {'PDFs/sec':>10} {'bytes/cert':>12}")
+    for name, render in (("original", render_original), ("template", render_template),
+                         ("combined", render_combined)):
+        start = time.perf_counter()
+        total_bytes = render(certificates, args.logo)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<10} {len(certificates) / elapsed:>10.1f} {total_bytes / len(certificates):>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Session lookup latency for the login session store.
+
+Creates --sessions sessions in a throwaway SQLite file, then measures:
+- cold: the first lookup of every session, as after a server restart,
+- warm: repeated lookups from --threads threads, which is what each page
+  render of a logged-in browser costs,
+- unknown: lookups of a token that has no session (stale or forged cookie).
+
+SQLite statements are counted with a trace callback, so the warm and unknown
+rows show whether the render path still reaches the database.
+
+Usage (from the application directory):
+    python -m benchmarks.session_benchmark --sessions 5000 --threads 8
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from db.session_store import SessionStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark session store lookups.")
+    parser.add_argument("--sessions", type=int, default=5000)
+    parser.add_argument("--lookups", type=int, default=20, help="Warm lookups per session")
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = SessionStore(db_path=os.path.join(directory, "sessions.sqlite3"))
+        start = time.perf_counter()
+        tokens = [store.create(f"user{i}@example.com", "verifier", f"refresh-{i}") for i in range(args.sessions)]
+        print(f"create:  {(time.perf_counter() - start) / args.sessions * 1e6:8.2f} us/session")
+
+        statements = []
+        store._conn.set_trace_callback(statements.append)
+
+        store._memory.clear()
+        start = time.perf_counter()
+        assert all(store.get(token) for token in tokens)
+        print(f"cold:    {(time.perf_counter() - start) / args.sessions * 1e6:8.2f} us/lookup"
+              f"  sqlite statements: {len(statements)}")
+
+        statements.clear()
+
+        def render(offset):
+            for token in tokens[offset::args.threads] * args.lookups:
+                store.get(token)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.threads) as pool:
+            list(pool.map(render, range(args.threads)))
+        total = args.sessions * args.lookups
+        elapsed = time.perf_counter() - start
+        print(f"warm:    {elapsed / total * 1e6:8.2f} us/lookup  {total / elapsed:,.0f} lookups/s"
+              f"  sqlite statements: {len(statements)}")
+
+        statements.clear()
+        start = time.perf_counter()
+        for _ in range(1000):
+            assert store.get("no-such-session") is None
+        print(f"unknown: {(time.perf_counter() - start) / 1000 * 1e6:8.2f} us/lookup"
+              f"  sqlite statements: {len(statements)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,30 @@
+"""Web3 connection and contract handles, created on first use.
+
+Nothing touches the network or the build artifacts at import time. Use the
+accessors (get_w3, get_contract, ...); `from connection import contract`
+still works for scripts and resolves the same cached objects.
+"""
 import json
 from pathlib import Path
-from web3 import Web3
 
-# Connect to a local Ethereum node
-w3 = Web3(Web3.HTTPProvider('http://127.0.0.1:8545'))
+from http_session import HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, get_session
+from resources import lazy_resource
+
+
+@lazy_resource
+def get_w3():
+    from web3 import Web3
+
+    # Connect to a local Ethereum node over a pooled keep-alive session
+    return Web3(Web3.HTTPProvider(
+        'http://127.0.0.1:8545',
+        session=get_session("web3"),
+        request_kwargs={"timeout": (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)},
+    ))
 
-def get_contract_abi():
-    certification_json_path = Path('../build/contracts/Certification.json')
+
+def get_contract_abi(contract_name="Certification"):
+    certification_json_path = Path(f'../build/contracts/{contract_name}.json')
 
     try:
         with open(certification_json_path, 'r') as json_file:
@@ -16,11 +34,43 @@ def get_contract_abi():
         print(f"Error: {certification_json_path} not found.")
         return []
 
-contract_abi = get_contract_abi()
-deployment_config_fpath = Path("../deployment_config.json")
-with open(deployment_config_fpath, 'r') as json_file:
-    address_data = json.load(json_file)
-contract_address = address_data.get('Certification')
 
-# Interact with the smart contract
-contract = w3.eth.contract(address=contract_address, abi=contract_abi)
+@lazy_resource
+def get_deployment_config():
+    deployment_config_fpath = Path("../deployment_config.json")
+    with open(deployment_config_fpath, 'r') as json_file:
+        return json.load(json_file)
+
+
+def get_contract_address():
+    return get_deployment_config().get('Certification')
+
+
+@lazy_resource
+def get_contract():
+    # Interact with the smart contract
+    return get_w3().eth.contract(address=get_contract_address(), abi=get_contract_abi())
+
+
+@lazy_resource
+def get_contract_v2():
+    """Compact v2 layout, only available once migrations/5_deploy_certification_v2.js has run"""
+    contract_v2_address = get_deployment_config().get('CertificationV2')
+    if not contract_v2_address:
+        return None
+    return get_w3().eth.contract(address=contract_v2_address, abi=get_contract_abi("CertificationV2"))
+
+
+_ACCESSORS = {
+    "w3": get_w3,
+    "contract": get_contract,
+    "contract_address": get_contract_address,
+    "contract_v2": get_contract_v2,
+}
+
+
+def __getattr__(name):
+    # Module attributes kept for `from connection import contract, w3`
+    if name in _ACCESSORS:
+        return _ACCESSORS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
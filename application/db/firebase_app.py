@@ -1,12 +1,19 @@
 import os
+import time
 
-import firebase_admin
-import pyrebase
 from dotenv import load_dotenv
-from firebase_admin import credentials, auth as admin_auth
+from http_session import get_session
+from resources import lazy_resource
 
 load_dotenv()
 
+# Identity Toolkit / Secure Token REST endpoints; overridable for a local fake issuer
+FIREBASE_SIGN_IN_URL = os.getenv(
+    "FIREBASE_SIGN_IN_URL", "https://identitytoolkit.googleapis.com/v1/accounts:signInWithPassword"
+)
+FIREBASE_SIGN_UP_URL = os.getenv("FIREBASE_SIGN_UP_URL", "https://identitytoolkit.googleapis.com/v1/accounts:signUp")
+FIREBASE_REFRESH_URL = os.getenv("FIREBASE_REFRESH_URL", "https://securetoken.googleapis.com/v1/token")
+
 config = {
     "apiKey": os.getenv("FIREBASE_API_KEY"),
     "authDomain": os.getenv("FIREBASE_AUTH_DOMAIN"),
@@ -17,16 +24,30 @@ config = {
     "appId": os.getenv("FIREBASE_APP_ID"),
 }
 
-firebase = pyrebase.initialize_app(config)
-auth = firebase.auth()
 
-if not firebase_admin._apps:
-    cred = credentials.Certificate("serviceAccountKey.json")
-    firebase_admin.initialize_app(cred)
+@lazy_resource
+def get_admin_auth():
+    """firebase_admin auth module, with the admin app initialized on first use"""
+    import firebase_admin
+    from firebase_admin import credentials, auth as admin_auth
+
+    if not firebase_admin._apps:
+        cred = credentials.Certificate("serviceAccountKey.json")
+        firebase_admin.initialize_app(cred)
+    return admin_auth
+
+
+@lazy_resource
+def get_token_verifier():
+    """Verifies ID tokens locally, caching signing certs and verified tokens"""
+    from db.token_verifier import IdTokenVerifier
+
+    return IdTokenVerifier(config["projectId"])
 
 
 def set_user_role(email, role):
     try:
+        admin_auth = get_admin_auth()
         user = admin_auth.get_user_by_email(email)
         admin_auth.set_custom_user_claims(user.uid, {"role": role})
         return True
@@ -37,8 +58,7 @@ def set_user_role(email, role):
 
 def get_user_role(id_token):
     try:
-        decoded = admin_auth.verify_id_token(id_token, clock_skew_seconds=60)
-        return decoded.get("role", "none")
+        return get_token_verifier().verify(id_token).get("role", "none")
     except Exception as e:
         print(f"Error verifying token: {e}")
         return None
@@ -46,7 +66,12 @@ def get_user_role(id_token):
 
 def register(email, password, role):
     try:
-        auth.create_user_with_email_and_password(email, password)
+        response = get_session("firebase").post(
+            FIREBASE_SIGN_UP_URL,
+            params={"key": config["apiKey"]},
+            json={"email": email, "password": password, "returnSecureToken": True},
+        )
+        response.raise_for_status()
         set_user_role(email, role)
         return True
     except Exception as e:
@@ -54,12 +79,48 @@ def register(email, password, role):
         return False
 
 
-def login(email, password):
+def sign_in(email, password):
+    """Password sign-in; returns {"id_token", "refresh_token", "expires_at"} or None"""
     try:
-        user = auth.sign_in_with_email_and_password(email, password)
-        if user:
-            return user.get("idToken")
-        return False
+        response = get_session("firebase").post(
+            FIREBASE_SIGN_IN_URL,
+            params={"key": config["apiKey"]},
+            json={"email": email, "password": password, "returnSecureToken": True},
+        )
+        response.raise_for_status()
+        data = response.json()
+        return {
+            "id_token": data["idToken"],
+            "refresh_token": data["refreshToken"],
+            "expires_at": time.time() + int(data["expiresIn"]),
+        }
     except Exception as e:
         print(f"Login_Error: {e}")
-        return False
+        return None
+
+
+def refresh_tokens(refresh_token):
+    """Exchanges a refresh token for a new ID token (same shape as sign_in), or None if it was revoked"""
+    try:
+        response = get_session("firebase").post(
+            FIREBASE_REFRESH_URL,
+            params={"key": config["apiKey"]},
+            data={"grant_type": "refresh_token", "refresh_token": refresh_token},
+        )
+        response.raise_for_status()
+        data = response.json()
+        return {
+            "id_token": data["id_token"],
+            "refresh_token": data["refresh_token"],
+            "expires_at": time.time() + int(data["expires_in"]),
+        }
+    except Exception as e:
+        print(f"Token refresh failed: {e}")
+        return None
+
+
+def login(email, password):
+    tokens = sign_in(email, password)
+    if tokens:
+        return tokens["id_token"]
+    return False
@@ -0,0 +1,326 @@
+import os
+import sqlite3
+import threading
+import time
+
+from connection import get_contract, get_contract_address, get_w3
+from resources import lazy_resource
+from rpc_batch import call_many
+
+LEDGER_DB_PATH = os.getenv("LEDGER_DB_PATH", "ledger_cache.sqlite3")
+LEDGER_START_BLOCK = int(os.getenv("LEDGER_START_BLOCK", 0))
+LEDGER_REORG_DEPTH = int(os.getenv("LEDGER_REORG_DEPTH", 12))
+LEDGER_MAX_LAG_BLOCKS = int(os.getenv("LEDGER_MAX_LAG_BLOCKS", 5))
+LEDGER_MAX_AGE_SECONDS = float(os.getenv("LEDGER_MAX_AGE_SECONDS", 30))
+LEDGER_SYNC_INTERVAL = float(os.getenv("LEDGER_SYNC_INTERVAL", 3))
+LEDGER_LOG_CHUNK_SIZE = int(os.getenv("LEDGER_LOG_CHUNK_SIZE", 2000))
+# How long a fetched chain head is reused when checking the cache's lag
+LEDGER_HEAD_TTL_SECONDS = float(os.getenv("LEDGER_HEAD_TTL_SECONDS", 1))
+# Certificates read per getCertificatesBatch call while syncing
+LEDGER_READ_BATCH_SIZE = int(os.getenv("LEDGER_READ_BATCH_SIZE", 200))
+# How long a write waits for another process holding the database lock
+LEDGER_BUSY_TIMEOUT_SECONDS = float(os.getenv("LEDGER_BUSY_TIMEOUT_SECONDS", 30))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS certificates (
+    certificate_id TEXT PRIMARY KEY,
+    uid TEXT,
+    candidate_name TEXT,
+    course_name TEXT,
+    org_name TEXT,
+    ipfs_hash TEXT,
+    institute_email TEXT,
+    digital_signature TEXT,
+    timestamp INTEGER,
+    block_number INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_certificates_ipfs_hash ON certificates (ipfs_hash);
+CREATE INDEX IF NOT EXISTS idx_certificates_block ON certificates (block_number);
+CREATE TABLE IF NOT EXISTS revocations (
+    certificate_id TEXT PRIMARY KEY,
+    block_number INTEGER
+);
+CREATE TABLE IF NOT EXISTS institutes (
+    email TEXT PRIMARY KEY,
+    name TEXT,
+    public_key TEXT,
+    is_verified INTEGER,
+    registered_at INTEGER,
+    block_number INTEGER,
+    verified_block INTEGER
+);
+"""
+
+EVENT_NAMES = ("certificateGenerated", "certificateRevoked", "instituteRegistered", "instituteVerified")
+
+
+class LedgerCache:
+    """Local SQLite read-model of the Certification contract, fed by its event logs.
+
+    The Streamlit app and every API worker open the same file, each with its
+    own syncer. The database runs in WAL mode with a busy timeout, so readers
+    never block on a writer and writers wait for each other; every write is
+    idempotent, so two processes applying the same logs agree.
+    """
+
+    def __init__(self, db_path=LEDGER_DB_PATH, reorg_depth=LEDGER_REORG_DEPTH):
+        self.db_path = db_path
+        self.reorg_depth = reorg_depth
+        # Guards the connection; only held for SQLite work, never across RPC calls
+        self._lock = threading.RLock()
+        # Serializes syncs so reads are not blocked while logs are fetched
+        self._sync_lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=LEDGER_BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._head = (None, 0.0)
+        self._last_sync_time = None
+        self._reset_if_contract_changed()
+
+    # --- Sync state ---
+    def _get_state(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_state(self, key, value):
+        self._conn.execute(
+            "INSERT INTO sync_state (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, str(value)),
+        )
+
+    def _reset_if_contract_changed(self):
+        """Drop cached data when the app points at a newly deployed contract"""
+        with self._lock, self._conn:
+            if self._get_state("contract_address") != str(get_contract_address()):
+                for table in ("certificates", "revocations", "institutes", "sync_state"):
+                    self._conn.execute(f"DELETE FROM {table}")
+                self._set_state("contract_address", get_contract_address())
+
+    @property
+    def last_synced_block(self):
+        value = self._get_state("last_block")
+        return int(value) if value is not None else LEDGER_START_BLOCK - 1
+
+    def chain_head(self):
+        """Current block number, reused for LEDGER_HEAD_TTL_SECONDS; None if the node is unreachable"""
+        head, fetched_at = self._head
+        if head is None or time.time() - fetched_at > LEDGER_HEAD_TTL_SECONDS:
+            try:
+                head = get_w3().eth.block_number
+            except Exception as e:
+                print(f"Error fetching chain head: {e}")
+                return None
+            self._head = (head, time.time())
+        return head
+
+    def sync_lag(self):
+        """Number of blocks the cache is behind the current chain head"""
+        head = self.chain_head()
+        if head is None:
+            return None
+        return max(head - self.last_synced_block, 0)
+
+    def seconds_since_sync(self):
+        if self._last_sync_time is None:
+            return None
+        return time.time() - self._last_sync_time
+
+    def is_stale(self, max_lag_blocks=LEDGER_MAX_LAG_BLOCKS, max_age_seconds=LEDGER_MAX_AGE_SECONDS):
+        """True when reads should fall back to the chain instead of the cache"""
+        age = self.seconds_since_sync()
+        if age is None or age > max_age_seconds:
+            return True
+        lag = self.sync_lag()
+        return lag is None or lag > max_lag_blocks
+
+    # --- Sync ---
+    def _rollback(self, to_block):
+        """Forget everything recorded after to_block so it is re-read from the chain"""
+        self._conn.execute("DELETE FROM certificates WHERE block_number > ?", (to_block,))
+        self._conn.execute("DELETE FROM revocations WHERE block_number > ?", (to_block,))
+        self._conn.execute("DELETE FROM institutes WHERE block_number > ?", (to_block,))
+        self._conn.execute(
+            "UPDATE institutes SET is_verified = 0, verified_block = NULL WHERE verified_block > ?",
+            (to_block,),
+        )
+        self._set_state("last_block", to_block)
+        self._set_state("last_block_hash", "")
+
+    def _detect_reorg(self):
+        last_block = self.last_synced_block
+        last_hash = self._get_state("last_block_hash")
+        if last_block < LEDGER_START_BLOCK or not last_hash:
+            return False
+        return get_w3().eth.get_block(last_block)["hash"].hex() != last_hash
+
+    def _fetch_logs(self, from_block, to_block):
+        logs = []
+        for event_name in EVENT_NAMES:
+            event = getattr(get_contract().events, event_name)()
+            logs.extend(event.get_logs(from_block=from_block, to_block=to_block))
+        return sorted(logs, key=lambda log: (log["blockNumber"], log["logIndex"]))
+
+    def _log_statements(self, logs):
+        """SQL statements recording a chunk of event logs, in log order.
+
+        Certificates and institute details never change once written, so they
+        are read from the current contract state rather than at each log's block
+        (which would need an archive node): one getCertificatesBatch call per
+        LEDGER_READ_BATCH_SIZE certificates and one batched request for the
+        institutes, not a call per event. Verification is taken from its own
+        event so a rollback can undo it.
+        """
+        certificate_ids = list(dict.fromkeys(
+            log["args"]["certificate_id"] for log in logs if log["event"] == "certificateGenerated"
+        ))
+        emails = list(dict.fromkeys(log["args"]["email"] for log in logs if log["event"] == "instituteRegistered"))
+
+        certificates = {}
+        for start in range(0, len(certificate_ids), LEDGER_READ_BATCH_SIZE):
+            batch_ids = certificate_ids[start:start + LEDGER_READ_BATCH_SIZE]
+            verifications = get_contract().functions.getCertificatesBatch(batch_ids).call()
+            for certificate_id, verification in zip(batch_ids, verifications):
+                if verification[0]:
+                    certificates[certificate_id] = tuple(verification[1])
+        institutes = {}
+        if emails:
+            institutes = dict(zip(emails, call_many(get_contract().functions.getInstitute(email) for email in emails)))
+
+        statements = []
+        for log in logs:
+            args = log["args"]
+            block_number = log["blockNumber"]
+            name = log["event"]
+
+            if name == "certificateGenerated" and args["certificate_id"] in certificates:
+                statements.append((
+                    "INSERT OR REPLACE INTO certificates VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (args["certificate_id"], *certificates[args["certificate_id"]], block_number),
+                ))
+            elif name == "certificateRevoked":
+                statements.append((
+                    "INSERT OR REPLACE INTO revocations VALUES (?, ?)",
+                    (args["certificate_id"], block_number),
+                ))
+            elif name == "instituteRegistered":
+                institute = institutes[args["email"]]
+                statements.append((
+                    "INSERT OR REPLACE INTO institutes VALUES (?, ?, ?, 0, ?, ?, NULL)",
+                    (args["email"], institute[0], institute[1], institute[3], block_number),
+                ))
+            elif name == "instituteVerified":
+                statements.append((
+                    "UPDATE institutes SET is_verified = 1, verified_block = ? WHERE email = ?",
+                    (block_number, args["email"]),
+                ))
+        return statements
+
+    def sync(self):
+        """Pull new event logs up to the chain head; returns the number of logs applied.
+
+        Logs and contract state are fetched without holding the read lock, which
+        is only taken to write each chunk.
+        """
+        with self._sync_lock:
+            if self._detect_reorg():
+                with self._lock, self._conn:
+                    self._rollback(max(self.last_synced_block - self.reorg_depth, LEDGER_START_BLOCK - 1))
+
+            head = get_w3().eth.block_number
+            self._head = (head, time.time())
+            applied = 0
+
+            from_block = self.last_synced_block + 1
+            while from_block <= head:
+                to_block = min(from_block + LEDGER_LOG_CHUNK_SIZE - 1, head)
+                logs = self._fetch_logs(from_block, to_block)
+                statements = self._log_statements(logs)
+                block_hash = get_w3().eth.get_block(to_block)["hash"].hex()
+                with self._lock, self._conn:
+                    for sql, params in statements:
+                        self._conn.execute(sql, params)
+                    self._set_state("last_block", to_block)
+                    self._set_state("last_block_hash", block_hash)
+                applied += len(logs)
+                from_block = to_block + 1
+
+            self._last_sync_time = time.time()
+            return applied
+
+    def start_background_sync(self, interval=LEDGER_SYNC_INTERVAL):
+        """Keep the cache in step with the chain from a daemon thread"""
+        def run():
+            while True:
+                try:
+                    self.sync()
+                except Exception as e:
+                    print(f"Ledger sync failed: {e}")
+                time.sleep(interval)
+
+        thread = threading.Thread(target=run, name="ledger-sync", daemon=True)
+        thread.start()
+        return thread
+
+    # --- Reads ---
+    def get_certificate_status(self, certificate_id):
+        """Returns (certificate, is_revoked, institute) in one indexed query, or None if unknown.
+
+        certificate and institute have the same shape as the contract's
+        getCertificate and getInstitute return values."""
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT c.uid, c.candidate_name, c.course_name, c.org_name, c.ipfs_hash,
+                       c.institute_email, c.digital_signature, c.timestamp,
+                       r.certificate_id IS NOT NULL,
+                       i.email, i.name, i.public_key, i.is_verified, i.registered_at
+                FROM certificates c
+                LEFT JOIN revocations r ON r.certificate_id = c.certificate_id
+                LEFT JOIN institutes i ON i.email = c.institute_email
+                WHERE c.certificate_id = ?
+                """,
+                (certificate_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        certificate = tuple(row[:8])
+        institute = (row[10], row[11], bool(row[12]), row[13]) if row[9] is not None else None
+        return certificate, bool(row[8]), institute
+
+    def get_certificate_id_by_ipfs_hash(self, ipfs_hash):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT certificate_id FROM certificates WHERE ipfs_hash = ?", (ipfs_hash,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def is_revoked(self, certificate_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM revocations WHERE certificate_id = ?", (certificate_id,)
+            ).fetchone()
+        return row is not None
+
+    def get_institute(self, email):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT name, public_key, is_verified, registered_at FROM institutes WHERE email = ?",
+                (email,),
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], bool(row[2]), row[3]
+
+
+@lazy_resource
+def get_ledger_cache():
+    """Process-wide ledger cache, synced in the background once created"""
+    ledger = LedgerCache()
+    ledger.start_background_sync()
+    return ledger
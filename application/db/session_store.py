@@ -0,0 +1,170 @@
+import base64
+import hashlib
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+from cryptography.fernet import Fernet, InvalidToken
+
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "sessions.sqlite3")
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", 24 * 3600))
+# How long a looked-up session stays in memory before it is re-read from SQLite
+SESSION_MEMORY_TTL_SECONDS = float(os.getenv("SESSION_MEMORY_TTL_SECONDS", 300))
+SESSION_SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", 60))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    token_hash TEXT PRIMARY KEY,
+    email TEXT,
+    role TEXT,
+    refresh_token TEXT,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at);
+"""
+
+FIELDS = ("email", "role", "refresh_token", "expires_at")
+
+
+def _hash(token):
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _cipher(token):
+    """Fernet keyed by the session token, which the database never sees"""
+    key = hashlib.sha256(b"session-refresh-token:" + token.encode("utf-8")).digest()
+    return Fernet(base64.urlsafe_b64encode(key))
+
+
+def _encrypt(token, refresh_token):
+    return _cipher(token).encrypt(refresh_token.encode("utf-8")).decode("ascii") if refresh_token else None
+
+
+def _decrypt(token, ciphertext):
+    if not ciphertext:
+        return None
+    try:
+        return _cipher(token).decrypt(ciphertext.encode("ascii")).decode("utf-8")
+    except InvalidToken:
+        return None
+
+
+class SessionStore:
+    """Login sessions keyed by a per-browser token: a TTL memory cache in front of SQLite.
+
+    Lookups for active sessions are served from memory; SQLite is only read when
+    a session is first seen by this process (e.g. after a restart) and written
+    on login, refresh and logout. A background sweep drops expired sessions.
+
+    Rows are keyed by the sha256 of the token and refresh tokens are stored
+    encrypted with a key derived from the token, so the database alone cannot
+    be used to log in.
+    """
+
+    def __init__(self, db_path=SESSION_DB_PATH, ttl=SESSION_TTL_SECONDS, memory_ttl=SESSION_MEMORY_TTL_SECONDS):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.memory_ttl = memory_ttl
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        # token_hash -> (cached_until, session dict or None for unknown tokens)
+        self._memory = {}
+
+    def create(self, email, role, refresh_token=None):
+        """Starts a session and returns its token, to be kept by the browser"""
+        token = secrets.token_urlsafe(32)
+        session = {"email": email, "role": role, "refresh_token": refresh_token, "expires_at": time.time() + self.ttl}
+        row = dict(session, refresh_token=_encrypt(token, refresh_token))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO sessions VALUES (?, ?, ?, ?, ?)",
+                (_hash(token), *(row[field] for field in FIELDS)),
+            )
+            self._memory[_hash(token)] = (time.time() + self.memory_ttl, session)
+        return token
+
+    def get(self, token):
+        """The session for a token, or None if it is unknown or expired"""
+        if not token:
+            return None
+        token_hash = _hash(token)
+        now = time.time()
+        with self._lock:
+            cached = self._memory.get(token_hash)
+            if cached is None or cached[0] < now:
+                row = self._conn.execute(
+                    f"SELECT {', '.join(FIELDS)} FROM sessions WHERE token_hash = ?", (token_hash,)
+                ).fetchone()
+                session = None
+                if row:
+                    session = dict(zip(FIELDS, row))
+                    session["refresh_token"] = _decrypt(token, session["refresh_token"])
+                # Unknown tokens are remembered too, so repeated bad cookies do not hit SQLite
+                cached = (now + self.memory_ttl, session)
+                self._memory[token_hash] = cached
+        session = cached[1]
+        if session is None or session["expires_at"] < now:
+            return None
+        return dict(session)
+
+    def update(self, token, **fields):
+        """Changes stored fields of a session, e.g. a rotated refresh token"""
+        token_hash = _hash(token)
+        if "refresh_token" in fields:
+            fields["refresh_token"] = _encrypt(token, fields["refresh_token"])
+        assignments = ", ".join(f"{field} = ?" for field in fields if field in FIELDS)
+        if not assignments:
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE sessions SET {assignments} WHERE token_hash = ?",
+                (*(value for field, value in fields.items() if field in FIELDS), token_hash),
+            )
+            self._memory.pop(token_hash, None)
+
+    def delete(self, token):
+        token_hash = _hash(token)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM sessions WHERE token_hash = ?", (token_hash,))
+            self._memory.pop(token_hash, None)
+
+    def sweep(self):
+        """Removes expired sessions and stale memory entries; returns the number of sessions removed"""
+        now = time.time()
+        with self._lock, self._conn:
+            removed = self._conn.execute("DELETE FROM sessions WHERE expires_at < ?", (now,)).rowcount
+            for token_hash in [key for key, (cached_until, session) in self._memory.items()
+                               if cached_until < now or (session and session["expires_at"] < now)]:
+                del self._memory[token_hash]
+        return removed
+
+    def start_background_sweep(self, interval=SESSION_SWEEP_INTERVAL):
+        """Expire sessions from a daemon thread"""
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.sweep()
+                except Exception as e:
+                    print(f"Session sweep failed: {e}")
+
+        thread = threading.Thread(target=run, name="session-sweep", daemon=True)
+        thread.start()
+        return thread
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_session_store():
+    """Process-wide session store, swept in the background once created"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SessionStore()
+            _store.start_background_sweep()
+        return _store
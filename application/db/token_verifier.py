@@ -0,0 +1,172 @@
+"""Local verification of Firebase ID tokens.
+
+Firebase ID tokens are RS256 JWTs signed with Google's rotating securetoken
+keys. Instead of re-verifying through firebase_admin on every page load:
+- the signing certificates are fetched once and kept for as long as the
+  response's Cache-Control max-age allows,
+- verified tokens are cached under the sha256 of the token until their exp
+  claim, so repeated role checks for a session are dictionary lookups.
+
+FIREBASE_CERTS_URL and FIREBASE_TOKEN_ISSUER can point at a local fake
+issuer (see benchmarks/auth_benchmark.py).
+"""
+import base64
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.x509 import load_pem_x509_certificate
+
+from http_session import get_session
+
+FIREBASE_CERTS_URL = os.getenv(
+    "FIREBASE_CERTS_URL",
+    "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com",
+)
+# The project ID is appended to this prefix to form the expected iss claim
+FIREBASE_TOKEN_ISSUER = os.getenv("FIREBASE_TOKEN_ISSUER", "https://securetoken.google.com/")
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+TOKEN_CLOCK_SKEW_SECONDS = int(os.getenv("TOKEN_CLOCK_SKEW_SECONDS", 60))
+# Used when the certificate response carries no usable caching headers
+CERTS_DEFAULT_MAX_AGE = 300
+# Unknown kids refetch the certificates at most this often, so forged tokens cannot force a fetch per request
+CERTS_MIN_REFETCH_SECONDS = int(os.getenv("CERTS_MIN_REFETCH_SECONDS", 30))
+
+MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+
+
+class TokenVerificationError(Exception):
+    """The ID token is malformed, expired, or not signed by the expected issuer"""
+
+
+def _b64decode(segment):
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+def _cache_lifetime(headers):
+    """Seconds a certificate response may be reused, from Cache-Control or Expires"""
+    match = MAX_AGE_PATTERN.search(headers.get("Cache-Control", ""))
+    if match:
+        return int(match.group(1))
+    if "Expires" in headers:
+        try:
+            expires = parsedate_to_datetime(headers["Expires"]).timestamp()
+            return max(expires - time.time(), 0)
+        except (TypeError, ValueError):
+            pass
+    return CERTS_DEFAULT_MAX_AGE
+
+
+class SigningKeyCache:
+    """Public keys by key ID, refetched when the cached response expires or an unknown kid shows up.
+
+    Refetches for unknown kids are limited to one per min_refetch seconds.
+    """
+
+    def __init__(self, certs_url=FIREBASE_CERTS_URL, min_refetch=CERTS_MIN_REFETCH_SECONDS):
+        self.certs_url = certs_url
+        self.min_refetch = min_refetch
+        self._lock = threading.Lock()
+        self._keys = {}
+        self._expires_at = 0.0
+        self._fetched_at = float("-inf")
+        self.fetches = 0
+
+    def _fetch(self):
+        response = get_session("firebase").get(self.certs_url)
+        response.raise_for_status()
+        self._keys = {
+            kid: load_pem_x509_certificate(pem.encode("utf-8")).public_key()
+            for kid, pem in response.json().items()
+        }
+        self._fetched_at = time.time()
+        self._expires_at = self._fetched_at + _cache_lifetime(response.headers)
+        self.fetches += 1
+
+    def get(self, kid):
+        with self._lock:
+            now = time.time()
+            if now >= self._expires_at or (kid not in self._keys and now - self._fetched_at >= self.min_refetch):
+                self._fetch()
+            key = self._keys.get(kid)
+        if key is None:
+            raise TokenVerificationError(f"Unknown signing key {kid!r}")
+        return key
+
+
+class IdTokenVerifier:
+    def __init__(self, project_id, certs_url=FIREBASE_CERTS_URL, issuer_prefix=FIREBASE_TOKEN_ISSUER,
+                 cache_size=TOKEN_CACHE_SIZE, clock_skew=TOKEN_CLOCK_SKEW_SECONDS):
+        self.project_id = project_id
+        self.issuer = f"{issuer_prefix}{project_id}"
+        self.clock_skew = clock_skew
+        self.cache_size = cache_size
+        self.keys = SigningKeyCache(certs_url)
+        self._lock = threading.Lock()
+        # sha256(token) -> claims, oldest first
+        self._verified = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def _check(self, id_token):
+        """Claims of a token after checking its signature and standard claims"""
+        try:
+            header_segment, payload_segment, signature_segment = id_token.split(".")
+            header = json.loads(_b64decode(header_segment))
+            claims = json.loads(_b64decode(payload_segment))
+            signature = _b64decode(signature_segment)
+        except (AttributeError, ValueError) as e:
+            raise TokenVerificationError(f"Malformed ID token: {e}")
+
+        if header.get("alg") != "RS256":
+            raise TokenVerificationError(f"Unexpected algorithm {header.get('alg')!r}")
+        public_key = self.keys.get(header.get("kid"))
+        try:
+            public_key.verify(signature, f"{header_segment}.{payload_segment}".encode("ascii"),
+                              padding.PKCS1v15(), hashes.SHA256())
+        except InvalidSignature:
+            raise TokenVerificationError("Invalid ID token signature")
+
+        now = time.time()
+        if claims.get("aud") != self.project_id:
+            raise TokenVerificationError("ID token has the wrong audience")
+        if claims.get("iss") != self.issuer:
+            raise TokenVerificationError("ID token has the wrong issuer")
+        if not claims.get("sub"):
+            raise TokenVerificationError("ID token has no subject")
+        if claims.get("iat", 0) > now + self.clock_skew:
+            raise TokenVerificationError("ID token was issued in the future")
+        if claims.get("exp", 0) <= now - self.clock_skew:
+            raise TokenVerificationError("ID token has expired")
+        return claims
+
+    def verify(self, id_token):
+        """Claims of a valid ID token; raises TokenVerificationError otherwise"""
+        token_hash = hashlib.sha256(id_token.encode("utf-8")).hexdigest()
+        with self._lock:
+            claims = self._verified.get(token_hash)
+            if claims is not None:
+                if claims["exp"] > time.time() - self.clock_skew:
+                    self._verified.move_to_end(token_hash)
+                    self.stats["hits"] += 1
+                    return claims
+                del self._verified[token_hash]
+            self.stats["misses"] += 1
+
+        claims = self._check(id_token)
+        with self._lock:
+            self._verified[token_hash] = claims
+            while len(self._verified) > self.cache_size:
+                self._verified.popitem(last=False)
+        return claims
+
+    def invalidate(self, id_token):
+        with self._lock:
+            self._verified.pop(hashlib.sha256(id_token.encode("utf-8")).hexdigest(), None)
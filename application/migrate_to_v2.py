@@ -0,0 +1,109 @@
+"""Copies institutes and certificates from the v1 Certification contract into CertificationV2.
+
+Timestamps, verification and revocation state are preserved. Re-running the
+script skips anything already present in v2, so an interrupted migration can
+simply be started again. Pass --close to lock the import functions afterwards.
+
+Usage (from the application directory):
+    python migrate_to_v2.py [--chunk-size 20] [--close]
+"""
+import argparse
+
+from connection import contract, contract_v2, w3
+from web3.exceptions import ContractLogicError
+from utils.cert_utils import get_certificate_status, iter_certificate_ids, iter_institute_emails
+from utils.cert_v2_utils import certificate_id_to_bytes32, certificate_input, institute_id
+
+
+def _wait(tx_hash):
+    receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+    if receipt["status"] != 1:
+        raise RuntimeError(f"Transaction {tx_hash.hex()} reverted")
+    return receipt
+
+
+def migrate_institutes(sender):
+    migrated = 0
+    for email in iter_institute_emails():
+        try:
+            contract_v2.functions.getInstitute(institute_id(email)).call()
+            continue
+        except ContractLogicError:
+            pass
+
+        name, public_key, is_verified, registered_at = contract.functions.getInstitute(email).call()
+        _wait(contract_v2.functions.importInstitute(
+            email, name, public_key, is_verified, registered_at
+        ).transact({'from': sender}))
+        migrated += 1
+    return migrated
+
+
+def migrate_certificates(sender, chunk_size):
+    migrated = 0
+    skipped = []
+    pending = []
+
+    def flush():
+        nonlocal migrated
+        if not pending:
+            return
+        inputs, institute_ids, timestamps, revoked = (list(column) for column in zip(*pending))
+        _wait(contract_v2.functions.importCertificates(
+            inputs, institute_ids, timestamps, revoked
+        ).transact({'from': sender}))
+        migrated += len(pending)
+        pending.clear()
+
+    for certificate_id in iter_certificate_ids():
+        if contract_v2.functions.certificateExists(certificate_id_to_bytes32(certificate_id)).call():
+            continue
+
+        certificate, is_revoked, _ = get_certificate_status(certificate_id)
+        uid, candidate_name, course_name, org_name, ipfs_hash, institute_email, digital_signature, timestamp = \
+            certificate
+        try:
+            cert_input = certificate_input(certificate_id, uid, candidate_name, course_name, org_name,
+                                           ipfs_hash, digital_signature)
+        except (ValueError, KeyError) as e:
+            skipped.append((certificate_id, str(e)))
+            continue
+
+        pending.append((
+            cert_input,
+            institute_id(institute_email),
+            timestamp,
+            is_revoked,
+        ))
+        if len(pending) >= chunk_size:
+            flush()
+
+    flush()
+    return migrated, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate v1 certificates into CertificationV2.")
+    parser.add_argument("--chunk-size", type=int, default=20, help="Certificates per importCertificates transaction")
+    parser.add_argument("--close", action="store_true", help="Close the migration once everything is imported")
+    args = parser.parse_args()
+
+    if contract_v2 is None:
+        print("❌ CertificationV2 is not deployed. Run truffle migrate first.")
+        return
+
+    sender = w3.eth.accounts[0]
+    print(f"✅ Institutes migrated: {migrate_institutes(sender)}")
+
+    migrated, skipped = migrate_certificates(sender, args.chunk_size)
+    print(f"✅ Certificates migrated: {migrated}")
+    for certificate_id, reason in skipped:
+        print(f"⚠️ Skipped {certificate_id}: {reason}")
+
+    if args.close:
+        _wait(contract_v2.functions.closeMigration().transact({'from': sender}))
+        print("🔒 Migration closed")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,19 @@
 import hashlib
+import io
 import os
 import json
+import zipfile
 
 import streamlit as st
-from connection import contract, w3
+from connection import get_contract, get_w3
 from dotenv import load_dotenv
 from utils.auth import AuthManager
-from utils.cert_utils import generate_certificate, get_certificate_id_ipfs_hash
-from utils.pinata_utils import upload_to_pinata, delete_pinata_file, get_pinata_files
+from utils.batch_issue import CHECKPOINT_DIR, PROOF_DIR, issue_batch, read_candidates
+from utils.cert_utils import (compute_certificate_id, generate_certificate, get_certificate_ids_by_ipfs_hashes,
+                              revoke_anchored_certificate)
+from utils.ipfs_cache import get_ipfs_cache
+from utils.pinata_async import delete_many_pinata_files
+from utils.pinata_utils import upload_bytes_to_pinata, delete_pinata_file, get_pinata_files_pages, invalidate_pinata_files
 from utils.streamlit_utils import hide_sidebar
 from utils.streamlit_utils import view_certificate, get_next_uid, uid_created
 from utils.crypto_utils import DigitalCertificateAuth
@@ -20,11 +26,24 @@ auth.require_auth(allowed_roles=("institute",))
 
 load_dotenv()
 
+NOT_ON_CHAIN = "Certificate is not in blockchain"
+
+
+def revoke_on_chain(certificate_id, anchored_proof_cid):
+    """Revokes a listed certificate on chain; returns extra CIDs to unpin along with its PDF"""
+    sender = get_w3().eth.accounts[0]
+    if anchored_proof_cid:
+        revoke_anchored_certificate(certificate_id, anchored_proof_cid, sender)
+        return [anchored_proof_cid]
+    get_contract().functions.revokeCertificate(certificate_id).transact({'from': sender})
+    return []
+
 # --- UI: Role Selection ---
 st.markdown("<h2 style='text-align: center;'>🎓 Certificate Validation System</h2>", unsafe_allow_html=True)
 st.write("")
 
-options = ("Institute Registration", "List Of Certificate", "Generate Certificate", "View Certificates", "Export Credentials")
+options = ("Institute Registration", "List Of Certificate", "Generate Certificate", "Batch Generate Certificates",
+           "View Certificates", "Export Credentials")
 selected = st.selectbox("Select an option", options, label_visibility="collapsed")
 
 # --- Institute Registration ---
@@ -47,6 +66,7 @@ if selected == "Institute Registration":
             with open(public_key_path, 'r') as f:
                 public_key = f.read()
             st.text_area("Your Public Key (for verification)", public_key, height=150)
+            st.caption(f"Signature algorithm: {crypto_auth.get_institute_key_type(institute_email)}")
         
         submit = st.form_submit_button("Register Institute")
         
@@ -56,49 +76,64 @@ if selected == "Institute Registration":
             else:
                 try:
                     # Register institute on blockchain (auto-verified)
-                    contract.functions.registerInstitute(
+                    get_contract().functions.registerInstitute(
                         institute_email,
                         institute_name,
                         public_key
-                    ).transact({'from': w3.eth.accounts[0]})
+                    ).transact({'from': get_w3().eth.accounts[0]})
                     # Immediately verify the institute
-                    contract.functions.verifyInstitute(institute_email).transact({'from': w3.eth.accounts[0]})
+                    get_contract().functions.verifyInstitute(institute_email).transact({'from': get_w3().eth.accounts[0]})
                     st.success("✅ Institute registered and automatically verified! You can now issue certificates.")
                 except Exception as e:
                     st.error(f"❌ Registration failed: {str(e)}")
 
 # --- Certificate Generation ---
 elif selected == "List Of Certificate":
-    files = get_pinata_files(st.session_state.user_email)
+    # Render the first page right away; further pages are fetched on "Load more"
+    if "pinata_pages" not in st.session_state:
+        st.session_state.pinata_pages = 1
+
+    # A pin can shift between two cached pages; get_pinata_files_pages lists it once
+    files, has_more = get_pinata_files_pages(st.session_state.user_email, st.session_state.pinata_pages)
 
     if not files:
         st.info("No files found.")
     else:
+        # Resolve every row's certificate ID up front in one batched lookup
+        certificate_ids = get_certificate_ids_by_ipfs_hashes([f['ipfs_pin_hash'] for f in files])
+
+        listed = []
         count = 1
         for f in files:
             name = f['metadata'].get('name', 'Unnamed')
+            keyvalues = f['metadata'].get('keyvalues') or {}
             ipfs_hash = f['ipfs_pin_hash']
             link = f"https://gateway.pinata.cloud/ipfs/{ipfs_hash}"
-            certificate_id = get_certificate_id_ipfs_hash(ipfs_hash) or "Certificate is not in blockchain"
+            # Certificates from an anchored batch are not indexed on chain; their pin metadata links the Merkle proof
+            anchored_proof_cid = None if certificate_ids[ipfs_hash] else keyvalues.get('merkle_proof_cid')
+            certificate_id = (certificate_ids[ipfs_hash] or (anchored_proof_cid and keyvalues.get('certificate_id'))
+                              or NOT_ON_CHAIN)
+            listed.append((ipfs_hash, certificate_id, anchored_proof_cid))
 
             col1, col2, col3, col4 = st.columns([2, 3, 4, 2])
-            col1.markdown(f"**{count}**")
+            col1.checkbox(f"**{count}**", key=f"select_{ipfs_hash}")
             col2.markdown(f"[🔗 {name}]({link})", unsafe_allow_html=True)
-            col3.markdown(f"`{certificate_id}`")
+            col3.markdown(f"`{certificate_id}`" + (" 🌳 anchored" if anchored_proof_cid else ""))
             if col4.button("Revoke", key=ipfs_hash):
-                if certificate_id != "Certificate is not in blockchain":
+                if certificate_id != NOT_ON_CHAIN:
                     try:
                         # Revoke on blockchain first
-                        contract.functions.revokeCertificate(certificate_id).transact({'from': w3.eth.accounts[0]})
+                        for cid in revoke_on_chain(certificate_id, anchored_proof_cid):
+                            delete_pinata_file(cid)
                         
                         # Then delete from IPFS
                         if delete_pinata_file(ipfs_hash):
                             st.success("✅ Certificate revoked successfully from blockchain and IPFS!")
-                            files.clear()
+                            invalidate_pinata_files(st.session_state.user_email)
                             st.rerun()
                         else:
                             st.warning("⚠️ Certificate revoked on blockchain but failed to delete from IPFS.")
-                            files.clear()
+                            invalidate_pinata_files(st.session_state.user_email)
                             st.rerun()
                     except Exception as e:
                         st.error(f"❌ Failed to revoke certificate on blockchain: {str(e)}")
@@ -106,12 +141,39 @@ elif selected == "List Of Certificate":
                     # Only delete from IPFS if not on blockchain
                     if delete_pinata_file(ipfs_hash):
                         st.success("✅ File deleted from IPFS!")
-                        files.clear()
+                        invalidate_pinata_files(st.session_state.user_email)
                         st.rerun()
                     else:
                         st.error("Failed to delete file from Pinata.")
             count += 1
 
+        selected_rows = [row for row in listed if st.session_state.get(f"select_{row[0]}")]
+        if selected_rows and st.button(f"Revoke selected ({len(selected_rows)})"):
+            # Revoke each on chain, then unpin everything together on the async Pinata client
+            to_unpin, failures = [], []
+            for ipfs_hash, certificate_id, anchored_proof_cid in selected_rows:
+                try:
+                    if certificate_id != NOT_ON_CHAIN:
+                        to_unpin.extend(revoke_on_chain(certificate_id, anchored_proof_cid))
+                    to_unpin.append(ipfs_hash)
+                except Exception as e:
+                    failures.append({"certificate_id": certificate_id, "reason": str(e)})
+            unpinned = delete_many_pinata_files(to_unpin) if to_unpin else {}
+            invalidate_pinata_files(st.session_state.user_email)
+
+            not_unpinned = [cid for cid, ok in unpinned.items() if not ok]
+            if failures:
+                st.error(f"❌ {len(failures)} certificates could not be revoked on blockchain.")
+                st.dataframe(failures)
+            if not_unpinned:
+                st.warning(f"⚠️ {len(not_unpinned)} files could not be deleted from IPFS.")
+            if not failures and not not_unpinned:
+                st.rerun()
+
+        if has_more and st.button("Load more"):
+            st.session_state.pinata_pages += 1
+            st.rerun()
+
 # --- Certificate Generation ---
 elif selected == "Generate Certificate":
     next_uid = get_next_uid()
@@ -122,6 +184,7 @@ elif selected == "Generate Certificate":
         candidate_name = st.text_input(label="Candidate Name")
         course_name = st.text_input(label="Course Name")
         org_name = st.text_input(label="Issuing Organization")
+        embed_qr = st.checkbox("Add a QR code with the certificate details")
 
         submit = st.form_submit_button("Generate")
 
@@ -130,17 +193,22 @@ elif selected == "Generate Certificate":
                 st.warning("Please fill all fields.")
             else:
                 with st.spinner("Generating certificate..."):
-                    pdf_file_path = f"{uid}_{candidate_name.strip().replace(" ", "_").lower()}.pdf"
+                    pdf_file_name = f"{uid}_{candidate_name.strip().replace(" ", "_").lower()}.pdf"
                     institute_logo_path = "../assets/logo.jpg"
 
-                    generate_certificate(pdf_file_path, uid, candidate_name, course_name, org_name, institute_logo_path)
+                    # Render into memory so concurrent sessions never share a file on disk
+                    pdf_buffer = io.BytesIO()
+                    generate_certificate(pdf_buffer, uid, candidate_name, course_name, org_name, institute_logo_path,
+                                         st.session_state.user_email, embed_qr)
+                    pdf_bytes = pdf_buffer.getvalue()
 
-                    ipfs_hash = upload_to_pinata(pdf_file_path, st.session_state.user_email)
-                    os.remove(pdf_file_path)
+                    ipfs_hash = upload_bytes_to_pinata(pdf_bytes, pdf_file_name, st.session_state.user_email)
+                    if ipfs_hash:
+                        # Seed the PDF cache so the first view needs no gateway download
+                        get_ipfs_cache().put(ipfs_hash, pdf_bytes)
 
                     if ipfs_hash:
-                        data = f"{uid}{candidate_name}{course_name}{org_name}".encode("utf-8")
-                        certificate_id = hashlib.sha256(data).hexdigest()
+                        certificate_id = compute_certificate_id(uid, candidate_name, course_name, org_name)
 
                         # Create certificate data for digital signature
                         certificate_data = {
@@ -160,7 +228,7 @@ elif selected == "Generate Certificate":
 
                         # Store on Blockchain
                         try:
-                            contract.functions.generateCertificate(
+                            get_contract().functions.generateCertificate(
                                 certificate_id, 
                                 uid, 
                                 candidate_name, 
@@ -169,7 +237,7 @@ elif selected == "Generate Certificate":
                                 ipfs_hash,
                                 st.session_state.user_email,
                                 digital_signature
-                            ).transact({'from': w3.eth.accounts[0]})
+                            ).transact({'from': get_w3().eth.accounts[0]})
                             uid_created(next_uid)
 
                             st.success(f"✅ Certificate created with digital signature!")
@@ -178,6 +246,65 @@ elif selected == "Generate Certificate":
                         except Exception as e:
                             st.error(f"⚠️ Blockchain transaction failed: {str(e)}")
 
+# --- Batch Certificate Generation ---
+elif selected == "Batch Generate Certificates":
+    st.markdown("#### Issue certificates from a CSV file")
+    st.write("The CSV needs `uid`, `candidate_name`, `course_name` and `org_name` columns. "
+             "Re-uploading the same file resumes an interrupted run without re-issuing certificates.")
+
+    with st.form("Batch-Generate-Certificate"):
+        uploaded_csv = st.file_uploader("Candidates CSV", type=["csv"])
+        anchor = st.checkbox("Anchor as one Merkle root (one transaction, proofs issued per certificate)")
+        submit = st.form_submit_button("Generate")
+
+    if submit:
+        if not uploaded_csv:
+            st.warning("Please upload a CSV file.")
+        else:
+            try:
+                rows = read_candidates(io.StringIO(uploaded_csv.getvalue().decode("utf-8")))
+            except ValueError as e:
+                st.error(f"❌ {e}")
+                rows = []
+
+            if rows:
+                checkpoint_name = hashlib.sha256(uploaded_csv.getvalue()).hexdigest()[:16]
+                checkpoint_path = os.path.join(CHECKPOINT_DIR, f"{st.session_state.user_email}_{checkpoint_name}.jsonl")
+                progress = st.progress(0.0, text=f"0/{len(rows)} certificates processed")
+
+                def on_progress(done, total):
+                    progress.progress(done / total, text=f"{done}/{total} certificates processed")
+
+                proof_dir = os.path.join(PROOF_DIR, st.session_state.user_email, checkpoint_name)
+                summary = issue_batch(rows, st.session_state.user_email, checkpoint_path, on_progress=on_progress,
+                                      anchor=anchor, proof_dir=proof_dir)
+
+                st.success(f"✅ Issued {summary['issued']} certificates "
+                           f"({summary['skipped']} already issued, {len(summary['failed'])} failed).")
+                st.info(f"⏱️ {summary['elapsed_seconds']:.1f}s, "
+                        f"{summary['certificates_per_minute']:.1f} certificates/minute")
+                if summary["failed"]:
+                    st.dataframe(summary["failed"])
+                if summary.get("unpublished_proofs"):
+                    st.warning(f"⚠️ {len(summary['unpublished_proofs'])} anchored certificates have no pinned proof "
+                               "and cannot be revoked yet. Upload the same CSV again to retry.")
+                    st.dataframe(summary["unpublished_proofs"])
+
+                if anchor and os.path.isdir(proof_dir):
+                    if "merkle_root" in summary:
+                        st.info(f"🌳 Merkle root: `{summary['merkle_root']}`")
+                    proofs_zip = io.BytesIO()
+                    with zipfile.ZipFile(proofs_zip, "w", zipfile.ZIP_DEFLATED) as archive:
+                        for file_name in os.listdir(proof_dir):
+                            archive.write(os.path.join(proof_dir, file_name), file_name)
+                    st.download_button(
+                        label="📥 Download Merkle Proofs",
+                        data=proofs_zip.getvalue(),
+                        file_name=f"merkle_proofs_{checkpoint_name}.zip",
+                        mime="application/zip"
+                    )
+                    st.info("💡 Send each candidate their proof file; verifiers check it against the anchored root.")
+
 # --- Certificate Viewing ---
 elif selected == "View Certificates":
     with st.form("View-Certificate"):
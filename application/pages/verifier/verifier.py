@@ -1,14 +1,13 @@
-import hashlib
-import os
 import json
 
 import streamlit as st
-from connection import contract
-from utils.cert_utils import extract_certificate
+from utils.cert_utils import get_institute_info
+from utils.merkle_utils import load_proof_document
 from utils.streamlit_utils import view_certificate, displayPDF
 from utils.auth import AuthManager
 from utils.streamlit_utils import hide_sidebar
 from utils.crypto_utils import DigitalCertificateAuth
+from utils.verification import verify_anchored_certificate, verify_certificate, verify_pdf
 
 hide_sidebar()
 auth = AuthManager()
@@ -20,94 +19,86 @@ st.markdown("<h2 style='text-align: center;'>✅ Certificate Verification</h2>",
 st.markdown("##")
 
 # --- Options ---
-options = ("Verify using PDF", "Verify using Certificate ID", "Institute Verification", "Import Institute Credentials")
+options = ("Verify using PDF", "Verify using Certificate ID", "Institute Verification", "Import Institute Credentials",
+           "Verify using Merkle Proof")
 selected = st.selectbox("Select an option", options, label_visibility="collapsed")
 
+def show_verification(result):
+    """Shows the outcome of a check from utils.verification for a certificate found on chain"""
+    if result["revoked"]:
+        st.error("❌ Certificate has been REVOKED and is no longer valid.")
+        return
+    if result["status"] == "invalid_proof":
+        st.error("❌ Merkle proof does not lead to a root anchored by this institute - Certificate may be tampered!")
+        return
+
+    if result["merkle_root"]:
+        st.success("🎉 Certificate is included in a batch anchored on blockchain.")
+    else:
+        st.success("🎉 Certificate is VALID and registered on blockchain.")
+    if not result["signature_valid"]:
+        st.error("❌ Digital signature is INVALID - Certificate may be tampered!")
+        return
+
+    st.success("🔐 Digital signature is VALID - Certificate is authentic!")
+    if result["file_match"]:
+        st.success("📄 PDF is identical to the issued file")
+
+    # Show institute info
+    institute = result["institute"]
+    if institute:
+        st.info(f"🏛️ **Issuing Institute**: {institute['name']} ({institute['email']})")
+        if institute["verified"]:
+            st.success("✅ Institute is verified by the system")
+        else:
+            st.warning("⚠️ Institute is not verified by the system")
+    else:
+        st.warning("⚠️ Could not retrieve institute information")
+
+
+def show_certificate_fields(certificate):
+    st.write(f"- **UID**: {certificate['uid']}")
+    st.write(f"- **Candidate Name**: {certificate['candidate_name']}")
+    st.write(f"- **Course**: {certificate['course_name']}")
+    st.write(f"- **Organization**: {certificate['org_name']}")
+
+
 # --- Option 1: Upload Certificate PDF ---
 if selected == options[0]:
     uploaded_file = st.file_uploader("Upload your Certificate PDF")
 
     if uploaded_file:
-        with open("temp_certificate.pdf", "wb") as file:
-            file.write(uploaded_file.getvalue())
+        # Work on the uploaded bytes directly; nothing is written to disk
+        pdf_bytes = uploaded_file.getvalue()
 
         try:
-            # Extract and show certificate contents
-            uid, candidate_name, course_name, org_name = extract_certificate("temp_certificate.pdf")
-            st.success("✅ Certificate data extracted successfully:")
-            st.write(f"- **UID**: {uid}")
-            st.write(f"- **Candidate Name**: {candidate_name}")
-            st.write(f"- **Course**: {course_name}")
-            st.write(f"- **Organization**: {org_name}")
-
-            # Generate hash
-            data_to_hash = f"{uid}{candidate_name}{course_name}{org_name}".encode('utf-8')
-            certificate_id = hashlib.sha256(data_to_hash).hexdigest()
-
-            # Check if certificate exists on blockchain
-            try:
-                # Get certificate data to check if it exists
-                cert_data = contract.functions.getCertificate(certificate_id).call()
-                
-                # Check if revoked
-                is_revoked = contract.functions.isRevoked(certificate_id).call()
-                
-                if is_revoked:
-                    st.error("❌ Certificate has been REVOKED and is no longer valid.")
-                else:
-                    # Verify on blockchain
-                    result = contract.functions.isVerified(certificate_id).call()
-                    
-                    if result:
-                        st.success("🎉 Certificate is VALID and registered on blockchain.")
-                        
-                        # Verify digital signature
-                        institute_email = cert_data[5]  # institute_email
-                        digital_signature = cert_data[6]  # digital_signature
-                        
-                        # Create certificate data for verification
-                        certificate_data = {
-                            "uid": uid,
-                            "candidate_name": candidate_name,
-                            "course_name": course_name,
-                            "org_name": org_name,
-                            "ipfs_hash": cert_data[4],  # ipfs_hash
-                            "certificate_id": certificate_id
-                        }
-                        
-                        # Verify signature
-                        signature_valid = crypto_auth.verify_certificate_signature(
-                            institute_email, 
-                            certificate_data, 
-                            digital_signature
-                        )
-                        
-                        if signature_valid:
-                            st.success("🔐 Digital signature is VALID - Certificate is authentic!")
-                            
-                            # Get institute info
-                            try:
-                                institute_info = contract.functions.getInstitute(institute_email).call()
-                                st.info(f"🏛️ **Issuing Institute**: {institute_info[0]} ({institute_email})")
-                                if institute_info[2]:  # is_verified
-                                    st.success("✅ Institute is verified by the system")
-                                else:
-                                    st.warning("⚠️ Institute is not verified by the system")
-                            except:
-                                st.warning("⚠️ Could not retrieve institute information")
-                        else:
-                            st.error("❌ Digital signature is INVALID - Certificate may be tampered!")
-                    else:
-                        st.error("❌ Certificate is INVALID or not registered.")
-                        
-            except Exception as e:
-                st.error("❌ Certificate not found on blockchain.")
-
-            displayPDF("temp_certificate.pdf")
-            os.remove("temp_certificate.pdf")
-
+            # Looked up by content hash first, then by the fields embedded in or printed on the PDF
+            result = verify_pdf(pdf_bytes)
         except Exception as e:
+            print(e)
+            result = None
+
+        if result is None or result["status"] == "unreadable":
             st.error("❌ Could not process this certificate. It might be tampered or corrupted.")
+        elif result["status"] == "modified" and result["certificate"] is None:
+            st.error("❌ The certificate data embedded in this PDF has been modified - it is NOT valid.")
+        elif result["status"] == "modified":
+            st.error("❌ This PDF is not the file that was issued - it has been modified and is NOT valid.")
+            st.info("Certificate on record for these details:")
+            show_certificate_fields(result["certificate"])
+        else:
+            if result["file_match"]:
+                st.success("✅ PDF matches an issued certificate file:")
+            else:
+                st.success("✅ Certificate data read successfully:")
+            show_certificate_fields(result["certificate"])
+
+            if result["status"] == "not_found":
+                st.error("❌ Certificate not found on blockchain.")
+            else:
+                show_verification(result)
+
+            displayPDF(pdf_bytes)
 
 # --- Option 2: Enter Certificate ID ---
 elif selected == options[1]:
@@ -121,68 +112,25 @@ elif selected == options[1]:
             st.warning("Please enter a certificate ID.")
         else:
             try:
-                # Check if certificate exists and get data
-                cert_data = contract.functions.getCertificate(certificate_id).call()
-                
-                # Check revocation status
-                is_revoked = contract.functions.isRevoked(certificate_id).call()
-                
-                if is_revoked:
-                    st.error("❌ Certificate has been REVOKED and is no longer valid.")
+                result = verify_certificate(certificate_id)
+
+                if result["status"] == "not_found":
+                    st.error("❌ Error validating certificate. Please check the Certificate ID.")
+                elif result["status"] == "invalid_proof":
+                    show_verification(result)
+                elif result["revoked"]:
+                    show_verification(result)
                     st.info("Certificate details (for reference):")
-                    st.write(f"- **UID**: {cert_data[0]}")
-                    st.write(f"- **Candidate Name**: {cert_data[1]}")
-                    st.write(f"- **Course**: {cert_data[2]}")
-                    st.write(f"- **Organization**: {cert_data[3]}")
-                    st.write(f"- **Institute**: {cert_data[5]}")
+                    show_certificate_fields(result["certificate"])
+                    st.write(f"- **Institute**: {result['certificate']['institute_email']}")
                 else:
                     # Show certificate
-                    view_certificate(certificate_id)
-
-                    # Smart Contract Call
-                    result = contract.functions.isVerified(certificate_id).call()
-                    if result:
-                        st.success("🎉 Certificate is VALID and registered on blockchain.")
-                        
-                        # Verify digital signature
-                        institute_email = cert_data[5]  # institute_email
-                        digital_signature = cert_data[6]  # digital_signature
-                        
-                        # Create certificate data for verification
-                        certificate_data = {
-                            "uid": cert_data[0],
-                            "candidate_name": cert_data[1],
-                            "course_name": cert_data[2],
-                            "org_name": cert_data[3],
-                            "ipfs_hash": cert_data[4],
-                            "certificate_id": certificate_id
-                        }
-                        
-                        # Verify signature
-                        signature_valid = crypto_auth.verify_certificate_signature(
-                            institute_email, 
-                            certificate_data, 
-                            digital_signature
-                        )
-                        
-                        if signature_valid:
-                            st.success("🔐 Digital signature is VALID - Certificate is authentic!")
-                            
-                            # Get institute info
-                            try:
-                                institute_info = contract.functions.getInstitute(institute_email).call()
-                                st.info(f"🏛️ **Issuing Institute**: {institute_info[0]} ({institute_email})")
-                                if institute_info[2]:  # is_verified
-                                    st.success("✅ Institute is verified by the system")
-                                else:
-                                    st.warning("⚠️ Institute is not verified by the system")
-                            except:
-                                st.warning("⚠️ Could not retrieve institute information")
-                        else:
-                            st.error("❌ Digital signature is INVALID - Certificate may be tampered!")
+                    if result["merkle_root"]:
+                        displayPDF(cid=result["certificate"]["ipfs_hash"])
                     else:
-                        st.error("❌ Certificate ID is INVALID or not found.")
-                        
+                        view_certificate(certificate_id)
+                    show_verification(result)
+
             except Exception as e:
                 print(e)
                 st.error("❌ Error validating certificate. Please check the Certificate ID.")
@@ -201,7 +149,7 @@ elif selected == options[2]:
             st.warning("Please enter an institute email.")
         else:
             try:
-                institute_info = contract.functions.getInstitute(institute_email).call()
+                institute_info = get_institute_info(institute_email)
                 
                 st.success("✅ Institute found in the system!")
                 st.write(f"**Institute Name**: {institute_info[0]}")
@@ -239,12 +187,7 @@ elif selected == options[3]:
                 st.write(f"**Institute**: {institute_email}")
                 
                 # Save public key for verification
-                institute_dir = os.path.join("keys", institute_email)
-                os.makedirs(institute_dir, exist_ok=True)
-                public_key_path = os.path.join(institute_dir, "public_key.pem")
-                
-                with open(public_key_path, 'w') as f:
-                    f.write(public_key)
+                crypto_auth.import_institute_public_key(institute_email, public_key)
                 
                 st.success("✅ Public key saved for verification!")
                 st.info("You can now verify certificates issued by this institute.")
@@ -253,3 +196,19 @@ elif selected == options[3]:
                 
         except Exception as e:
             st.error(f"❌ Error importing credentials: {str(e)}")
+
+# --- Option 5: Merkle Proof for batch-anchored certificates ---
+elif selected == options[4]:
+    st.markdown("### 🌳 Verify a Batch-Anchored Certificate")
+    st.write("Certificates issued in an anchored batch come with a Merkle proof file.")
+
+    uploaded_proof = st.file_uploader("Upload the certificate's Merkle proof JSON file", type=['json'])
+
+    if uploaded_proof:
+        try:
+            document = load_proof_document(uploaded_proof.getvalue())
+            show_certificate_fields(document["certificate"])
+            show_verification(verify_anchored_certificate(document["certificate"]["certificate_id"], document))
+        except Exception as e:
+            print(e)
+            st.error("❌ Could not process this proof file.")
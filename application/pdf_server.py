@@ -0,0 +1,273 @@
+"""Small HTTP server that streams certificate PDFs to the browser.
+
+displayPDF points its iframe here instead of inlining a base64 data URI, so
+the PDF is not pushed through the Streamlit websocket and the browser can
+fetch it progressively with Range requests.
+
+- /ipfs/<cid>   PDFs from the IPFS cache, streamed from the cached file on
+                disk; immutable, so they are cached by the browser for a year.
+                Only CIDs the app has just displayed (cid_url()) are served,
+                for PDF_TOKEN_TTL seconds; others get a 404 and are never
+                fetched from the gateway.
+- /pdf/<token>  other PDFs (e.g. a verifier's upload), spooled to PDF_SPOOL_DIR
+                by register_pdf() under an unguessable token and deleted after
+                PDF_TOKEN_TTL seconds, so they do not stay in server memory.
+
+The server listens on PDF_SERVER_HOST:PDF_SERVER_PORT, which a browser on
+another machine usually cannot reach. public_url_for() therefore only returns
+a URL when PDF_SERVER_PUBLIC_URL is set (e.g. a path the app's reverse proxy
+routes here) or the browser runs on the server host, and never an http URL for
+a page served over https. Otherwise displayPDF embeds the PDF as before.
+"""
+import hashlib
+import os
+import re
+import secrets
+import shutil
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from utils.ipfs_cache import get_ipfs_cache
+
+PDF_SERVER_HOST = os.getenv("PDF_SERVER_HOST", "127.0.0.1")
+PDF_SERVER_PORT = int(os.getenv("PDF_SERVER_PORT", 8502))
+# Base URL browsers use to reach the server, e.g. "https://certs.example.com/pdfs" or "/pdfs" behind a proxy
+PDF_SERVER_PUBLIC_URL = os.getenv("PDF_SERVER_PUBLIC_URL", "").rstrip("/")
+PDF_TOKEN_TTL = float(os.getenv("PDF_TOKEN_TTL", 600))
+PDF_SPOOL_DIR = os.getenv("PDF_SPOOL_DIR", "pdf_spool")
+STREAM_CHUNK_SIZE = 64 * 1024
+
+RANGE_PATTERN = re.compile(r"bytes=(\d*)-(\d*)$")
+LOCAL_HOSTS = ("localhost", "127.0.0.1", "::1")
+
+# token -> (expires_at, etag) of PDFs spooled to PDF_SPOOL_DIR
+_registered = {}
+# cid -> expires_at of CIDs the app has displayed
+_allowed_cids = {}
+_registered_lock = threading.Lock()
+
+
+def _parse_range(header, size):
+    """(start, end) inclusive for a single-range header, None for the full body, or 'invalid' if unsatisfiable"""
+    if not header:
+        return None
+    match = RANGE_PATTERN.match(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        # Multi-range or malformed: ignoring the header and sending everything is allowed
+        return None
+    if match.group(1) == "":
+        # Suffix range: the last N bytes
+        length = int(match.group(2))
+        if length == 0:
+            return "invalid"
+        return max(size - length, 0), size - 1
+    start = int(match.group(1))
+    end = int(match.group(2)) if match.group(2) else size - 1
+    if start >= size or end < start:
+        return "invalid"
+    return start, min(end, size - 1)
+
+
+class PdfRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self.do_GET(head_only=True)
+
+    def do_GET(self, head_only=False):
+        parts = self.path.split("?", 1)[0].strip("/").split("/")
+        if len(parts) != 2:
+            return self._send_error(404)
+
+        kind, key = parts
+        if kind == "ipfs":
+            self._serve_cid(key, head_only)
+        elif kind == "pdf":
+            self._serve_registered(key, head_only)
+        else:
+            self._send_error(404)
+
+    def _send_error(self, status):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _serve_cid(self, cid, head_only):
+        with _registered_lock:
+            expires_at = _allowed_cids.get(cid)
+        if expires_at is None or expires_at < time.time():
+            return self._send_error(404)
+
+        ipfs_cache = get_ipfs_cache()
+        try:
+            # Counted when the page fetched the PDF before linking to it
+            path = ipfs_cache.local_path(cid, record_stats=False)
+        except Exception:
+            return self._send_error(502)
+
+        cache_control = "public, max-age=31536000, immutable"
+        if path is not None:
+            try:
+                with open(path, "rb") as f:
+                    size = os.fstat(f.fileno()).st_size
+                    self._send_body(f, size, f'"{cid}"', cache_control, head_only)
+                return
+            except FileNotFoundError:
+                pass  # evicted meanwhile; fall back to the in-memory copy
+
+        content = ipfs_cache.get(cid, record_stats=False)
+        self._send_body(_BytesReader(content), len(content), f'"{cid}"', cache_control, head_only)
+
+    def _serve_registered(self, token, head_only):
+        with _registered_lock:
+            entry = _registered.get(token)
+        if entry is None or entry[0] < time.time():
+            return self._send_error(404)
+        try:
+            with open(_spool_path(token), "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                self._send_body(f, size, entry[1], "private, max-age=600", head_only)
+        except FileNotFoundError:
+            self._send_error(404)
+
+    def _send_body(self, reader, size, etag, cache_control, head_only):
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", cache_control)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        byte_range = _parse_range(self.headers.get("Range"), size)
+        if byte_range == "invalid":
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        start, end = byte_range if byte_range else (0, size - 1)
+        length = max(end - start + 1, 0)
+        self.send_response(206 if byte_range else 200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(length))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", cache_control)
+        if byte_range:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+        if head_only:
+            return
+
+        reader.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = reader.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            self.wfile.write(chunk)
+            remaining -= len(chunk)
+
+
+class _BytesReader:
+    """seek/read over bytes without copying them"""
+
+    def __init__(self, content):
+        self._view = memoryview(content)
+        self._position = 0
+
+    def seek(self, position):
+        self._position = position
+
+    def read(self, size):
+        chunk = self._view[self._position:self._position + size]
+        self._position += len(chunk)
+        return chunk
+
+
+def _spool_path(token):
+    return os.path.join(PDF_SPOOL_DIR, f"{token}.pdf")
+
+
+def _sweep(now):
+    """Forgets expired tokens and CIDs and deletes their spooled files; call with _registered_lock held"""
+    for token in [key for key, entry in _registered.items() if entry[0] < now]:
+        del _registered[token]
+        try:
+            os.remove(_spool_path(token))
+        except FileNotFoundError:
+            pass
+    for cid in [key for key, expires_at in _allowed_cids.items() if expires_at < now]:
+        del _allowed_cids[cid]
+
+
+def public_url_for(app_url):
+    """Base URL of the PDF server for a browser showing app_url, or None if that browser cannot use it"""
+    if not app_url:
+        return None
+    app = urlsplit(app_url)
+    if PDF_SERVER_PUBLIC_URL:
+        base_url = PDF_SERVER_PUBLIC_URL
+    elif app.hostname in LOCAL_HOSTS:
+        base_url = f"http://127.0.0.1:{PDF_SERVER_PORT}"
+    else:
+        return None
+    # An https page may not embed an http iframe (mixed content)
+    if app.scheme == "https" and urlsplit(base_url).scheme == "http":
+        return None
+    return base_url
+
+
+def register_pdf(content, base_url):
+    """Spools PDF bytes for the browser; returns their URL under base_url"""
+    token = secrets.token_urlsafe(24)
+    etag = f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+    temp_path = _spool_path(token) + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(content)
+    os.replace(temp_path, _spool_path(token))
+
+    now = time.time()
+    with _registered_lock:
+        _sweep(now)
+        _registered[token] = (now + PDF_TOKEN_TTL, etag)
+    return f"{base_url}/pdf/{token}"
+
+
+def cid_url(cid, base_url):
+    """URL of a cached IPFS PDF under base_url; the server serves the CID for PDF_TOKEN_TTL seconds"""
+    now = time.time()
+    with _registered_lock:
+        _sweep(now)
+        _allowed_cids[cid] = now + PDF_TOKEN_TTL
+    return f"{base_url}/ipfs/{cid}"
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_pdf_server():
+    """Starts the server once per process; returns False if the port is unavailable"""
+    global _server
+    with _server_lock:
+        if _server is None:
+            # Spooled files from a previous run have no tokens any more
+            shutil.rmtree(PDF_SPOOL_DIR, ignore_errors=True)
+            os.makedirs(PDF_SPOOL_DIR, exist_ok=True)
+            try:
+                _server = ThreadingHTTPServer((PDF_SERVER_HOST, PDF_SERVER_PORT), PdfRequestHandler)
+            except OSError as e:
+                print(f"PDF server could not start on port {PDF_SERVER_PORT}: {e}")
+                _server = False
+                return False
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="pdf-server", daemon=True).start()
+        return bool(_server)
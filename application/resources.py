@@ -0,0 +1,39 @@
+"""Process-wide cache for expensive shared clients.
+
+Streamlit re-runs page scripts on every interaction, so clients such as the
+Web3 contract or the Firebase apps are created on first use and then shared
+by every session and rerun in the process:
+
+    @lazy_resource
+    def get_contract():
+        return get_w3().eth.contract(...)
+"""
+import functools
+import threading
+
+_UNSET = object()
+
+
+def lazy_resource(factory):
+    """Calls factory once per process, on first use, and returns that object on later calls.
+
+    The wrapped accessor gets a reset() method that drops the cached object."""
+    lock = threading.Lock()
+    value = _UNSET
+
+    @functools.wraps(factory)
+    def get():
+        nonlocal value
+        if value is _UNSET:
+            with lock:
+                if value is _UNSET:
+                    value = factory()
+        return value
+
+    def reset():
+        nonlocal value
+        with lock:
+            value = _UNSET
+
+    get.reset = reset
+    return get
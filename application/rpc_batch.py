@@ -0,0 +1,154 @@
+"""Sends independent contract reads as JSON-RPC batch requests.
+
+A page collects the reads it needs up front and sends them together:
+
+    with batch() as rpc:
+        certificate = rpc.add(get_contract().functions.getCertificate(certificate_id))
+        revoked = rpc.add(get_contract().functions.isRevoked(certificate_id))
+    certificate.result(), revoked.result()
+
+or, when every read must succeed, call_many(functions).
+
+Every JSON-RPC HTTP request saved is counted in `metrics`. The counters are
+process-wide (all sessions together), so they are for benchmarks and logs,
+not for display to users.
+"""
+import os
+import threading
+from contextlib import contextmanager
+
+from connection import get_w3
+
+RPC_BATCH_MAX_SIZE = int(os.getenv("RPC_BATCH_MAX_SIZE", 100))
+
+
+class RpcMetrics:
+    """Counts contract reads against the HTTP requests actually sent for them"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def record(self, calls, requests):
+        with self._lock:
+            self.calls += calls
+            self.requests += requests
+            if requests == 1 and calls > 1:
+                self.batches += 1
+
+    @property
+    def requests_saved(self):
+        return self.calls - self.requests
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "requests": self.requests,
+                "batches": self.batches,
+                "requests_saved": self.calls - self.requests,
+            }
+
+    def reset(self):
+        with self._lock:
+            self.calls = 0
+            self.requests = 0
+            self.batches = 0
+
+
+metrics = RpcMetrics()
+
+
+class PendingCall:
+    """Result slot for a read queued in a batch; available once the batch has run"""
+
+    def __init__(self, function):
+        self.function = function
+        self._done = threading.Event()
+        self._result = None
+        self._error = None
+
+    def _resolve(self, result=None, error=None):
+        self._result = result
+        self._error = error
+        self._done.set()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        if not self._done.wait(timeout):
+            raise RuntimeError("Batched call has not been executed yet")
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+def _call_individually(pending_calls):
+    for pending in pending_calls:
+        try:
+            pending._resolve(result=pending.function.call())
+        except Exception as e:
+            pending._resolve(error=e)
+    metrics.record(len(pending_calls), len(pending_calls))
+
+
+def _execute(pending_calls):
+    """Sends the queued reads in chunks of RPC_BATCH_MAX_SIZE, one HTTP request per chunk.
+
+    If a batch fails as a whole (for instance because one of the calls
+    reverted) its calls are retried one by one so each gets its own result or
+    exception."""
+    for start in range(0, len(pending_calls), RPC_BATCH_MAX_SIZE):
+        chunk = pending_calls[start:start + RPC_BATCH_MAX_SIZE]
+        if len(chunk) == 1:
+            _call_individually(chunk)
+            continue
+
+        try:
+            with get_w3().batch_requests() as rpc_batch:
+                for pending in chunk:
+                    rpc_batch.add(pending.function)
+                results = rpc_batch.execute()
+        except Exception:
+            _call_individually(chunk)
+            continue
+
+        for pending, result in zip(chunk, results):
+            pending._resolve(result=result)
+        metrics.record(len(chunk), 1)
+
+
+class RpcBatch:
+    """Collects contract reads and sends them together on execute()"""
+
+    def __init__(self):
+        self._pending = []
+
+    def add(self, function):
+        """Queues a contract function (e.g. get_contract().functions.isRevoked(id)) and returns its PendingCall"""
+        pending = PendingCall(function)
+        self._pending.append(pending)
+        return pending
+
+    def execute(self):
+        pending_calls, self._pending = self._pending, []
+        if pending_calls:
+            _execute(pending_calls)
+        return pending_calls
+
+
+@contextmanager
+def batch():
+    """Runs every read added inside the block as one batched request on exit"""
+    rpc_batch = RpcBatch()
+    yield rpc_batch
+    rpc_batch.execute()
+
+
+def call_many(functions):
+    """Calls several contract functions in one batch; results in order, first error re-raised"""
+    with batch() as rpc_batch:
+        pending_calls = [rpc_batch.add(function) for function in functions]
+    return [pending.result() for pending in pending_calls]
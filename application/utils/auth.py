@@ -1,9 +1,9 @@
-import json
-import os
 import time
 
 import streamlit as st
-from db.firebase_app import register, login, get_user_role
+import streamlit.components.v1 as components
+from db.firebase_app import register, sign_in, refresh_tokens, get_user_role
+from db.session_store import SESSION_TTL_SECONDS, get_session_store
 
 
 class AuthManager:
@@ -17,49 +17,58 @@ class AuthManager:
         "institute": "pages/institute/institute.py",
     }
 
-    AUTH_FILE = ".streamlit_auth.json"
+    # Browser cookie holding the session token; the session itself lives in the session store
+    SESSION_COOKIE = "cert_session"
+    # Refresh the ID token this many seconds before it expires
+    TOKEN_REFRESH_MARGIN = 300
 
     @staticmethod
-    def _save_auth_state(email, role):
-        """Save auth state to file"""
-        try:
-            auth_data = {
-                "email": email,
-                "role": role,
-                "timestamp": time.time(),
-                "expires": time.time() + (24 * 3600)  # 24 hours
-            }
-            with open(AuthManager.AUTH_FILE, 'w') as f:
-                json.dump(auth_data, f)
-        except:
-            pass  # Fail silently if can't write file
+    def _save_auth_state(email, role, refresh_token=None):
+        """Start a server-side session; its token is handed to the browser as a cookie"""
+        token = get_session_store().create(email, role, refresh_token)
+        st.session_state.session_token = token
+        st.session_state.session_cookie_pending = token
 
     @staticmethod
     def _load_auth_state():
-        """Load auth state from file"""
-        try:
-            if os.path.exists(AuthManager.AUTH_FILE):
-                with open(AuthManager.AUTH_FILE, 'r') as f:
-                    auth_data = json.load(f)
-
-                # Check if not expired
-                if time.time() < auth_data.get('expires', 0):
-                    return auth_data
-                else:
-                    # Remove expired file
-                    os.remove(AuthManager.AUTH_FILE)
-        except:
-            pass
-        return None
+        """Session for this browser's cookie, from memory or the session store"""
+        token = st.context.cookies.get(AuthManager.SESSION_COOKIE)
+        if not isinstance(token, str) or not token:
+            return None
+        auth_data = get_session_store().get(token)
+        if auth_data:
+            auth_data["session_token"] = token
+        return auth_data
 
     @staticmethod
     def _clear_auth_state():
-        """Clear saved auth state"""
-        try:
-            if os.path.exists(AuthManager.AUTH_FILE):
-                os.remove(AuthManager.AUTH_FILE)
-        except:
-            pass
+        """End the server-side session and drop the browser cookie"""
+        token = st.session_state.get("session_token") or st.context.cookies.get(AuthManager.SESSION_COOKIE)
+        if token:
+            get_session_store().delete(token)
+            st.session_state.session_cookie_pending = ""
+
+    @staticmethod
+    def sync_session_cookie():
+        """Writes a pending session cookie change to the browser; call once per run from the main script.
+
+        Streamlit has no way to set response headers, so the cookie is written
+        from JavaScript and therefore cannot be HttpOnly: a script injected into
+        the app could read the session token. SameSite=Strict, Secure on HTTPS
+        and the session TTL limit what a leaked token is good for, and logout
+        deletes the session server-side.
+        """
+        token = st.session_state.pop("session_cookie_pending", None)
+        if token is None:
+            return
+        max_age = int(SESSION_TTL_SECONDS) if token else 0
+        components.html(
+            f"""<script>
+            parent.document.cookie = "{AuthManager.SESSION_COOKIE}={token}; path=/; max-age={max_age}; SameSite=Strict"
+                + (parent.location.protocol === "https:" ? "; Secure" : "");
+            </script>""",
+            height=0,
+        )
 
     @staticmethod
     def register_user(email, password, role):
@@ -68,32 +77,61 @@ class AuthManager:
 
     @staticmethod
     def login(email, password):
-        """Login user with file persistence"""
-        user_id = login(email, password)
-        role = get_user_role(user_id)
-        if user_id:
+        """Login user and start a persistent session"""
+        tokens = sign_in(email, password)
+        if tokens:
+            role = get_user_role(tokens["id_token"])
             st.session_state.authenticated = True
             st.session_state.user_role = role
             st.session_state.user_email = email
+            st.session_state.auth_tokens = tokens
 
-            AuthManager._save_auth_state(email, role)
+            AuthManager._save_auth_state(email, role, tokens["refresh_token"])
 
             return role
         return False
 
+    @staticmethod
+    def _current_id_token():
+        """The session's ID token, renewed with the refresh token shortly before it expires"""
+        tokens = st.session_state.get("auth_tokens")
+        if not tokens:
+            return None
+        if time.time() >= tokens["expires_at"] - AuthManager.TOKEN_REFRESH_MARGIN:
+            refreshed = refresh_tokens(tokens["refresh_token"])
+            if not refreshed:
+                return None
+            if refreshed["refresh_token"] != tokens["refresh_token"] and "session_token" in st.session_state:
+                get_session_store().update(st.session_state.session_token, refresh_token=refreshed["refresh_token"])
+            tokens = st.session_state.auth_tokens = refreshed
+        return tokens["id_token"]
+
+    @staticmethod
+    def _check_role():
+        """Re-checks the session's role from its ID token; a cached verification is an in-memory lookup"""
+        if "auth_tokens" not in st.session_state:
+            return True
+        id_token = AuthManager._current_id_token()
+        role = get_user_role(id_token) if id_token else None
+        if role is None:
+            AuthManager.logout()
+            return False
+        st.session_state.user_role = role
+        return True
+
     @staticmethod
     def logout():
         """Logout user"""
-        for key in ['authenticated', "user_role", "user_email"]:
-            if key in st.session_state:
-                del st.session_state[key]
-
         # Clear saved auth state
         AuthManager._clear_auth_state()
 
+        for key in ['authenticated', "user_role", "user_email", "auth_tokens", "session_token"]:
+            if key in st.session_state:
+                del st.session_state[key]
+
     @staticmethod
     def is_authenticated():
-        """Check if user is authenticated, restore from file if needed"""
+        """Check if user is authenticated, restore this browser's session if needed"""
         if not st.session_state.get('authenticated', False):
             # Try to restore from saved state
             auth_data = AuthManager._load_auth_state()
@@ -101,9 +139,19 @@ class AuthManager:
                 st.session_state.authenticated = True
                 st.session_state.user_role = auth_data['role']
                 st.session_state.user_email = auth_data['email']
-                return True
-
-        return st.session_state.get('authenticated', False)
+                st.session_state.session_token = auth_data['session_token']
+                if auth_data.get('refresh_token'):
+                    # Reuse the saved refresh token instead of a new password sign-in
+                    st.session_state.auth_tokens = {
+                        "id_token": None,
+                        "refresh_token": auth_data['refresh_token'],
+                        "expires_at": 0,
+                    }
+                return AuthManager._check_role()
+
+        if st.session_state.get('authenticated', False):
+            return AuthManager._check_role()
+        return False
 
     def redirect_authenticated_user(self):
         if self.is_authenticated():
@@ -0,0 +1,384 @@
+"""Batch certificate issuance from a CSV of candidates.
+
+Rendering runs in a process pool, Pinata uploads on the asyncio Pinata client
+(bounded concurrency, rate limited, streamed from disk) and signing plus
+contract transactions in a thread pool. The stages are
+pipelined, so a certificate is uploaded as soon as its PDF is rendered, and
+signed certificates are issued in chunks through generateCertificatesBatch.
+Progress is checkpointed to a JSON lines file, and a re-run with the same
+checkpoint skips certificates that are already issued.
+
+With --anchor, certificates are not stored individually. The batch's
+certificate IDs go into a Merkle tree, only the root is anchored on chain,
+and an inclusion proof document is written for every certificate. Each proof
+is also pinned to IPFS and linked from its PDF's pin metadata (certificate_id,
+merkle_root, merkle_proof_cid), which is where revocation finds it.
+
+Usage (from the application directory):
+    python -m utils.batch_issue candidates.csv --institute-email institute@example.com [--anchor]
+"""
+import argparse
+import csv
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from batch_transactions import issue_certificates_batch
+from connection import get_contract, get_w3
+from web3.exceptions import ContractLogicError
+from utils.cert_utils import compute_certificate_id, generate_certificate, get_certificates_status
+from utils.crypto_utils import DigitalCertificateAuth
+from utils.merkle_utils import build_proof_documents
+from utils.pinata_async import PINATA_MAX_CONCURRENCY, PinataRunner
+
+CSV_COLUMNS = ("uid", "candidate_name", "course_name", "org_name")
+DEFAULT_LOGO_PATH = "../assets/logo.jpg"
+CHECKPOINT_DIR = "batch_checkpoints"
+PROOF_DIR = "batch_proofs"
+# Signed certificates collected before a generateCertificatesBatch submission
+DEFAULT_CHUNK_SIZE = 200
+
+
+def read_candidates(csv_file):
+    """Reads candidate rows from an open CSV file with uid, candidate_name, course_name and org_name columns"""
+    reader = csv.DictReader(csv_file)
+    missing = [column for column in CSV_COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+        raise ValueError(f"CSV is missing columns: {', '.join(missing)}")
+
+    rows = [{column: (row[column] or "").strip() for column in CSV_COLUMNS} for row in reader]
+    uids = [row["uid"] for row in rows]
+    if len(set(uids)) != len(uids):
+        raise ValueError("CSV contains duplicate UIDs")
+    return rows
+
+
+class IssuanceCheckpoint:
+    """Append-only record of uploaded and issued certificates, keyed by UID"""
+
+    def __init__(self, path):
+        self.path = path
+        self.uploaded = {}
+        self.issued = {}
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    if entry["stage"] == "uploaded":
+                        self.uploaded[entry["uid"]] = entry["ipfs_hash"]
+                    elif entry["stage"] == "issued":
+                        self.issued[entry["uid"]] = entry["certificate_id"]
+
+    def _append(self, entry):
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def record_upload(self, uid, ipfs_hash):
+        self.uploaded[uid] = ipfs_hash
+        self._append({"uid": uid, "stage": "uploaded", "ipfs_hash": ipfs_hash})
+
+    def record_issued(self, uid, certificate_id):
+        self.issued[uid] = certificate_id
+        self._append({"uid": uid, "stage": "issued", "certificate_id": certificate_id})
+
+
+def default_checkpoint_path(csv_path, institute_email):
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(CHECKPOINT_DIR, f"{institute_email}_{name}.jsonl")
+
+
+def _render_pdf(row, work_dir, logo_path, institute_email):
+    """Process pool worker: renders one certificate PDF and returns its path"""
+    file_name = f"{row['uid']}_{row['candidate_name'].replace(' ', '_').lower()}.pdf"
+    pdf_file_path = os.path.join(work_dir, file_name)
+    generate_certificate(pdf_file_path, row["uid"], row["candidate_name"], row["course_name"],
+                         row["org_name"], logo_path, institute_email)
+    return pdf_file_path
+
+
+async def _upload_pdf(pinata, pdf_file_path, institute_email):
+    try:
+        ipfs_hash = await pinata.upload_file(pdf_file_path, institute_email)
+    finally:
+        os.remove(pdf_file_path)
+    if not ipfs_hash:
+        raise RuntimeError("Pinata upload failed")
+    return ipfs_hash
+
+
+def _sign_certificate(row, ipfs_hash, institute_email, crypto_auth):
+    """Returns the signed CertificateInput dict for a row.
+
+    Only certificate_id is set when the certificate is already on chain with
+    this PDF. Raises when the ID is on chain with a different PDF, so the row
+    fails on its own instead of reverting a whole chunk."""
+    certificate_id = compute_certificate_id(row["uid"], row["candidate_name"], row["course_name"], row["org_name"])
+
+    status = get_certificates_status([certificate_id])[certificate_id]
+    if status is not None:
+        # A previous run may have crashed after the transaction but before the checkpoint
+        if status[0][4] == ipfs_hash:
+            return {"certificate_id": certificate_id}
+        raise ValueError(f"Certificate {certificate_id} is already issued with a different PDF ({status[0][4]})")
+
+    certificate_data = {
+        "uid": row["uid"],
+        "candidate_name": row["candidate_name"],
+        "course_name": row["course_name"],
+        "org_name": row["org_name"],
+        "ipfs_hash": ipfs_hash,
+        "certificate_id": certificate_id
+    }
+    digital_signature = crypto_auth.sign_certificate_data(institute_email, certificate_data)
+    return dict(certificate_data, digital_signature=digital_signature)
+
+
+def _is_root_anchored(root):
+    try:
+        get_contract().functions.getMerkleAnchor(root).call()
+        return True
+    except ContractLogicError:
+        return False
+
+
+def proof_document_bytes(document):
+    return json.dumps(document, indent=2).encode("utf-8")
+
+
+async def _publish_proof(pinata, certificate, document, institute_email):
+    """Pins a proof document and links it from the certificate PDF's pin metadata"""
+    certificate_id = certificate["certificate_id"]
+    # No user_email keyvalue, so proofs stay out of the institute's certificate list
+    proof_cid = await pinata.upload_bytes(proof_document_bytes(document), f"{certificate_id}.proof.json", institute_email,
+                                          keyvalues={"institute_email": str(institute_email), "proof_for": certificate_id})
+    if not proof_cid:
+        raise RuntimeError("Pinata upload of the Merkle proof failed")
+    linked = await pinata.update_keyvalues(certificate["ipfs_hash"], {
+        "user_email": str(institute_email),
+        "certificate_id": certificate_id,
+        "merkle_root": document["merkle_root"],
+        "merkle_proof_cid": proof_cid,
+    })
+    if not linked:
+        raise RuntimeError("Could not link the Merkle proof to the certificate's pin")
+    return proof_cid
+
+
+def _anchor_certificates(certificates, institute_email, sender, proof_dir):
+    """Anchors the Merkle root of signed certificates and writes their proof documents.
+
+    Returns the root as hex and the proof documents by certificate ID."""
+    root, documents = build_proof_documents(certificates, institute_email)
+
+    # A previous run may have anchored this exact batch before crashing
+    if not _is_root_anchored(root):
+        tx_hash = get_contract().functions.anchorMerkleRoot(root, institute_email, len(certificates)).transact({'from': sender})
+        receipt = get_w3().eth.wait_for_transaction_receipt(tx_hash)
+        if receipt["status"] != 1:
+            raise RuntimeError(f"Transaction {tx_hash.hex()} reverted")
+
+    os.makedirs(proof_dir, exist_ok=True)
+    for certificate_id, document in documents.items():
+        with open(os.path.join(proof_dir, f"{certificate_id}.json"), "wb") as f:
+            f.write(proof_document_bytes(document))
+    return "0x" + root.hex(), documents
+
+
+def issue_batch(rows, institute_email, checkpoint_path, render_workers=None, upload_workers=PINATA_MAX_CONCURRENCY,
+                chain_workers=4, chunk_size=DEFAULT_CHUNK_SIZE, logo_path=DEFAULT_LOGO_PATH, on_progress=None,
+                anchor=False, proof_dir=None):
+    """Issues certificates for all rows, resuming from checkpoint_path.
+
+    With anchor=True the signed certificates are anchored as one Merkle root,
+    their proof documents are written to proof_dir and pinned next to the PDFs.
+    Certificates whose proof could not be pinned are listed under
+    unpublished_proofs; they are issued, but cannot be revoked until a re-run
+    publishes the proof.
+
+    Returns a summary dict with issued, skipped and failed counts, the elapsed
+    time and throughput in certificates per minute. upload_workers bounds the
+    number of Pinata requests in flight."""
+    checkpoint_dir = os.path.dirname(checkpoint_path)
+    if checkpoint_dir:
+        os.makedirs(checkpoint_dir, exist_ok=True)
+    checkpoint = IssuanceCheckpoint(checkpoint_path)
+    crypto_auth = DigitalCertificateAuth()
+    sender = get_w3().eth.accounts[0]
+
+    pending = [row for row in rows if row["uid"] not in checkpoint.issued]
+    summary = {"total": len(rows), "issued": 0, "skipped": len(rows) - len(pending), "failed": []}
+    start = time.time()
+    work_dir = tempfile.mkdtemp(prefix="batch_issue_")
+
+    def report():
+        if on_progress:
+            on_progress(summary["issued"] + summary["skipped"] + len(summary["failed"]), summary["total"])
+
+    try:
+        with ProcessPoolExecutor(render_workers) as render_pool, \
+                PinataRunner(max_concurrency=upload_workers) as pinata, \
+                ThreadPoolExecutor(chain_workers) as chain_pool:
+            in_flight = {}
+            ready = []
+            rows_by_id = {}
+
+            def submit_sign(row, ipfs_hash):
+                future = chain_pool.submit(_sign_certificate, row, ipfs_hash, institute_email, crypto_auth)
+                in_flight[future] = ("sign", [row])
+
+            def flush_ready():
+                chunk = list(ready)
+                ready.clear()
+                future = chain_pool.submit(issue_certificates_batch, chunk, institute_email, sender)
+                in_flight[future] = ("chain", [rows_by_id[c["certificate_id"]] for c in chunk])
+
+            def record_issued(row, certificate_id):
+                checkpoint.record_issued(row["uid"], certificate_id)
+                summary["issued"] += 1
+                report()
+
+            for row in pending:
+                if row["uid"] in checkpoint.uploaded:
+                    submit_sign(row, checkpoint.uploaded[row["uid"]])
+                else:
+                    in_flight[render_pool.submit(_render_pdf, row, work_dir, logo_path, institute_email)] = ("render", [row])
+
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, stage_rows = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        for row in stage_rows:
+                            summary["failed"].append({"uid": row["uid"], "stage": stage, "reason": str(e)})
+                        report()
+                        continue
+
+                    row = stage_rows[0]
+                    if stage == "render":
+                        in_flight[pinata.submit(_upload_pdf(pinata.client, result, institute_email))] = ("upload", [row])
+                    elif stage == "upload":
+                        checkpoint.record_upload(row["uid"], result)
+                        submit_sign(row, result)
+                    elif stage == "sign":
+                        if "digital_signature" not in result:
+                            record_issued(row, result["certificate_id"])
+                        else:
+                            rows_by_id[result["certificate_id"]] = row
+                            ready.append(result)
+                    else:
+                        for certificate_ids, outcome in result:
+                            if isinstance(outcome, Exception):
+                                reason = str(outcome)
+                            elif outcome["status"] != 1:
+                                reason = f"Transaction {outcome['transactionHash'].hex()} reverted"
+                            else:
+                                reason = None
+                            for certificate_id in certificate_ids:
+                                if reason is None:
+                                    record_issued(rows_by_id[certificate_id], certificate_id)
+                                else:
+                                    summary["failed"].append({
+                                        "uid": rows_by_id[certificate_id]["uid"],
+                                        "stage": stage,
+                                        "reason": reason,
+                                    })
+                                    report()
+
+                # Submit a full chunk, or whatever is left once earlier stages have drained
+                pipeline_busy = any(stage != "chain" for stage, _ in in_flight.values())
+                if not anchor and (len(ready) >= chunk_size or (ready and not pipeline_busy)):
+                    flush_ready()
+
+        if anchor and ready:
+            proof_dir = proof_dir or os.path.join(PROOF_DIR, institute_email)
+            try:
+                summary["merkle_root"], documents = _anchor_certificates(ready, institute_email, sender, proof_dir)
+                summary["proof_dir"] = proof_dir
+            except Exception as e:
+                for certificate in ready:
+                    row = rows_by_id[certificate["certificate_id"]]
+                    summary["failed"].append({"uid": row["uid"], "stage": "anchor", "reason": str(e)})
+                report()
+            else:
+                summary["unpublished_proofs"] = []
+                with PinataRunner(max_concurrency=upload_workers) as pinata:
+                    futures = {
+                        pinata.submit(_publish_proof(pinata.client, certificate,
+                                                     documents[certificate["certificate_id"]], institute_email)): certificate
+                        for certificate in ready
+                    }
+                    for future in futures:
+                        certificate = futures[future]
+                        row = rows_by_id[certificate["certificate_id"]]
+                        try:
+                            future.result()
+                        except Exception as e:
+                            summary["unpublished_proofs"].append({"uid": row["uid"], "reason": str(e)})
+                            continue
+                        record_issued(row, certificate["certificate_id"])
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    summary["elapsed_seconds"] = time.time() - start
+    minutes = summary["elapsed_seconds"] / 60
+    summary["certificates_per_minute"] = summary["issued"] / minutes if minutes else 0.0
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Issue certificates in bulk from a CSV file.")
+    parser.add_argument("csv_path", help="CSV with uid, candidate_name, course_name and org_name columns")
+    parser.add_argument("--institute-email", required=True, help="Email of the issuing (verified) institute")
+    parser.add_argument("--checkpoint", help="Checkpoint file (defaults to batch_checkpoints/<email>_<csv>.jsonl)")
+    parser.add_argument("--render-workers", type=int, default=None)
+    parser.add_argument("--upload-workers", type=int, default=PINATA_MAX_CONCURRENCY,
+                        help="Pinata requests in flight at once")
+    parser.add_argument("--chain-workers", type=int, default=4)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Signed certificates per generateCertificatesBatch submission")
+    parser.add_argument("--logo", default=DEFAULT_LOGO_PATH)
+    parser.add_argument("--anchor", action="store_true",
+                        help="Anchor the batch as one Merkle root instead of storing each certificate")
+    parser.add_argument("--proof-dir", help="Where to write Merkle proofs (defaults to batch_proofs/<email>)")
+    args = parser.parse_args()
+
+    with open(args.csv_path, newline="", encoding="utf-8") as f:
+        rows = read_candidates(f)
+
+    checkpoint_path = args.checkpoint or default_checkpoint_path(args.csv_path, args.institute_email)
+
+    def on_progress(done, total):
+        print(f"\r{done}/{total} certificates processed", end="", flush=True)
+
+    summary = issue_batch(rows, args.institute_email, checkpoint_path, args.render_workers,
+                          args.upload_workers, args.chain_workers, args.chunk_size, args.logo, on_progress,
+                          args.anchor, args.proof_dir)
+    print()
+    print(f"Issued: {summary['issued']}  Skipped (already issued): {summary['skipped']}  "
+          f"Failed: {len(summary['failed'])}")
+    for failure in summary["failed"]:
+        print(f"  UID {failure['uid']} failed at {failure['stage']}: {failure['reason']}")
+    print(f"Elapsed: {summary['elapsed_seconds']:.1f}s  "
+          f"Throughput: {summary['certificates_per_minute']:.1f} certificates/minute")
+    if "merkle_root" in summary:
+        print(f"Merkle root: {summary['merkle_root']}  Proofs: {summary['proof_dir']}")
+    for failure in summary.get("unpublished_proofs", []):
+        print(f"  UID {failure['uid']} is anchored but its proof is not pinned (re-run to retry): {failure['reason']}")
+    print(f"Checkpoint: {checkpoint_path}")
+
+
+if __name__ == "__main__":
+    main()
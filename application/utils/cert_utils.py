@@ -1,73 +1,59 @@
-import pdfplumber
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image
+import hashlib
+import os
+from io import BytesIO
 
-from connection import contract
+from connection import get_contract
+from db.ledger_cache import get_ledger_cache
+from rpc_batch import batch, call_many
+from utils.pdf_payload import PayloadMismatchError, payload_fields, read_certificate_payload
 
+# Entries fetched per paginated contract call
+CERTIFICATE_PAGE_SIZE = int(os.getenv("CERTIFICATE_PAGE_SIZE", 200))
 
-def generate_certificate(output_path, uid, candidate_name, course_name, org_name, institute_logo_path):
-    # Create a PDF document
-    doc = SimpleDocTemplate(output_path, pagesize=letter)
 
-    # Create a list to hold the elements of the PDF
-    elements = []
+def compute_certificate_id(uid, candidate_name, course_name, org_name):
+    """Certificate ID is the sha256 of the certificate fields"""
+    data = f"{uid}{candidate_name}{course_name}{org_name}".encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
 
-    # Add institute logo and institute name
-    if institute_logo_path:
-        logo = Image(institute_logo_path, width=150, height=150)
-        elements.append(logo)
 
-    # Add institute name
-    institute_style = ParagraphStyle(
-        "InstituteStyle",
-        parent=getSampleStyleSheet()["Title"],
-        fontName="Helvetica-Bold",
-        fontSize=15,
-        spaceAfter=40,
-    )
-    institute = Paragraph(org_name, institute_style)
-    elements.extend([institute, Spacer(1, 12)])
-
-    # Add title
-    title_style = ParagraphStyle(
-        "TitleStyle",
-        parent=getSampleStyleSheet()["Title"],
-        fontName="Helvetica-Bold",
-        fontSize=25,
-        spaceAfter=20,
-    )
-    title1 = Paragraph("Certificate of Completion", title_style)
-    elements.extend([title1, Spacer(1, 6)])
-
-    # Add recipient name, UID, and course name with increased line space
-    recipient_style = ParagraphStyle(
-        "RecipientStyle",
-        parent=getSampleStyleSheet()["BodyText"],
-        fontSize=14,
-        spaceAfter=6,
-        leading=18,
-        alignment=1
-    )
+def generate_certificate(output_path, uid, candidate_name, course_name, org_name, institute_logo_path,
+                         institute_email=None, embed_qr=False):
+    """Renders the certificate PDF with its fields embedded as a machine-readable payload"""
+    # reportlab is only loaded by the pages and workers that render
+    from utils.certificate_render import get_certificate_template
+
+    template = get_certificate_template(institute_logo_path)
+    template.render(output_path, uid, candidate_name, course_name, org_name, institute_email, embed_qr)
+
+    if isinstance(output_path, str):
+        print(f"Certificate generated and saved at: {output_path}")
 
-    recipient_text = f"This is to certify that<br/><br/>\
-                     <font color='red'> {candidate_name} </font><br/>\
-                     with UID <br/> \
-                    <font color='red'> {uid} </font> <br/><br/>\
-                     has successfully completed the course:<br/>\
-                     <font color='blue'> {course_name} </font>"
 
-    recipient = Paragraph(recipient_text, recipient_style)
-    elements.extend([recipient, Spacer(1, 12)])
+def extract_certificate(pdf_file):
+    """Reads the certificate fields from a PDF given as a path, a file object or bytes.
 
-    # Build the PDF document
-    doc.build(elements)
+    The payload embedded by generate_certificate is used when present, so only
+    PDFs generated before payloads were added go through pdfplumber text
+    extraction. The fields are a claim, not proof: callers check the
+    certificate ID they give against the chain. Raises PayloadMismatchError
+    when the payload's certificate ID does not match its own fields."""
+    if isinstance(pdf_file, str):
+        with open(pdf_file, "rb") as f:
+            pdf_file = f.read()
+    elif not isinstance(pdf_file, (bytes, bytearray)):
+        pdf_file = pdf_file.read()
 
-    print(f"Certificate generated and saved at: {output_path}")
+    payload = read_certificate_payload(pdf_file)
+    if payload is not None:
+        fields = payload_fields(payload)
+        if payload.get("certificate_id") != compute_certificate_id(*fields):
+            raise PayloadMismatchError("The embedded certificate payload is inconsistent")
+        return fields
 
+    import pdfplumber
 
-def extract_certificate(pdf_path):
-    with pdfplumber.open(pdf_path) as pdf:
+    with pdfplumber.open(BytesIO(pdf_file)) as pdf:
         # Extract text from each page
         text = ""
         for page in pdf.pages:
@@ -79,13 +65,182 @@ def extract_certificate(pdf_path):
         uid = lines[5]
         course_name = lines[-1]
 
-        return uid, candidate_name, course_name, org_name
+    return uid, candidate_name, course_name, org_name
 
 
 def get_certificate_id_ipfs_hash(ipfs_hash):
-    certificate_ids = contract.functions.getAllCertificateIds().call()
-    for certificate_id in certificate_ids:
-        certificate = contract.functions.getCertificate(certificate_id).call()
-        if certificate[4] == ipfs_hash:
+    """Looks up the certificate ID for an IPFS hash, preferring the local ledger cache."""
+    ledger = get_ledger_cache()
+    if not ledger.is_stale():
+        certificate_id = ledger.get_certificate_id_by_ipfs_hash(ipfs_hash)
+        if certificate_id:
             return certificate_id
-    return None
+
+    certificate_id = get_contract().functions.getCertificateIdByIpfsHash(ipfs_hash).call()
+    return certificate_id or None
+
+
+def get_certificate_ids_by_ipfs_hashes(ipfs_hashes):
+    """Batch form of get_certificate_id_ipfs_hash: {ipfs_hash: certificate_id or None}.
+
+    Hashes the ledger cache cannot answer are looked up in one batched RPC request."""
+    certificate_ids = {}
+    ledger = get_ledger_cache()
+    if not ledger.is_stale():
+        for ipfs_hash in ipfs_hashes:
+            certificate_id = ledger.get_certificate_id_by_ipfs_hash(ipfs_hash)
+            if certificate_id:
+                certificate_ids[ipfs_hash] = certificate_id
+
+    missing = [ipfs_hash for ipfs_hash in ipfs_hashes if ipfs_hash not in certificate_ids]
+    results = call_many(get_contract().functions.getCertificateIdByIpfsHash(ipfs_hash) for ipfs_hash in missing)
+    for ipfs_hash, certificate_id in zip(missing, results):
+        certificate_ids[ipfs_hash] = certificate_id or None
+    return certificate_ids
+
+
+def _iter_pages(fetch_page, page_size):
+    """Yields entries from an offset/limit contract getter one page at a time.
+
+    The contract arrays are append-only, so walking them by offset never
+    skips or repeats an entry; anything appended meanwhile is picked up at
+    the end."""
+    offset = 0
+    while True:
+        page = fetch_page(offset, page_size).call()
+        yield from page
+        if len(page) < page_size:
+            return
+        offset += len(page)
+
+
+def iter_certificate_ids(institute_email=None, page_size=CERTIFICATE_PAGE_SIZE):
+    """Lazily iterates over all certificate IDs, or only those issued by institute_email"""
+    if institute_email is None:
+        return _iter_pages(get_contract().functions.getCertificateIds, page_size)
+    return _iter_pages(
+        lambda offset, limit: get_contract().functions.getCertificateIdsByInstitute(institute_email, offset, limit),
+        page_size,
+    )
+
+
+def iter_institute_emails(page_size=CERTIFICATE_PAGE_SIZE):
+    """Lazily iterates over all registered institute emails"""
+    return _iter_pages(get_contract().functions.getInstituteEmails, page_size)
+
+
+def get_institute_info(institute_email):
+    """Returns the institute tuple from getInstitute, preferring the local ledger cache."""
+    ledger = get_ledger_cache()
+    if not ledger.is_stale():
+        institute = ledger.get_institute(institute_email)
+        if institute is not None:
+            return institute
+
+    return tuple(get_contract().functions.getInstitute(institute_email).call())
+
+
+def is_certificate_revoked(certificate_id):
+    """Revocation flag for a certificate ID, preferring the local ledger cache."""
+    ledger = get_ledger_cache()
+    if not ledger.is_stale():
+        return ledger.is_revoked(certificate_id)
+    return get_contract().functions.isRevoked(certificate_id).call()
+
+
+def _status_from_verification(verification):
+    """Converts a CertificateVerification struct into (certificate, is_revoked, institute)"""
+    exists, certificate, is_revoked, institute_registered, name, public_key, is_verified, registered_at = verification
+    if not exists:
+        return None
+    institute = (name, public_key, is_verified, registered_at) if institute_registered else None
+    return tuple(certificate), is_revoked, institute
+
+
+def get_certificate_status(certificate_id):
+    """Returns (certificate, is_revoked, institute) for a certificate ID.
+
+    Reads come from the local ledger cache when it is in sync with the chain,
+    otherwise from a single verifyCertificateFull call. Raises if the
+    certificate does not exist on chain; institute is None when the issuer is
+    not registered."""
+    ledger = get_ledger_cache()
+    if not ledger.is_stale():
+        status = ledger.get_certificate_status(certificate_id)
+        if status is not None:
+            return status
+
+    return _status_from_verification(get_contract().functions.verifyCertificateFull(certificate_id).call())
+
+
+def get_certificates_status(certificate_ids):
+    """Batch form of get_certificate_status: {certificate_id: status or None for unknown IDs}.
+
+    IDs missing from the ledger cache are fetched with one getCertificatesBatch call."""
+    statuses = {}
+    ledger = get_ledger_cache()
+    if not ledger.is_stale():
+        for certificate_id in certificate_ids:
+            status = ledger.get_certificate_status(certificate_id)
+            if status is not None:
+                statuses[certificate_id] = status
+
+    missing = [certificate_id for certificate_id in certificate_ids if certificate_id not in statuses]
+    if missing:
+        verifications = get_contract().functions.getCertificatesBatch(missing).call()
+        for certificate_id, verification in zip(missing, verifications):
+            statuses[certificate_id] = _status_from_verification(verification)
+    return statuses
+
+
+def get_merkle_anchor(merkle_root):
+    """Returns (institute_email, certificate_count, timestamp) for an anchored root, or None"""
+    from web3.exceptions import ContractLogicError
+
+    try:
+        return tuple(get_contract().functions.getMerkleAnchor(merkle_root).call())
+    except ContractLogicError:
+        return None
+
+
+def get_anchored_certificate_status(merkle_root, certificate_id):
+    """Returns (anchor or None, is_revoked) for a certificate from an anchored batch.
+
+    Both reads go out in one batched request unless the ledger cache can
+    answer the revocation check."""
+    from web3.exceptions import ContractLogicError
+
+    ledger = get_ledger_cache()
+    if not ledger.is_stale():
+        return get_merkle_anchor(merkle_root), ledger.is_revoked(certificate_id)
+
+    with batch() as rpc:
+        anchor = rpc.add(get_contract().functions.getMerkleAnchor(merkle_root))
+        revoked = rpc.add(get_contract().functions.isRevoked(certificate_id))
+    try:
+        anchor_result = tuple(anchor.result())
+    except ContractLogicError:
+        anchor_result = None
+    return anchor_result, revoked.result()
+
+
+def get_proof_document(merkle_proof_cid):
+    """The Merkle proof document pinned under merkle_proof_cid"""
+    from utils.ipfs_cache import get_ipfs_cache
+    from utils.merkle_utils import load_proof_document
+
+    return load_proof_document(get_ipfs_cache().get(merkle_proof_cid))
+
+
+def revoke_anchored_certificate(certificate_id, merkle_proof_cid, sender):
+    """Revokes a certificate from an anchored batch with the proof document pinned next to its PDF"""
+    from utils.merkle_utils import from_hex, verify_proof_document
+
+    document = get_proof_document(merkle_proof_cid)
+    if document["certificate"]["certificate_id"] != certificate_id or not verify_proof_document(document):
+        raise ValueError("The pinned Merkle proof does not belong to this certificate")
+    return get_contract().functions.revokeAnchoredCertificate(
+        from_hex(document["merkle_root"]),
+        certificate_id,
+        [from_hex(sibling) for sibling in document["proof"]],
+    ).transact({'from': sender})
@@ -0,0 +1,103 @@
+"""Encoding helpers and a v1-compatible reader for the CertificationV2 contract.
+
+v2 stores bytes32 values where v1 stores strings:
+- certificate IDs are the raw 32 bytes of the sha256 hex ID,
+- the certificate fields are kept as keccak256(abi.encode(uid, candidate_name, course_name, org_name)),
+- the IPFS CIDv0 is kept as its sha256 digest,
+- institutes are keyed by keccak256(email),
+- signatures are raw bytes plus an algorithm code.
+"""
+import base64
+
+from eth_abi import encode
+from web3 import Web3
+
+from connection import get_contract_v2
+from utils.cid_utils import CIDV0_PREFIX, b58decode, b58encode
+from utils.crypto_utils import ED25519, RSA_PSS_SHA256, parse_signature
+
+SIGNATURE_ALGORITHM_CODES = {RSA_PSS_SHA256: 0, ED25519: 1}
+SIGNATURE_ALGORITHMS = {code: algorithm for algorithm, code in SIGNATURE_ALGORITHM_CODES.items()}
+
+
+def certificate_id_to_bytes32(certificate_id):
+    return bytes.fromhex(certificate_id)
+
+
+def bytes32_to_certificate_id(value):
+    return bytes(value).hex()
+
+
+def fields_commitment(uid, candidate_name, course_name, org_name):
+    """keccak256(abi.encode(uid, candidate_name, course_name, org_name))"""
+    return Web3.keccak(encode(["string", "string", "string", "string"],
+                              [str(uid), candidate_name, course_name, org_name]))
+
+
+def institute_id(institute_email):
+    return Web3.keccak(text=institute_email)
+
+
+def cid_to_digest(ipfs_hash):
+    """sha256 digest inside a CIDv0 ("Qm...")"""
+    multihash = b58decode(ipfs_hash)
+    if len(multihash) != 34 or not multihash.startswith(CIDV0_PREFIX):
+        raise ValueError(f"Only CIDv0 sha2-256 hashes can be stored in v2: {ipfs_hash}")
+    return multihash[2:]
+
+
+def digest_to_cid(digest):
+    return b58encode(CIDV0_PREFIX + bytes(digest))
+
+
+def encode_signature(digital_signature):
+    """Splits a stored v1 signature string into (algorithm code, raw signature bytes)"""
+    algorithm, signature_bytes = parse_signature(digital_signature)
+    return SIGNATURE_ALGORITHM_CODES[algorithm], signature_bytes
+
+
+def decode_signature(algorithm_code, signature_bytes):
+    """Rebuilds the '<algorithm>:<base64>' signature string verify_certificate_signature expects"""
+    return f"{SIGNATURE_ALGORITHMS[algorithm_code]}:{base64.b64encode(bytes(signature_bytes)).decode('utf-8')}"
+
+
+def certificate_input(certificate_id, uid, candidate_name, course_name, org_name, ipfs_hash, digital_signature):
+    """CertificateInput tuple for generateCertificate / generateCertificatesBatch / importCertificates"""
+    algorithm_code, signature_bytes = encode_signature(digital_signature)
+    return (
+        certificate_id_to_bytes32(certificate_id),
+        fields_commitment(uid, candidate_name, course_name, org_name),
+        cid_to_digest(ipfs_hash),
+        algorithm_code,
+        signature_bytes,
+    )
+
+
+def get_certificate_status_v2(certificate_id, uid, candidate_name, course_name, org_name):
+    """Reads a certificate from v2 in the (certificate, is_revoked, institute) shape used for v1.
+
+    v2 does not store the certificate fields, so the caller supplies them
+    (e.g. extracted from the PDF) and they are checked against the on-chain
+    commitment. Raises ValueError if they do not match."""
+    if get_contract_v2() is None:
+        raise RuntimeError("CertificationV2 is not deployed")
+
+    cert = get_contract_v2().functions.getCertificate(certificate_id_to_bytes32(certificate_id)).call()
+    commitment, ipfs_digest, cert_institute_id, timestamp, algorithm_code, revoked, signature_bytes = cert
+    if bytes(commitment) != fields_commitment(uid, candidate_name, course_name, org_name):
+        raise ValueError("Certificate fields do not match the on-chain commitment")
+
+    institute_email, name, public_key, is_verified, registered_at = \
+        get_contract_v2().functions.getInstitute(cert_institute_id).call()
+
+    certificate = (
+        uid,
+        candidate_name,
+        course_name,
+        org_name,
+        digest_to_cid(ipfs_digest),
+        institute_email,
+        decode_signature(algorithm_code, signature_bytes),
+        timestamp,
+    )
+    return certificate, revoked, (name, public_key, is_verified, registered_at)
@@ -0,0 +1,164 @@
+"""Certificate PDF rendering with reportlab.
+
+Kept apart from cert_utils so that pages which only verify certificates
+never import reportlab or Pillow.
+"""
+import os
+import threading
+from io import BytesIO
+
+from PIL import Image as PILImage
+from reportlab.graphics import renderPDF
+from reportlab.graphics.barcode.qr import QrCodeWidget
+from reportlab.graphics.shapes import Drawing
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.pdfbase.pdfdoc import XMP
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, PageBreak
+
+from utils.cert_utils import compute_certificate_id
+from utils.pdf_payload import build_payload, payload_json, xmp_packet
+
+QR_CODE_SIZE = 90
+# Logo is drawn at LOGO_SIZE points; pixels beyond LOGO_DPI are not embedded
+LOGO_SIZE = 150
+LOGO_DPI = int(os.getenv("CERTIFICATE_LOGO_DPI", 300))
+LOGO_JPEG_QUALITY = int(os.getenv("CERTIFICATE_LOGO_JPEG_QUALITY", 85))
+
+
+def _draw_qr_code(canvas, text):
+    """Draws text as a QR code in the bottom right corner of the page"""
+    widget = QrCodeWidget(text)
+    x1, y1, x2, y2 = widget.getBounds()
+    drawing = Drawing(QR_CODE_SIZE, QR_CODE_SIZE,
+                      transform=[QR_CODE_SIZE / (x2 - x1), 0, 0, QR_CODE_SIZE / (y2 - y1), 0, 0])
+    drawing.add(widget)
+    page_width, _ = canvas._pagesize
+    renderPDF.draw(drawing, canvas, page_width - QR_CODE_SIZE - 36, 36)
+
+
+def _prepare_logo(logo_path, size, dpi, quality):
+    """Logo re-encoded as a JPEG no larger than needed to print size points at dpi"""
+    max_pixels = max(int(size * dpi / 72), 1)
+    with PILImage.open(logo_path) as image:
+        if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+            # JPEG has no alpha, so transparent areas are flattened onto the white page
+            image = image.convert("RGBA")
+            background = PILImage.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        else:
+            image = image.convert("RGB")
+        image.thumbnail((max_pixels, max_pixels), PILImage.LANCZOS)
+        buffer = BytesIO()
+        image.save(buffer, "JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+class CertificateTemplate:
+    """Certificate layout compiled once and reused for every certificate it renders.
+
+    Paragraph styles are built in the constructor and the logo is downsampled
+    to LOGO_DPI and kept in memory, so a render only lays out the fields.
+    """
+
+    def __init__(self, institute_logo_path=None, logo_dpi=LOGO_DPI, logo_quality=LOGO_JPEG_QUALITY):
+        sample_styles = getSampleStyleSheet()
+        self.institute_style = ParagraphStyle(
+            "InstituteStyle",
+            parent=sample_styles["Title"],
+            fontName="Helvetica-Bold",
+            fontSize=15,
+            spaceAfter=40,
+        )
+        self.title_style = ParagraphStyle(
+            "TitleStyle",
+            parent=sample_styles["Title"],
+            fontName="Helvetica-Bold",
+            fontSize=25,
+            spaceAfter=20,
+        )
+        self.recipient_style = ParagraphStyle(
+            "RecipientStyle",
+            parent=sample_styles["BodyText"],
+            fontSize=14,
+            spaceAfter=6,
+            leading=18,
+            alignment=1
+        )
+        self.logo = _prepare_logo(institute_logo_path, LOGO_SIZE, logo_dpi, logo_quality) if institute_logo_path else None
+
+    def _elements(self, uid, candidate_name, course_name, org_name):
+        elements = []
+
+        # Add institute logo and institute name
+        if self.logo:
+            elements.append(Image(BytesIO(self.logo), width=LOGO_SIZE, height=LOGO_SIZE))
+        elements.extend([Paragraph(org_name, self.institute_style), Spacer(1, 12)])
+
+        # Add title
+        elements.extend([Paragraph("Certificate of Completion", self.title_style), Spacer(1, 6)])
+
+        # Add recipient name, UID, and course name with increased line space
+        recipient_text = f"This is to certify that<br/><br/>\
+                         <font color='red'> {candidate_name} </font><br/>\
+                         with UID <br/> \
+                        <font color='red'> {uid} </font> <br/><br/>\
+                         has successfully completed the course:<br/>\
+                         <font color='blue'> {course_name} </font>"
+        elements.extend([Paragraph(recipient_text, self.recipient_style), Spacer(1, 12)])
+        return elements
+
+    def render(self, output, uid, candidate_name, course_name, org_name, institute_email=None, embed_qr=False):
+        """Renders one certificate, with its fields embedded as a machine-readable payload, to a path or file object"""
+        certificate_id = compute_certificate_id(uid, candidate_name, course_name, org_name)
+        payload = build_payload(certificate_id, uid, candidate_name, course_name, org_name, institute_email)
+
+        doc = SimpleDocTemplate(output, pagesize=letter, title="Certificate of Completion",
+                                author=org_name, subject=certificate_id, pageCompression=1)
+
+        def on_first_page(canvas, doc):
+            # Fields as JSON in the XMP packet, which is written uncompressed for a fast byte scan
+            canvas._doc.Catalog.Metadata = XMP(creator=lambda pdf_doc: xmp_packet(payload))
+            if embed_qr:
+                _draw_qr_code(canvas, payload_json(payload))
+
+        doc.build(self._elements(uid, candidate_name, course_name, org_name), onFirstPage=on_first_page)
+
+    def render_bytes(self, uid, candidate_name, course_name, org_name, institute_email=None, embed_qr=False):
+        buffer = BytesIO()
+        self.render(buffer, uid, candidate_name, course_name, org_name, institute_email, embed_qr)
+        return buffer.getvalue()
+
+    def render_many(self, certificates, institute_email=None, embed_qr=False):
+        """One PDF per certificate; certificates are dicts with uid, candidate_name, course_name and org_name"""
+        return [
+            self.render_bytes(cert["uid"], cert["candidate_name"], cert["course_name"], cert["org_name"],
+                              institute_email, embed_qr)
+            for cert in certificates
+        ]
+
+    def render_combined(self, output, certificates):
+        """All certificates as pages of one PDF (e.g. for printing); the logo is embedded only once.
+
+        The combined file carries no per-certificate payload, so it is not meant for upload."""
+        doc = SimpleDocTemplate(output, pagesize=letter, title="Certificates of Completion", pageCompression=1)
+        elements = []
+        for cert in certificates:
+            if elements:
+                elements.append(PageBreak())
+            elements.extend(self._elements(cert["uid"], cert["candidate_name"], cert["course_name"], cert["org_name"]))
+        doc.build(elements)
+
+
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+def get_certificate_template(institute_logo_path=None):
+    """Process-wide template per logo, so repeated renders skip style and logo setup"""
+    with _templates_lock:
+        template = _templates.get(institute_logo_path)
+        if template is None:
+            template = _templates[institute_logo_path] = CertificateTemplate(institute_logo_path)
+        return template
@@ -0,0 +1,105 @@
+"""Base58 and CIDv0 helpers.
+
+compute_cid_v0 rebuilds the CID that `ipfs add` / Pinata's pinFileToIPFS
+(CIDv0 defaults) assign to a file: UnixFS dag-pb nodes, 256 KiB chunks,
+balanced layout with at most 174 links per node. Comparing it with the CID a
+file was fetched under proves the bytes are the pinned content.
+"""
+import hashlib
+
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+# CIDv0 is base58(multihash) where the multihash prefix 0x12 0x20 means sha2-256, 32 bytes
+CIDV0_PREFIX = b"\x12\x20"
+
+CHUNK_SIZE = 262144
+MAX_LINKS = 174
+UNIXFS_FILE = 2
+
+
+def b58encode(data):
+    number = int.from_bytes(data, "big")
+    encoded = ""
+    while number:
+        number, remainder = divmod(number, 58)
+        encoded = BASE58_ALPHABET[remainder] + encoded
+    leading_zeros = len(data) - len(data.lstrip(b"\x00"))
+    return BASE58_ALPHABET[0] * leading_zeros + encoded
+
+
+def b58decode(text):
+    number = 0
+    for char in text:
+        number = number * 58 + BASE58_ALPHABET.index(char)
+    leading_zeros = len(text) - len(text.lstrip(BASE58_ALPHABET[0]))
+    body = number.to_bytes((number.bit_length() + 7) // 8, "big")
+    return b"\x00" * leading_zeros + body
+
+
+def is_cid_v0(cid):
+    return len(cid) == 46 and cid.startswith("Qm")
+
+
+# --- Minimal protobuf encoding for the UnixFS / dag-pb messages ---
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _field_varint(number, value):
+    return _varint(number << 3) + _varint(value)
+
+
+def _field_bytes(number, value):
+    return _varint((number << 3) | 2) + _varint(len(value)) + value
+
+
+def _unixfs_file(data, filesize, blocksizes=()):
+    message = _field_varint(1, UNIXFS_FILE)
+    if data:
+        message += _field_bytes(2, data)
+    message += _field_varint(3, filesize)
+    for blocksize in blocksizes:
+        message += _field_varint(4, blocksize)
+    return message
+
+
+def _dag_pb_node(unixfs_data, links=()):
+    """links are (multihash, tsize); dag-pb writes Links (field 2) before Data (field 1)"""
+    node = b""
+    for multihash, tsize in links:
+        link = _field_bytes(1, multihash) + _field_bytes(2, b"") + _field_varint(3, tsize)
+        node += _field_bytes(2, link)
+    return node + _field_bytes(1, unixfs_data)
+
+
+def compute_cid_v0(content):
+    """CIDv0 of content as added with the default UnixFS importer settings"""
+    # Each entry: (multihash, tsize = cumulative block size, filesize)
+    level = []
+    chunks = [content[i:i + CHUNK_SIZE] for i in range(0, len(content), CHUNK_SIZE)] or [b""]
+    for chunk in chunks:
+        block = _dag_pb_node(_unixfs_file(chunk, len(chunk)))
+        level.append((CIDV0_PREFIX + hashlib.sha256(block).digest(), len(block), len(chunk)))
+
+    while len(level) > 1:
+        parents = []
+        for i in range(0, len(level), MAX_LINKS):
+            children = level[i:i + MAX_LINKS]
+            filesize = sum(child[2] for child in children)
+            block = _dag_pb_node(
+                _unixfs_file(b"", filesize, [child[2] for child in children]),
+                [(child[0], child[1]) for child in children],
+            )
+            tsize = len(block) + sum(child[1] for child in children)
+            parents.append((CIDV0_PREFIX + hashlib.sha256(block).digest(), tsize, filesize))
+        level = parents
+
+    return b58encode(level[0][0])
@@ -1,13 +1,156 @@
 import hashlib
 import json
 import os
+import threading
 import time
+from collections import OrderedDict
+from cryptography.exceptions import InvalidSignature
 from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import rsa, padding
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa, padding
 from cryptography.hazmat.primitives.serialization import load_pem_private_key, load_pem_public_key
 from cryptography.x509 import load_pem_x509_certificate
 import base64
-import streamlit as st
+
+KEY_CACHE_SIZE = int(os.getenv("KEY_CACHE_SIZE", 256))
+
+
+class KeyCache:
+    """Thread-safe LRU cache of parsed PEM keys shared by all sessions in the process.
+
+    Entries are re-parsed when the key file's mtime changes."""
+
+    def __init__(self, maxsize=KEY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, cache_key, path, loader):
+        """Returns the parsed key at path, or None if the file does not exist"""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            self.invalidate(cache_key)
+            return None
+
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None and entry[0] == mtime:
+                self._entries.move_to_end(cache_key)
+                return entry[1]
+
+        with open(path, "rb") as f:
+            key = loader(f.read())
+
+        with self._lock:
+            self._entries[cache_key] = (mtime, key)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return key
+
+    def invalidate(self, *cache_keys):
+        with self._lock:
+            for cache_key in cache_keys:
+                self._entries.pop(cache_key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+key_cache = KeyCache()
+
+
+# Key types an institute can be issued, and the signature algorithm each one produces
+KEY_TYPES = ("rsa", "ed25519")
+# RSA keeps the key format existing deployments produce; INSTITUTE_KEY_TYPE=ed25519 opts in
+DEFAULT_KEY_TYPE = os.getenv("INSTITUTE_KEY_TYPE", "rsa")
+
+RSA_PSS_SHA256 = "rsa-pss-sha256"
+ED25519 = "ed25519"
+# Signatures without an algorithm prefix predate it and are RSA-PSS
+LEGACY_SIGNATURE_ALGORITHM = RSA_PSS_SHA256
+
+
+def _canonical_certificate_bytes(certificate_data):
+    return json.dumps(certificate_data, sort_keys=True).encode('utf-8')
+
+
+def _key_algorithm(key):
+    """Signature algorithm identifier for a private or public key"""
+    if isinstance(key, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)):
+        return ED25519
+    if isinstance(key, (rsa.RSAPrivateKey, rsa.RSAPublicKey)):
+        return RSA_PSS_SHA256
+    raise ValueError(f"Unsupported key type: {type(key).__name__}")
+
+
+def _sign_with_private_key(private_key, certificate_data):
+    """Sign certificate data, returning '<algorithm>:<base64 signature>'"""
+    algorithm = _key_algorithm(private_key)
+    data_to_sign = _canonical_certificate_bytes(certificate_data)
+    
+    if algorithm == ED25519:
+        signature = private_key.sign(data_to_sign)
+    else:
+        signature = private_key.sign(
+            data_to_sign,
+            padding.PSS(
+                mgf=padding.MGF1(hashes.SHA256()),
+                salt_length=padding.PSS.MAX_LENGTH
+            ),
+            hashes.SHA256()
+        )
+    
+    return f"{algorithm}:{base64.b64encode(signature).decode('utf-8')}"
+
+
+def parse_signature(signature):
+    """Split a stored signature into (algorithm, signature bytes)"""
+    algorithm, separator, encoded = signature.partition(":")
+    if not separator:
+        algorithm, encoded = LEGACY_SIGNATURE_ALGORITHM, signature
+    return algorithm, base64.b64decode(encoded.encode('utf-8'))
+
+
+def _verify_with_public_key(public_key, certificate_data, signature):
+    """Verify a stored signature over certificate data, raising InvalidSignature on mismatch"""
+    # Create data to verify
+    data_to_verify = _canonical_certificate_bytes(certificate_data)
+    
+    # Decode signature and check it was made with this kind of key
+    algorithm, signature_bytes = parse_signature(signature)
+    if algorithm != _key_algorithm(public_key):
+        raise InvalidSignature(f"{algorithm} signature does not match the institute's key type")
+    
+    # Verify signature
+    if algorithm == ED25519:
+        public_key.verify(signature_bytes, data_to_verify)
+    else:
+        public_key.verify(
+            signature_bytes,
+            data_to_verify,
+            padding.PSS(
+                mgf=padding.MGF1(hashes.SHA256()),
+                salt_length=padding.PSS.MAX_LENGTH
+            ),
+            hashes.SHA256()
+        )
+
+
+def _verify_group(public_key, entries):
+    """Verify (index, certificate_data, signature) entries against one public key"""
+    results = []
+    for index, certificate_data, signature in entries:
+        try:
+            _verify_with_public_key(public_key, certificate_data, signature)
+            results.append((index, True, "Signature is valid"))
+        except InvalidSignature:
+            results.append((index, False, "Signature is invalid"))
+        except Exception as e:
+            results.append((index, False, f"Malformed signature: {e}"))
+    return results
+
 
 class DigitalCertificateAuth:
     def __init__(self):
@@ -19,8 +162,11 @@ class DigitalCertificateAuth:
         if not os.path.exists(self.keys_dir):
             os.makedirs(self.keys_dir)
     
-    def generate_institute_keys(self, institute_email):
-        """Generate RSA key pair for an institute"""
+    def generate_institute_keys(self, institute_email, key_type=DEFAULT_KEY_TYPE):
+        """Generate an RSA-2048 (default) or Ed25519 key pair for an institute"""
+        if key_type not in KEY_TYPES:
+            raise ValueError(f"Unsupported key type: {key_type}")
+        
         institute_dir = os.path.join(self.keys_dir, institute_email)
         if not os.path.exists(institute_dir):
             os.makedirs(institute_dir)
@@ -29,10 +175,13 @@ class DigitalCertificateAuth:
         public_key_path = os.path.join(institute_dir, "public_key.pem")
         
         # Generate private key
-        private_key = rsa.generate_private_key(
-            public_exponent=65537,
-            key_size=2048
-        )
+        if key_type == "ed25519":
+            private_key = ed25519.Ed25519PrivateKey.generate()
+        else:
+            private_key = rsa.generate_private_key(
+                public_exponent=65537,
+                key_size=2048
+            )
         
         # Generate public key
         public_key = private_key.public_key()
@@ -52,6 +201,7 @@ class DigitalCertificateAuth:
                 format=serialization.PublicFormat.SubjectPublicKeyInfo
             ))
         
+        self.invalidate_cached_keys(institute_email)
         return private_key_path, public_key_path
     
     def get_institute_keys(self, institute_email):
@@ -62,67 +212,84 @@ class DigitalCertificateAuth:
         
         return private_key_path, public_key_path
     
+    def _cache_key(self, institute_email, kind):
+        return os.path.abspath(self.keys_dir), institute_email, kind
+    
+    def load_private_key(self, institute_email):
+        """Get institute's parsed private key from the shared key cache"""
+        private_key_path, _ = self.get_institute_keys(institute_email)
+        return key_cache.get(
+            self._cache_key(institute_email, "private"),
+            private_key_path,
+            lambda data: load_pem_private_key(data, password=None)
+        )
+    
+    def load_public_key(self, institute_email):
+        """Get institute's parsed public key from the shared key cache"""
+        _, public_key_path = self.get_institute_keys(institute_email)
+        return key_cache.get(self._cache_key(institute_email, "public"), public_key_path, load_pem_public_key)
+    
+    def get_institute_key_type(self, institute_email):
+        """Signature algorithm of the institute's key pair, or None if it has no keys"""
+        public_key = self.load_public_key(institute_email)
+        return _key_algorithm(public_key) if public_key is not None else None
+    
+    def invalidate_cached_keys(self, institute_email):
+        """Drop cached keys for an institute after they are regenerated or re-imported"""
+        key_cache.invalidate(
+            self._cache_key(institute_email, "private"),
+            self._cache_key(institute_email, "public")
+        )
+    
     def sign_certificate_data(self, institute_email, certificate_data):
         """Sign certificate data with institute's private key"""
-        private_key_path, _ = self.get_institute_keys(institute_email)
+        private_key = self.load_private_key(institute_email)
         
-        if not os.path.exists(private_key_path):
+        if private_key is None:
             # Generate keys if they don't exist
             self.generate_institute_keys(institute_email)
+            private_key = self.load_private_key(institute_email)
         
-        # Load private key
-        with open(private_key_path, "rb") as f:
-            private_key = load_pem_private_key(f.read(), password=None)
-        
-        # Create data to sign
-        data_to_sign = json.dumps(certificate_data, sort_keys=True).encode('utf-8')
-        
-        # Sign the data
-        signature = private_key.sign(
-            data_to_sign,
-            padding.PSS(
-                mgf=padding.MGF1(hashes.SHA256()),
-                salt_length=padding.PSS.MAX_LENGTH
-            ),
-            hashes.SHA256()
-        )
-        
-        return base64.b64encode(signature).decode('utf-8')
+        return _sign_with_private_key(private_key, certificate_data)
     
     def verify_certificate_signature(self, institute_email, certificate_data, signature):
         """Verify certificate signature with institute's public key"""
-        _, public_key_path = self.get_institute_keys(institute_email)
-        
-        if not os.path.exists(public_key_path):
-            return False
-        
         try:
             # Load public key
-            with open(public_key_path, "rb") as f:
-                public_key = load_pem_public_key(f.read())
-            
-            # Create data to verify
-            data_to_verify = json.dumps(certificate_data, sort_keys=True).encode('utf-8')
-            
-            # Decode signature
-            signature_bytes = base64.b64decode(signature.encode('utf-8'))
-            
-            # Verify signature
-            public_key.verify(
-                signature_bytes,
-                data_to_verify,
-                padding.PSS(
-                    mgf=padding.MGF1(hashes.SHA256()),
-                    salt_length=padding.PSS.MAX_LENGTH
-                ),
-                hashes.SHA256()
-            )
+            public_key = self.load_public_key(institute_email)
+            if public_key is None:
+                return False
             
+            _verify_with_public_key(public_key, certificate_data, signature)
             return True
         except Exception as e:
             print(f"Signature verification failed: {e}")
             return False
     
+    def verify_many(self, items):
+        """Verify many certificate signatures at once.
+        
+        items is a sequence of (institute_email, certificate_data, signature).
+        Items are grouped by institute so each public key is loaded once.
+        Verification stays in-process: a check costs tens of microseconds, so a
+        process pool gains nothing at API batch sizes. Returns a list of
+        (is_valid, reason) in the same order as items."""
+        results = [None] * len(items)
+        groups = {}
+        for index, (institute_email, certificate_data, signature) in enumerate(items):
+            groups.setdefault(institute_email, []).append((index, certificate_data, signature))
+        
+        for institute_email, entries in groups.items():
+            public_key = self.load_public_key(institute_email)
+            if public_key is None:
+                for index, _, _ in entries:
+                    results[index] = (False, f"No public key found for {institute_email}")
+            else:
+                for index, is_valid, reason in _verify_group(public_key, entries):
+                    results[index] = (is_valid, reason)
+        
+        return results
+    
     def create_digital_certificate(self, institute_email, certificate_data):
         """Create a digital certificate with institute signature"""
         # Add timestamp and institute info
@@ -171,6 +338,18 @@ class DigitalCertificateAuth:
                 return f.read().decode('utf-8')
         return None
     
+    def import_institute_public_key(self, institute_email, public_key):
+        """Save an imported institute public key for verification"""
+        institute_dir = os.path.join(self.keys_dir, institute_email)
+        os.makedirs(institute_dir, exist_ok=True)
+        _, public_key_path = self.get_institute_keys(institute_email)
+        
+        with open(public_key_path, 'w') as f:
+            f.write(public_key)
+        
+        self.invalidate_cached_keys(institute_email)
+        return public_key_path
+    
     def export_institute_credentials(self, institute_email):
         """Export institute credentials for external verification"""
         institute_dir = os.path.join(self.keys_dir, institute_email)
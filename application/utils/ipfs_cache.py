@@ -0,0 +1,208 @@
+"""Content-addressed cache for certificate PDFs fetched from IPFS.
+
+A CID names immutable content, so a cached copy never goes stale. Files are
+kept in two tiers:
+- memory: the most recently used PDFs, up to IPFS_MEMORY_CACHE_MB,
+- disk: IPFS_CACHE_DIR/<cid>, up to IPFS_CACHE_MAX_MB, evicted least recently used.
+
+Downloaded bytes are checked against the CID before they are cached or
+returned (CIDv0 only; other CIDs are fetched every time).
+"""
+import os
+import threading
+from collections import OrderedDict
+
+from http_session import get_session
+from utils.cid_utils import compute_cid_v0, is_cid_v0
+
+IPFS_GATEWAY_URL = os.getenv("IPFS_GATEWAY_URL", "https://gateway.pinata.cloud/ipfs")
+IPFS_CACHE_DIR = os.getenv("IPFS_CACHE_DIR", "ipfs_cache")
+IPFS_CACHE_MAX_BYTES = int(float(os.getenv("IPFS_CACHE_MAX_MB", 256)) * 1024 * 1024)
+IPFS_MEMORY_CACHE_MAX_BYTES = int(float(os.getenv("IPFS_MEMORY_CACHE_MB", 32)) * 1024 * 1024)
+
+
+class IntegrityError(Exception):
+    """Content fetched for a CID does not hash to that CID"""
+
+
+class IpfsCache:
+    def __init__(self, cache_dir=IPFS_CACHE_DIR, max_bytes=IPFS_CACHE_MAX_BYTES,
+                 memory_max_bytes=IPFS_MEMORY_CACHE_MAX_BYTES, gateway_url=IPFS_GATEWAY_URL):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.memory_max_bytes = memory_max_bytes
+        self.gateway_url = gateway_url.rstrip("/")
+        self._lock = threading.RLock()
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk = OrderedDict()
+        self._disk_bytes = 0
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "integrity_failures": 0,
+            "bytes_downloaded": 0,
+        }
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_disk_index()
+
+    def _path(self, cid):
+        return os.path.join(self.cache_dir, cid)
+
+    def _load_disk_index(self):
+        """Rebuild the LRU order from a previous run; hits bump a file's mtime"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = self._path(name)
+            if name.endswith(".tmp") or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, name, stat.st_size))
+        for _, cid, size in sorted(entries):
+            self._disk[cid] = size
+            self._disk_bytes += size
+        self._evict_disk()
+
+    # --- Memory tier ---
+    def _remember(self, cid, content):
+        if len(content) > self.memory_max_bytes:
+            return
+        if cid in self._memory:
+            self._memory.move_to_end(cid)
+            return
+        self._memory[cid] = content
+        self._memory_bytes += len(content)
+        while self._memory_bytes > self.memory_max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    # --- Disk tier ---
+    def _evict_disk(self):
+        while self._disk_bytes > self.max_bytes and self._disk:
+            cid, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self.stats["evictions"] += 1
+            try:
+                os.remove(self._path(cid))
+            except FileNotFoundError:
+                pass
+
+    def _store(self, cid, content):
+        if len(content) > self.max_bytes:
+            return
+        tmp_path = f"{self._path(cid)}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, self._path(cid))
+        with self._lock:
+            self._disk_bytes += len(content) - self._disk.get(cid, 0)
+            self._disk[cid] = len(content)
+            self._disk.move_to_end(cid)
+            self._evict_disk()
+
+    def _read_disk(self, cid):
+        with self._lock:
+            if cid not in self._disk:
+                return None
+            self._disk.move_to_end(cid)
+        try:
+            with open(self._path(cid), "rb") as f:
+                content = f.read()
+            os.utime(self._path(cid))
+        except FileNotFoundError:
+            with self._lock:
+                self._disk_bytes -= self._disk.pop(cid, 0)
+            return None
+        return content
+
+    def _download(self, cid):
+        response = get_session("ipfs-gateway").get(f"{self.gateway_url}/{cid}")
+        response.raise_for_status()
+        content = response.content
+        with self._lock:
+            self.stats["bytes_downloaded"] += len(content)
+        if is_cid_v0(cid) and compute_cid_v0(content) != cid:
+            with self._lock:
+                self.stats["integrity_failures"] += 1
+            raise IntegrityError(f"Content downloaded for {cid} does not match its CID")
+        return content
+
+    def get(self, cid, record_stats=True):
+        """PDF bytes for a CID from memory, disk or the gateway, in that order.
+
+        Pass record_stats=False for repeat reads of a fetch that was already counted."""
+        with self._lock:
+            content = self._memory.get(cid)
+            if content is not None:
+                self._memory.move_to_end(cid)
+                if record_stats:
+                    self.stats["memory_hits"] += 1
+                return content
+
+        content = self._read_disk(cid)
+        if content is not None:
+            with self._lock:
+                if record_stats:
+                    self.stats["disk_hits"] += 1
+                self._remember(cid, content)
+            return content
+
+        with self._lock:
+            if record_stats:
+                self.stats["misses"] += 1
+        content = self._download(cid)
+        if is_cid_v0(cid):
+            self._store(cid, content)
+            with self._lock:
+                self._remember(cid, content)
+        print(f"Downloaded {cid} from the IPFS gateway (cache hit rate {self.get_stats()['hit_rate']:.0%})")
+        return content
+
+    def local_path(self, cid, record_stats=True):
+        """Path of the cached file for cid, fetching it first if needed; None if it cannot be kept on disk"""
+        with self._lock:
+            if cid in self._disk:
+                self._disk.move_to_end(cid)
+                if record_stats:
+                    self.stats["disk_hits"] += 1
+                return self._path(cid)
+        self.get(cid, record_stats)
+        with self._lock:
+            return self._path(cid) if cid in self._disk else None
+
+    def put(self, cid, content):
+        """Seed the cache with content that is known locally, e.g. right after upload"""
+        if not is_cid_v0(cid) or compute_cid_v0(content) != cid:
+            return False
+        self._store(cid, content)
+        with self._lock:
+            self._remember(cid, content)
+        return True
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["misses"]
+            hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+            return {
+                **self.stats,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+            }
+
+
+_ipfs_cache = None
+_ipfs_cache_lock = threading.Lock()
+
+
+def get_ipfs_cache():
+    """Process-wide IPFS PDF cache"""
+    global _ipfs_cache
+    with _ipfs_cache_lock:
+        if _ipfs_cache is None:
+            _ipfs_cache = IpfsCache()
+        return _ipfs_cache
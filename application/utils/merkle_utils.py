@@ -0,0 +1,108 @@
+"""Merkle trees over certificate IDs for anchoring a whole batch with one root.
+
+The hashing matches Certification.sol: leaves are sha256(0x00 || certificate_id)
+and inner nodes are sha256(0x01 || min(a, b) || max(a, b)). Because sibling
+pairs are sorted, a proof is just the list of sibling hashes. An odd node at
+the end of a level is carried up unchanged instead of being paired with itself.
+"""
+import hashlib
+import json
+
+PROOF_VERSION = 1
+
+
+def leaf_hash(certificate_id):
+    return hashlib.sha256(b"\x00" + certificate_id.encode("utf-8")).digest()
+
+
+def node_hash(left, right):
+    first, second = sorted((left, right))
+    return hashlib.sha256(b"\x01" + first + second).digest()
+
+
+def build_merkle_tree(certificate_ids):
+    """Returns the tree as a list of levels, from the leaves up to [root]"""
+    if not certificate_ids:
+        raise ValueError("Cannot build a Merkle tree without certificates")
+
+    levels = [[leaf_hash(certificate_id) for certificate_id in certificate_ids]]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def merkle_proof(levels, index):
+    """Sibling hashes from leaf index up to the root"""
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append(level[sibling])
+        index //= 2
+    return proof
+
+
+def compute_root(certificate_id, proof):
+    computed = leaf_hash(certificate_id)
+    for sibling in proof:
+        computed = node_hash(computed, sibling)
+    return computed
+
+
+def to_hex(value):
+    return "0x" + value.hex()
+
+
+def from_hex(value):
+    return bytes.fromhex(value[2:] if value.startswith("0x") else value)
+
+
+def build_proof_documents(certificates, institute_email):
+    """Builds the Merkle root and one inclusion proof document per certificate.
+
+    certificates are dicts with uid, candidate_name, course_name, org_name,
+    ipfs_hash, certificate_id and digital_signature. Leaves are sorted by
+    certificate_id, so the same certificates always give the same root no matter
+    in which order they were signed. Returns (root, documents) where documents
+    maps certificate_id to a JSON-serialisable dict."""
+    certificates = sorted(certificates, key=lambda certificate: certificate["certificate_id"])
+    certificate_ids = [certificate["certificate_id"] for certificate in certificates]
+    levels = build_merkle_tree(certificate_ids)
+    root = levels[-1][0]
+
+    documents = {}
+    for index, certificate in enumerate(certificates):
+        documents[certificate["certificate_id"]] = {
+            "version": PROOF_VERSION,
+            "certificate": {
+                "uid": certificate["uid"],
+                "candidate_name": certificate["candidate_name"],
+                "course_name": certificate["course_name"],
+                "org_name": certificate["org_name"],
+                "ipfs_hash": certificate["ipfs_hash"],
+                "certificate_id": certificate["certificate_id"],
+            },
+            "institute_email": institute_email,
+            "digital_signature": certificate["digital_signature"],
+            "merkle_root": to_hex(root),
+            "proof": [to_hex(sibling) for sibling in merkle_proof(levels, index)],
+        }
+    return root, documents
+
+
+def load_proof_document(data):
+    """Parses a proof document from JSON text or bytes"""
+    document = json.loads(data)
+    if document.get("version") != PROOF_VERSION:
+        raise ValueError("Unsupported Merkle proof version")
+    return document
+
+
+def verify_proof_document(document):
+    """True if the document's certificate ID is included under its Merkle root"""
+    proof = [from_hex(sibling) for sibling in document["proof"]]
+    return compute_root(document["certificate"]["certificate_id"], proof) == from_hex(document["merkle_root"])
@@ -0,0 +1,84 @@
+"""Machine-readable certificate payload embedded in generated PDFs.
+
+generate_certificate writes the certificate fields and ID as JSON into the
+PDF's XMP metadata packet (stored uncompressed), and optionally draws them
+as a QR code.
+
+Verifiers read the fields from the payload instead of extracting the
+printed text, which is only done for PDFs that have no payload. The payload
+is a claim, not proof: anyone can edit the printed text and keep the
+payload, or paste a genuine payload into another file. The certificate ID
+recomputed from its fields is therefore looked up on chain and the chain's
+fields are what verifiers show, and a file issued with a CIDv0 that is not
+byte-identical to the issued PDF is reported as modified.
+
+The institute's signature cannot be embedded: it signs the PDF's own IPFS
+hash, which is only known after the PDF has been written. It stays on chain.
+"""
+import json
+import re
+from xml.sax.saxutils import escape, unescape
+
+PAYLOAD_VERSION = 1
+PAYLOAD_FIELDS = ("uid", "candidate_name", "course_name", "org_name")
+XMP_NAMESPACE = "https://blockcert.local/ns/certificate/1.0/"
+
+PAYLOAD_PATTERN = re.compile(rb"<bcert:payload>(.*?)</bcert:payload>", re.DOTALL)
+
+class PayloadMismatchError(ValueError):
+    """The PDF's embedded payload names a certificate ID that does not match its fields"""
+
+
+XMP_TEMPLATE = """<?xpacket begin="﻿" id="W5M0MpCehiHzreSzNTczkc9d"?>
+<x:xmpmeta xmlns:x="adobe:ns:meta/">
+  <rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">
+    <rdf:Description rdf:about="" xmlns:bcert="{namespace}">
+      <bcert:payload>{payload}</bcert:payload>
+    </rdf:Description>
+  </rdf:RDF>
+</x:xmpmeta>
+<?xpacket end="r"?>"""
+
+
+def build_payload(certificate_id, uid, candidate_name, course_name, org_name, institute_email=None):
+    payload = {
+        "version": PAYLOAD_VERSION,
+        "certificate_id": certificate_id,
+        "uid": str(uid),
+        "candidate_name": candidate_name,
+        "course_name": course_name,
+        "org_name": org_name,
+    }
+    if institute_email:
+        payload["institute_email"] = institute_email
+    return payload
+
+
+def payload_json(payload):
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def xmp_packet(payload):
+    """UTF-8 XMP packet holding the payload; bytes so reportlab writes it unchanged"""
+    return XMP_TEMPLATE.format(namespace=XMP_NAMESPACE, payload=escape(payload_json(payload))).encode("utf-8")
+
+
+def payload_fields(payload):
+    """(uid, candidate_name, course_name, org_name) from a payload"""
+    return tuple(payload[field] for field in PAYLOAD_FIELDS)
+
+
+def read_certificate_payload(pdf_bytes):
+    """The embedded payload dict, or None for PDFs generated before payloads were added.
+
+    Untrusted on its own; see the module docstring."""
+    match = PAYLOAD_PATTERN.search(pdf_bytes)
+    if not match:
+        return None
+    try:
+        payload = json.loads(unescape(match.group(1).decode("utf-8")))
+    except (UnicodeDecodeError, ValueError):
+        return None
+    if not isinstance(payload, dict) or not all(isinstance(payload.get(field), str) for field in PAYLOAD_FIELDS):
+        return None
+    return payload
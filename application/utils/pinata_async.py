@@ -0,0 +1,313 @@
+"""Asyncio Pinata client for bulk IPFS work.
+
+Offers the same operations as pinata_utils (upload, list, metadata, unpin)
+and adds three things for bulk use:
+- a semaphore that bounds how many requests are in flight,
+- a token bucket that paces requests to Pinata's rate limit and backs off on
+  429 responses (honouring Retry-After),
+- multipart uploads that stream the file from disk instead of reading it
+  into memory.
+
+PINATA_API_URL can point the client at a local mock server.
+
+    async with AsyncPinataClient() as pinata:
+        hashes = await pinata.upload_many(paths, user_email)
+
+Synchronous code uses PinataRunner (batch issuance), which keeps a client on
+a background event loop and hands back concurrent.futures futures, or the
+blocking delete_many_pinata_files (bulk revocation on the institute page).
+
+Pins changed through the client drop the matching cached pin list pages of
+pinata_utils after upload_many/delete_many and when the client is closed.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PINATA_API_URL = os.getenv("PINATA_API_URL", "https://api.pinata.cloud")
+PINATA_MAX_CONCURRENCY = int(os.getenv("PINATA_MAX_CONCURRENCY", 16))
+# Pinata's default plan allows 180 requests per minute
+PINATA_RATE_PER_SECOND = float(os.getenv("PINATA_RATE_PER_SECOND", 3))
+PINATA_RATE_BURST = int(os.getenv("PINATA_RATE_BURST", 10))
+PINATA_MAX_RETRIES = int(os.getenv("PINATA_MAX_RETRIES", 5))
+PINATA_TIMEOUT = float(os.getenv("PINATA_TIMEOUT", 60))
+
+
+def _invalidate_pin_lists(user_emails):
+    """Drops cached pin list pages of these users; None stands for a pin whose owner is unknown"""
+    # Imported here: pinata_utils pulls in streamlit, which the CLI paths do not need otherwise
+    from utils.pinata_utils import invalidate_pinata_files
+
+    if None in user_emails:
+        invalidate_pinata_files()
+    else:
+        for user_email in user_emails:
+            invalidate_pinata_files(user_email)
+
+
+class TokenBucket:
+    """Async token bucket; pause() empties it for a while after the server pushes back"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now):
+        if now < self._paused_until:
+            self._updated = now
+            return
+        elapsed = now - max(self._updated, self._paused_until)
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                else:
+                    delay = (1 - self._tokens) / self.rate
+                await asyncio.sleep(delay)
+
+    def pause(self, seconds):
+        self._tokens = 0
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+def _retry_after(response, attempt):
+    value = response.headers.get("Retry-After")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return min(2 ** attempt, 30)
+
+
+class AsyncPinataClient:
+    def __init__(
+        self,
+        api_key=None,
+        api_secret=None,
+        base_url=PINATA_API_URL,
+        max_concurrency=PINATA_MAX_CONCURRENCY,
+        rate_per_second=PINATA_RATE_PER_SECOND,
+        burst=PINATA_RATE_BURST,
+        max_retries=PINATA_MAX_RETRIES,
+        transport=None,
+    ):
+        self.headers = {
+            "pinata_api_key": api_key or os.getenv("PINATA_API_KEY") or "",
+            "pinata_secret_api_key": api_secret or os.getenv("PINATA_API_SECRET") or "",
+        }
+        self.base_url = base_url
+        self.max_retries = max_retries
+        self._max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._bucket = TokenBucket(rate_per_second, burst)
+        self._transport = transport
+        self._client = None
+        # Owners of pins changed by this client, for pin list invalidation
+        self._changed_users = set()
+
+    async def __aenter__(self):
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=self.headers,
+            timeout=PINATA_TIMEOUT,
+            limits=httpx.Limits(max_connections=self._max_concurrency,
+                                max_keepalive_connections=self._max_concurrency),
+            transport=self._transport,
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._client.aclose()
+        self._client = None
+        self.invalidate_pin_lists()
+
+    def invalidate_pin_lists(self):
+        """Drops cached pin list pages that pins changed by this client have made stale"""
+        changed, self._changed_users = self._changed_users, set()
+        if changed:
+            _invalidate_pin_lists(changed)
+
+    async def _request(self, method, path, **kwargs):
+        """Sends a request within the concurrency and rate limits, retrying 429s and 5xx"""
+        for attempt in range(self.max_retries + 1):
+            async with self._semaphore:
+                await self._bucket.acquire()
+                try:
+                    response = await self._client.request(method, path, **kwargs)
+                except httpx.TransportError:
+                    if attempt == self.max_retries:
+                        raise
+                    await asyncio.sleep(min(2 ** attempt, 30))
+                    continue
+
+            if response.status_code == 429:
+                self._bucket.pause(_retry_after(response, attempt))
+            elif response.status_code >= 500 and attempt < self.max_retries:
+                await asyncio.sleep(min(2 ** attempt, 30))
+            else:
+                return response
+        return response
+
+    async def upload_file(self, file_path, user_email):
+        """Pins a file and returns its IPFS hash, or None on failure"""
+        metadata = {
+            "name": os.path.basename(file_path),
+            "keyvalues": {
+                "user_email": str(user_email)
+            }
+        }
+        with open(file_path, "rb") as file:
+            # httpx streams file objects in chunks and rewinds them on retry
+            files = {"file": (os.path.basename(file_path), file),
+                     "pinataMetadata": (None, json.dumps(metadata), "application/json")}
+            response = await self._request("POST", "/pinning/pinFileToIPFS", files=files)
+
+        if response.status_code == 200:
+            self._changed_users.add(str(user_email))
+            return response.json().get("IpfsHash")
+        print(f"Failed to upload {file_path} to Pinata: {response.status_code}")
+        return None
+
+    async def upload_bytes(self, content, file_name, user_email, keyvalues=None):
+        """Pins in-memory content and returns its IPFS hash, or None on failure"""
+        metadata = {
+            "name": file_name,
+            "keyvalues": keyvalues if keyvalues is not None else {
+                "user_email": str(user_email)
+            }
+        }
+        files = {"file": (file_name, content),
+                 "pinataMetadata": (None, json.dumps(metadata), "application/json")}
+        response = await self._request("POST", "/pinning/pinFileToIPFS", files=files)
+        if response.status_code == 200:
+            self._changed_users.add(str(user_email))
+            return response.json().get("IpfsHash")
+        print(f"Failed to upload {file_name} to Pinata: {response.status_code}")
+        return None
+
+    async def update_keyvalues(self, ipfs_hash, keyvalues):
+        """Adds or replaces keyvalues in the metadata of an existing pin"""
+        response = await self._request("PUT", "/pinning/hashMetadata",
+                                       json={"ipfsPinHash": ipfs_hash, "keyvalues": keyvalues})
+        if response.status_code != 200:
+            return False
+        self._changed_users.add(keyvalues.get("user_email"))
+        return True
+
+    async def iter_files(self, user_email, page_limit=100):
+        """Pages through the user's pins, filtered on the server by the user_email keyvalue"""
+        page_offset = 0
+        while True:
+            params = {
+                "status": "pinned",
+                "pageLimit": page_limit,
+                "pageOffset": page_offset,
+                "metadata[keyvalues]": json.dumps({"user_email": {"value": str(user_email), "op": "eq"}}),
+            }
+            response = await self._request("GET", "/data/pinList", params=params)
+            if response.status_code != 200:
+                print("Failed to fetch files from Pinata:", response.text)
+                return
+            rows = response.json().get("rows", [])
+            for row in rows:
+                yield row
+            if len(rows) < page_limit:
+                return
+            page_offset += len(rows)
+
+    async def get_files(self, user_email):
+        return [row async for row in self.iter_files(user_email)]
+
+    async def get_metadata(self, ipfs_hash):
+        response = await self._request("GET", "/data/pinList", params={"hashContains": ipfs_hash})
+        if response.status_code != 200:
+            print("Failed to fetch metadata:", response.text)
+            return None
+        data = response.json()
+        if data.get("count", 0) > 0:
+            return data["rows"][0].get("metadata", {})
+        return None
+
+    async def delete_file(self, ipfs_hash):
+        response = await self._request("DELETE", f"/pinning/unpin/{ipfs_hash}")
+        if response.status_code != 200:
+            return False
+        self._changed_users.add(None)
+        return True
+
+    async def upload_many(self, file_paths, user_email):
+        """IPFS hashes in the order of file_paths (None where the upload failed)"""
+        hashes = await asyncio.gather(*(self.upload_file(path, user_email) for path in file_paths))
+        self.invalidate_pin_lists()
+        return hashes
+
+    async def delete_many(self, ipfs_hashes):
+        """{ipfs_hash: unpinned} for every hash"""
+        results = await asyncio.gather(*(self.delete_file(ipfs_hash) for ipfs_hash in ipfs_hashes))
+        self.invalidate_pin_lists()
+        return dict(zip(ipfs_hashes, results))
+
+
+class PinataRunner:
+    """An AsyncPinataClient on a background event loop, for use from synchronous code.
+
+        with PinataRunner() as pinata:
+            future = pinata.submit(pinata.client.upload_file(path, user_email))
+
+    submit() returns a concurrent.futures.Future, so uploads can be waited on
+    together with thread and process pool futures.
+    """
+
+    def __init__(self, **client_kwargs):
+        self.client = AsyncPinataClient(**client_kwargs)
+        self._loop = None
+        self._thread = None
+
+    def __enter__(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="pinata-loop", daemon=True)
+        self._thread.start()
+        self.run(self.client.__aenter__())
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.run(self.client.__aexit__(exc_type, exc, tb))
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+
+    def submit(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    def run(self, coroutine):
+        """Runs a coroutine on the client's loop and waits for its result"""
+        return self.submit(coroutine).result()
+
+
+def delete_many_pinata_files(ipfs_hashes):
+    """Blocking bulk unpin for callers outside an event loop: {ipfs_hash: unpinned}"""
+    async def run():
+        async with AsyncPinataClient() as pinata:
+            return await pinata.delete_many(ipfs_hashes)
+    return asyncio.run(run())
@@ -1,62 +1,136 @@
 import json
 import os
+import threading
+import time
 
-import requests
 import streamlit as st
 from dotenv import load_dotenv
+from http_session import get_session
 
 load_dotenv()
 api_key = os.getenv("PINATA_API_KEY")
 api_secret = os.getenv("PINATA_API_SECRET")
 
+PINATA_PAGE_LIMIT = int(os.getenv("PINATA_PAGE_LIMIT", 50))
+PINATA_LIST_TTL = float(os.getenv("PINATA_LIST_TTL", 30))
+
+# (user_email, page, page_limit) -> (fetched_at, files, has_more)
+_pin_list_cache = {}
+_pin_list_lock = threading.Lock()
+
 
 def upload_to_pinata(file_path, user_email):
     """Uploads a file to Pinata and returns IPFS hash."""
+    with open(file_path, "rb") as file:
+        return upload_bytes_to_pinata(file.read(), os.path.basename(file_path), user_email)
+
+
+def upload_bytes_to_pinata(content, file_name, user_email):
+    """Uploads in-memory file content to Pinata and returns IPFS hash."""
     pinata_api_url = "https://api.pinata.cloud/pinning/pinFileToIPFS"
     headers = {
         "pinata_api_key": api_key,
         "pinata_secret_api_key": api_secret,
     }
     metadata = {
-        "name": f"{os.path.basename(file_path)}",
+        "name": file_name,
         "keyvalues": {
             "user_email": str(user_email)
         }
     }
 
-    with open(file_path, "rb") as file:
-        files = {"file": (file.name, file), "pinataMetadata": (None, json.dumps(metadata), "application/json")}
-        response = requests.post(pinata_api_url, headers=headers, files=files)
-        result = response.json()
+    files = {"file": (file_name, content), "pinataMetadata": (None, json.dumps(metadata), "application/json")}
+    response = get_session("pinata").post(pinata_api_url, headers=headers, files=files)
+    result = response.json()
 
-        if "IpfsHash" in result:
-            return result["IpfsHash"]
-        else:
-            st.error("Failed to upload to Pinata.")
-            return None
+    if "IpfsHash" in result:
+        invalidate_pinata_files(user_email)
+        return result["IpfsHash"]
+    else:
+        st.error("Failed to upload to Pinata.")
+        return None
 
 
-def get_pinata_files(user_email):
+def _user_files_params(user_email, page_limit, page_offset):
+    """pinList query for one page of a user's pins, filtered by Pinata on the server"""
+    return {
+        "status": "pinned",
+        "pageLimit": page_limit,
+        "pageOffset": page_offset,
+        "metadata[keyvalues]": json.dumps({"user_email": {"value": str(user_email), "op": "eq"}}),
+    }
+
+
+def get_pinata_files_page(user_email, page, page_limit=PINATA_PAGE_LIMIT):
+    """Returns (files, has_more) for one page of the user's pins.
+
+    Pages are cached per user for PINATA_LIST_TTL seconds; call
+    invalidate_pinata_files after uploading or unpinning."""
+    cache_key = (str(user_email), page, page_limit)
+    with _pin_list_lock:
+        cached = _pin_list_cache.get(cache_key)
+        if cached is not None and time.monotonic() - cached[0] < PINATA_LIST_TTL:
+            return cached[1], cached[2]
+
     url = "https://api.pinata.cloud/data/pinList"
     headers = {
         "pinata_api_key": api_key,
         "pinata_secret_api_key": api_secret
     }
-    params = {
-        "status": "pinned",
-        "pageLimit": 100  # Adjust as needed
-    }
-    response = requests.get(url, headers=headers, params=params)
-    if response.status_code == 200:
-        files = response.json().get("rows", [])
-        if files:
-            return [
-                file for file in files
-                if file.get("metadata", {}).get("keyvalues", {}).get("user_email") == str(user_email)
-            ]
-    else:
+    response = get_session("pinata").get(url, headers=headers, params=_user_files_params(user_email, page_limit, page * page_limit))
+    if response.status_code != 200:
         st.error("Failed to fetch files from Pinata.")
-        return []
+        return [], False
+
+    files = response.json().get("rows", [])
+    has_more = len(files) == page_limit
+    with _pin_list_lock:
+        _pin_list_cache[cache_key] = (time.monotonic(), files, has_more)
+    return files, has_more
+
+
+def iter_pinata_files(user_email, page_limit=PINATA_PAGE_LIMIT):
+    """Streams every pin uploaded by user_email, one pinList page at a time.
+
+    Pages are cached separately, so a pin added or removed between two page
+    fetches shifts the offsets and can show up on two pages; each pin is
+    yielded only once."""
+    seen = set()
+    page = 0
+    while True:
+        files, has_more = get_pinata_files_page(user_email, page, page_limit)
+        for file in files:
+            if file["ipfs_pin_hash"] not in seen:
+                seen.add(file["ipfs_pin_hash"])
+                yield file
+        if not has_more:
+            return
+        page += 1
+
+
+def get_pinata_files_pages(user_email, pages, page_limit=PINATA_PAGE_LIMIT):
+    """(files, has_more) for the first pages pages of the user's pins, each pin listed once"""
+    files, seen, has_more = [], set(), False
+    for page in range(pages):
+        page_files, has_more = get_pinata_files_page(user_email, page, page_limit)
+        for file in page_files:
+            if file["ipfs_pin_hash"] not in seen:
+                seen.add(file["ipfs_pin_hash"])
+                files.append(file)
+        if not has_more:
+            break
+    return files, has_more
+
+
+def get_pinata_files(user_email):
+    return list(iter_pinata_files(user_email))
+
+
+def invalidate_pinata_files(user_email=None):
+    """Drops the cached pin list pages of one user, or of every user when user_email is None"""
+    with _pin_list_lock:
+        for cache_key in [key for key in _pin_list_cache if user_email is None or key[0] == str(user_email)]:
+            del _pin_list_cache[cache_key]
 
 
 def delete_pinata_file(ipfs_hash):
@@ -65,7 +139,7 @@ def delete_pinata_file(ipfs_hash):
         "pinata_api_key": api_key,
         "pinata_secret_api_key": api_secret
     }
-    response = requests.delete(url, headers=headers)
+    response = get_session("pinata").delete(url, headers=headers)
     return response.status_code == 200
 
 
@@ -79,7 +153,7 @@ def get_metadata_from_pinata(ipfs_hash):
         "hashContains": ipfs_hash
     }
 
-    response = requests.get(url, headers=headers, params=params)
+    response = get_session("pinata").get(url, headers=headers, params=params)
 
     if response.status_code == 200:
         data = response.json()
@@ -91,3 +165,27 @@ def get_metadata_from_pinata(ipfs_hash):
     else:
         print("Failed to fetch metadata:", response.text)
         return None
+
+
+def get_metadata_by_certificate_id(certificate_id):
+    """Metadata of the pinned PDF whose keyvalues name certificate_id, or None.
+
+    batch_issue sets certificate_id, merkle_root and merkle_proof_cid on the
+    PDFs of anchored batches."""
+    url = "https://api.pinata.cloud/data/pinList"
+    headers = {
+        "pinata_api_key": api_key,
+        "pinata_secret_api_key": api_secret
+    }
+    params = {
+        "status": "pinned",
+        "pageLimit": 1,
+        "metadata[keyvalues]": json.dumps({"certificate_id": {"value": certificate_id, "op": "eq"}}),
+    }
+
+    response = get_session("pinata").get(url, headers=headers, params=params)
+    if response.status_code != 200:
+        print("Failed to fetch metadata:", response.text)
+        return None
+    rows = response.json().get("rows", [])
+    return rows[0].get("metadata", {}) if rows else None
@@ -1,18 +1,37 @@
 import base64
+import functools
 import json
 import os
 from io import BytesIO
 
-import requests
 import streamlit as st
-from PIL import Image
-from connection import contract
+from pdf_server import cid_url, public_url_for, register_pdf, start_pdf_server
+from utils.cert_utils import get_certificate_status
+from utils.ipfs_cache import get_ipfs_cache
 from utils.pinata_utils import get_metadata_from_pinata
 
-def displayPDF(file):
-    # Opening file from file path
-    with open(file, "rb") as f:
-        base64_pdf = base64.b64encode(f.read()).decode('utf-8')
+def displayPDF(file=None, cid=None):
+    # Stream the PDF from the PDF server (pdf_server.py) so the browser can fetch
+    # it with range requests, when this browser can reach that server; file is
+    # the PDF bytes or a path to read them from
+    if cid is not None:
+        # CIDs are immutable, so repeat views are served from the local cache. Fetch
+        # (and check) the PDF now so errors surface here rather than in the iframe
+        get_ipfs_cache().local_path(cid)
+
+    base_url = public_url_for(st.context.url)
+    if base_url and start_pdf_server():
+        if cid is not None:
+            pdf_url = cid_url(cid, base_url)
+        else:
+            pdf_url = register_pdf(_read_pdf(file), base_url)
+        st.markdown(f'<iframe src="{pdf_url}" width="700" height="1000" type="application/pdf"></iframe>',
+                    unsafe_allow_html=True)
+        return
+
+    # Server unreachable for this browser or unavailable: embed the PDF as a data URI
+    pdf_bytes = get_ipfs_cache().get(cid, record_stats=False) if cid is not None else _read_pdf(file)
+    base64_pdf = base64.b64encode(pdf_bytes).decode('utf-8')
 
     # Embedding PDF in HTML
     pdf_display = F'<iframe src="data:application/pdf;base64,{base64_pdf}" width="700" height="1000" type="application/pdf"></iframe>'
@@ -21,21 +40,21 @@ def displayPDF(file):
     st.markdown(pdf_display, unsafe_allow_html=True)
 
 
+def _read_pdf(file):
+    if isinstance(file, (bytes, bytearray)):
+        return file
+    with open(file, "rb") as f:
+        return f.read()
+
+
 def view_certificate(certificate_id, user_email=None):
-    # Smart Contract Call
-    result = contract.functions.getCertificate(certificate_id).call()
-    ipfs_hash = result[4]
+    certificate, _, _ = get_certificate_status(certificate_id)
+    ipfs_hash = certificate[4]
     metadata = get_metadata_from_pinata(ipfs_hash)
     if user_email is not None and metadata and metadata.get("keyvalues", {}).get("user_email") != str(user_email):
         raise Exception("User email does not match")
 
-    pinata_gateway_base_url = 'https://gateway.pinata.cloud/ipfs'
-    content_url = f"{pinata_gateway_base_url}/{ipfs_hash}"
-    response = requests.get(content_url)
-    with open("temp.pdf", 'wb') as pdf_file:
-        pdf_file.write(response.content)
-    displayPDF("temp.pdf")
-    os.remove("temp.pdf")
+    displayPDF(cid=ipfs_hash)
 
 
 def hide_icons():
@@ -76,7 +95,11 @@ def remove_whitespaces():
         </style>""", unsafe_allow_html=True)
 
 
+@functools.lru_cache(maxsize=None)
 def get_image_base64(img_path):
+    """Static images are encoded once per process, not on every rerun"""
+    from PIL import Image
+
     img = Image.open(img_path)
     buffered = BytesIO()
     img.save(buffered, format="PNG")
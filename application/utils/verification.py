@@ -0,0 +1,272 @@
+"""Certificate verification shared by the Streamlit verifier page and the HTTP API.
+
+Each check returns a plain dict so it can be rendered as widgets or as JSON:
+
+    {
+        "certificate_id": "...",
+        "status": "valid" | "anchored" | "revoked" | "invalid_signature" | "invalid_proof"
+                  | "not_found" | "modified" | "unreadable",
+        "valid": bool,
+        "revoked": bool,
+        "signature_valid": bool or None (not checked),
+        "file_match": bool or None (PDF checks only),
+        "certificate": {...} or None,
+        "institute": {...} or None,
+        "merkle_root": "0x..." or None (certificates from an anchored batch),
+    }
+
+Certificates issued with batch_issue --anchor are not stored on chain one by
+one. They are "anchored" (valid) when the Merkle proof linked from their PDF's
+pin metadata leads to a root anchored by the same institute, and
+"invalid_proof" when it does not.
+"""
+from utils.cert_utils import (compute_certificate_id, extract_certificate, get_anchored_certificate_status,
+                              get_certificate_id_ipfs_hash, get_certificate_status, get_certificates_status,
+                              get_institute_info, get_proof_document)
+from utils.cid_utils import compute_cid_v0, is_cid_v0
+from utils.crypto_utils import DigitalCertificateAuth
+from utils.merkle_utils import from_hex, verify_proof_document
+from utils.pdf_payload import PayloadMismatchError
+
+crypto_auth = DigitalCertificateAuth()
+
+
+def _certificate_dict(cert_data):
+    return {
+        "uid": cert_data[0],
+        "candidate_name": cert_data[1],
+        "course_name": cert_data[2],
+        "org_name": cert_data[3],
+        "ipfs_hash": cert_data[4],
+        "institute_email": cert_data[5],
+        "issued_at": cert_data[7],
+    }
+
+
+def _institute_dict(institute_email, institute_info):
+    if not institute_info:
+        return None
+    return {
+        "email": institute_email,
+        "name": institute_info[0],
+        "verified": bool(institute_info[2]),
+        "registered_at": institute_info[3],
+    }
+
+
+def _signed_data(certificate_id, cert_data):
+    """The fields the institute signed at issuance"""
+    return {
+        "uid": cert_data[0],
+        "candidate_name": cert_data[1],
+        "course_name": cert_data[2],
+        "org_name": cert_data[3],
+        "ipfs_hash": cert_data[4],
+        "certificate_id": certificate_id
+    }
+
+
+def _not_found(certificate_id, certificate=None):
+    return {
+        "certificate_id": certificate_id,
+        "status": "not_found",
+        "valid": False,
+        "revoked": False,
+        "signature_valid": None,
+        "file_match": None,
+        "certificate": certificate,
+        "institute": None,
+        "merkle_root": None,
+    }
+
+
+def _result(certificate_id, status, signature_valid):
+    """Builds the result for a certificate found on chain; signature_valid is None for revoked ones"""
+    cert_data, is_revoked, institute_info = status
+    if is_revoked:
+        outcome = "revoked"
+    else:
+        outcome = "valid" if signature_valid else "invalid_signature"
+    return {
+        "certificate_id": certificate_id,
+        "status": outcome,
+        "valid": outcome == "valid",
+        "revoked": bool(is_revoked),
+        "signature_valid": signature_valid,
+        "file_match": None,
+        "certificate": _certificate_dict(cert_data),
+        "institute": _institute_dict(cert_data[5], institute_info),
+        "merkle_root": None,
+    }
+
+
+def find_anchored_proof(certificate_id):
+    """Proof document linked from the pin metadata of an anchored certificate's PDF, or None"""
+    from utils.pinata_utils import get_metadata_by_certificate_id
+
+    try:
+        metadata = get_metadata_by_certificate_id(certificate_id)
+        merkle_proof_cid = ((metadata or {}).get("keyvalues") or {}).get("merkle_proof_cid")
+        return get_proof_document(merkle_proof_cid) if merkle_proof_cid else None
+    except Exception as e:
+        print(f"Could not load the Merkle proof of {certificate_id}: {e}")
+        return None
+
+
+def verify_anchored_certificate(certificate_id, document):
+    """Checks a certificate from an anchored batch: its proof, the anchored root, revocation and the signature"""
+    certificate = document["certificate"]
+    result = _not_found(certificate_id)
+    result["merkle_root"] = document["merkle_root"]
+    fields_id = compute_certificate_id(certificate["uid"], certificate["candidate_name"],
+                                       certificate["course_name"], certificate["org_name"])
+    if certificate["certificate_id"] != certificate_id or fields_id != certificate_id \
+            or not verify_proof_document(document):
+        result["status"] = "invalid_proof"
+        return result
+
+    # The anchor and revocation reads go out together in one batched request
+    anchor, is_revoked = get_anchored_certificate_status(from_hex(document["merkle_root"]), certificate_id)
+    if anchor is None or anchor[0] != document["institute_email"]:
+        result["status"] = "invalid_proof"
+        return result
+
+    institute_email = anchor[0]
+    signature_valid = None
+    if is_revoked:
+        outcome = "revoked"
+    else:
+        signature_valid = crypto_auth.verify_certificate_signature(
+            institute_email, certificate, document["digital_signature"]
+        )
+        outcome = "anchored" if signature_valid else "invalid_signature"
+
+    try:
+        institute_info = get_institute_info(institute_email)
+    except Exception as e:
+        print(f"Could not read institute {institute_email}: {e}")
+        institute_info = None
+
+    result.update({
+        "status": outcome,
+        "valid": outcome == "anchored",
+        "revoked": bool(is_revoked),
+        "signature_valid": signature_valid,
+        "certificate": {
+            "uid": certificate["uid"],
+            "candidate_name": certificate["candidate_name"],
+            "course_name": certificate["course_name"],
+            "org_name": certificate["org_name"],
+            "ipfs_hash": certificate["ipfs_hash"],
+            "institute_email": institute_email,
+            "issued_at": anchor[2],
+        },
+        "institute": _institute_dict(institute_email, institute_info),
+    })
+    return result
+
+
+def _verify_unstored(certificate_id):
+    """Result for an ID that is not stored on chain: anchored if its pinned proof checks out"""
+    document = find_anchored_proof(certificate_id)
+    if document is None:
+        return _not_found(certificate_id)
+    return verify_anchored_certificate(certificate_id, document)
+
+
+def verify_certificate(certificate_id):
+    """Checks a certificate ID against the chain: existence, revocation and the institute's signature"""
+    from web3.exceptions import ContractLogicError
+
+    try:
+        status = get_certificate_status(certificate_id)
+    except ContractLogicError:
+        return _verify_unstored(certificate_id)
+
+    cert_data, is_revoked, _ = status
+    signature_valid = None
+    if not is_revoked:
+        signature_valid = crypto_auth.verify_certificate_signature(
+            cert_data[5], _signed_data(certificate_id, cert_data), cert_data[6]
+        )
+    return _result(certificate_id, status, signature_valid)
+
+
+def verify_pdf(pdf_bytes):
+    """Checks an uploaded certificate PDF.
+
+    Files that are byte-identical to an issued PDF are found by content hash;
+    anything else is looked up by the certificate ID of its embedded payload,
+    or of its printed fields for PDFs without one. "certificate" then holds
+    the fields recorded on chain (or in the anchored proof), not the ones
+    claimed by the file. The result is "modified" (not valid) when the payload
+    is inconsistent, or when the certificate was issued with a CIDv0 and the
+    file's bytes differ from the issued file."""
+    # Issued files are recorded by CIDv0, a sha256 multihash of their UnixFS
+    # encoding, so recomputing it gives the key for one indexed lookup
+    cid = compute_cid_v0(bytes(pdf_bytes))
+    certificate_id = get_certificate_id_ipfs_hash(cid)
+    fields = None
+    if certificate_id is None:
+        try:
+            fields = extract_certificate(pdf_bytes)
+        except PayloadMismatchError:
+            result = _not_found(None)
+            result["status"] = "modified"
+            return result
+        except Exception as e:
+            print(f"Could not read certificate PDF: {e}")
+            result = _not_found(None)
+            result["status"] = "unreadable"
+            return result
+        certificate_id = compute_certificate_id(*fields)
+
+    result = verify_certificate(certificate_id)
+    if result["status"] in ("not_found", "invalid_proof"):
+        if result["certificate"] is None and fields is not None:
+            uid, candidate_name, course_name, org_name = fields
+            result["certificate"] = {
+                "uid": uid,
+                "candidate_name": candidate_name,
+                "course_name": course_name,
+                "org_name": org_name,
+            }
+        return result
+
+    issued_cid = result["certificate"]["ipfs_hash"]
+    file_match = cid == issued_cid
+    if file_match or is_cid_v0(issued_cid):
+        # A CIDv0 pins the issued bytes, so a different hash means the file was modified
+        result["file_match"] = file_match
+        if not file_match and not result["revoked"]:
+            result["status"] = "modified"
+            result["valid"] = False
+    return result
+
+
+def verify_many(certificate_ids):
+    """verify_certificate for many IDs with one batched chain read and grouped signature checks.
+
+    IDs that are not stored on chain are looked up as anchored certificates one
+    by one. Results are in the order of certificate_ids."""
+    statuses = get_certificates_status(list(dict.fromkeys(certificate_ids)))
+
+    to_check = [
+        certificate_id for certificate_id, status in statuses.items()
+        if status is not None and not status[1]
+    ]
+    checks = crypto_auth.verify_many([
+        (statuses[certificate_id][0][5], _signed_data(certificate_id, statuses[certificate_id][0]),
+         statuses[certificate_id][0][6])
+        for certificate_id in to_check
+    ])
+    signatures = {certificate_id: is_valid for certificate_id, (is_valid, _) in zip(to_check, checks)}
+
+    results = []
+    for certificate_id in certificate_ids:
+        status = statuses[certificate_id]
+        if status is None:
+            results.append(_verify_unstored(certificate_id))
+        else:
+            results.append(_result(certificate_id, status, signatures.get(certificate_id)))
+    return results
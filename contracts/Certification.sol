@@ -13,6 +13,16 @@ contract Certification {
         uint256 timestamp;
     }
 
+    struct CertificateInput {
+        string certificate_id;
+        string uid;
+        string candidate_name;
+        string course_name;
+        string org_name;
+        string ipfs_hash;
+        string digital_signature;
+    }
+
     struct Institute {
         string email;
         string name;
@@ -21,9 +31,30 @@ contract Certification {
         uint256 registered_at;
     }
 
+    // Everything a verifier needs about one certificate, returned in a single call
+    struct CertificateVerification {
+        bool exists;
+        Certificate certificate;
+        bool is_revoked;
+        bool institute_registered;
+        string institute_name;
+        string institute_public_key;
+        bool institute_verified;
+        uint256 institute_registered_at;
+    }
+
+    struct MerkleAnchor {
+        string institute_email;
+        uint256 certificate_count;
+        uint256 timestamp;
+    }
+
     mapping(string => Certificate) public certificates;
     mapping(string => Institute) public institutes;
     mapping(string => bool) public revokedCertificates;
+    mapping(string => string) private certificateIdByIpfsHash;
+    mapping(bytes32 => MerkleAnchor) private merkleAnchors;
+    mapping(string => string[]) private certificateIdsByInstitute;
     string[] private certificateIds;
     string[] private instituteEmails;
 
@@ -31,6 +62,7 @@ contract Certification {
     event certificateRevoked(string certificate_id);
     event instituteRegistered(string email, string name);
     event instituteVerified(string email);
+    event merkleRootAnchored(bytes32 root, string institute_email, uint256 certificate_count);
 
     function registerInstitute(
         string memory _email,
@@ -73,36 +105,73 @@ contract Certification {
         string memory _institute_email,
         string memory _digital_signature
     ) public {
-        // Check if certificate with the given ID already exists
+        // Check if institute is verified
         require(
-            bytes(certificates[_certificate_id].ipfs_hash).length == 0,
-            "Certificate with this ID already exists"
+            institutes[_institute_email].is_verified,
+            "Institute must be verified to issue certificates"
         );
 
-        // Check if institute is verified
+        _storeCertificate(
+            CertificateInput({
+                certificate_id: _certificate_id,
+                uid: _uid,
+                candidate_name: _candidate_name,
+                course_name: _course_name,
+                org_name: _org_name,
+                ipfs_hash: _ipfs_hash,
+                digital_signature: _digital_signature
+            }),
+            _institute_email
+        );
+    }
+
+    function generateCertificatesBatch(
+        CertificateInput[] calldata _certificates,
+        string calldata _institute_email
+    ) public {
+        // The issuing institute is checked once for the whole batch
         require(
             institutes[_institute_email].is_verified,
             "Institute must be verified to issue certificates"
         );
 
+        for (uint256 i = 0; i < _certificates.length; i++) {
+            _storeCertificate(_certificates[i], _institute_email);
+        }
+    }
+
+    function _storeCertificate(
+        CertificateInput memory _input,
+        string memory _institute_email
+    ) internal {
+        // Check if certificate with the given ID already exists
+        require(
+            bytes(certificates[_input.certificate_id].ipfs_hash).length == 0,
+            "Certificate with this ID already exists"
+        );
+
         // Create the certificate
         Certificate memory cert = Certificate({
-            uid: _uid,
-            candidate_name: _candidate_name,
-            course_name: _course_name,
-            org_name: _org_name,
-            ipfs_hash: _ipfs_hash,
+            uid: _input.uid,
+            candidate_name: _input.candidate_name,
+            course_name: _input.course_name,
+            org_name: _input.org_name,
+            ipfs_hash: _input.ipfs_hash,
             institute_email: _institute_email,
-            digital_signature: _digital_signature,
+            digital_signature: _input.digital_signature,
             timestamp: block.timestamp
         });
 
         // Store the certificate in the mapping
-        certificates[_certificate_id] = cert;
-        certificateIds.push(_certificate_id);
+        certificates[_input.certificate_id] = cert;
+        certificateIds.push(_input.certificate_id);
+        certificateIdsByInstitute[_institute_email].push(_input.certificate_id);
+
+        // Index the certificate by its IPFS hash for O(1) reverse lookups
+        certificateIdByIpfsHash[_input.ipfs_hash] = _input.certificate_id;
 
         // Emit an event
-        emit certificateGenerated(_certificate_id, _institute_email);
+        emit certificateGenerated(_input.certificate_id, _institute_email);
     }
 
     function revokeCertificate(string memory _certificate_id) public {
@@ -125,6 +194,79 @@ contract Certification {
         emit certificateRevoked(_certificate_id);
     }
 
+    function anchorMerkleRoot(
+        bytes32 _root,
+        string memory _institute_email,
+        uint256 _certificate_count
+    ) public {
+        require(
+            institutes[_institute_email].is_verified,
+            "Institute must be verified to issue certificates"
+        );
+        require(merkleAnchors[_root].timestamp == 0, "Merkle root already anchored");
+
+        merkleAnchors[_root] = MerkleAnchor({
+            institute_email: _institute_email,
+            certificate_count: _certificate_count,
+            timestamp: block.timestamp
+        });
+
+        emit merkleRootAnchored(_root, _institute_email, _certificate_count);
+    }
+
+    function revokeAnchoredCertificate(
+        bytes32 _root,
+        string memory _certificate_id,
+        bytes32[] memory _proof
+    ) public {
+        require(merkleAnchors[_root].timestamp != 0, "Merkle root is not anchored");
+        require(
+            _verifyMerkleProof(_root, _merkleLeaf(_certificate_id), _proof),
+            "Certificate is not part of this Merkle root"
+        );
+        require(
+            !revokedCertificates[_certificate_id],
+            "Certificate is already revoked"
+        );
+
+        revokedCertificates[_certificate_id] = true;
+
+        emit certificateRevoked(_certificate_id);
+    }
+
+    function getMerkleAnchor(
+        bytes32 _root
+    ) public view returns (
+        string memory _institute_email,
+        uint256 _certificate_count,
+        uint256 _timestamp
+    ) {
+        MerkleAnchor memory anchor = merkleAnchors[_root];
+        require(anchor.timestamp != 0, "Merkle root is not anchored");
+
+        return (anchor.institute_email, anchor.certificate_count, anchor.timestamp);
+    }
+
+    // Leaves and inner nodes are domain-separated; sibling pairs are hashed in sorted order
+    function _merkleLeaf(string memory _certificate_id) internal pure returns (bytes32) {
+        return sha256(abi.encodePacked(bytes1(0x00), _certificate_id));
+    }
+
+    function _verifyMerkleProof(
+        bytes32 _root,
+        bytes32 _leaf,
+        bytes32[] memory _proof
+    ) internal pure returns (bool) {
+        bytes32 hash = _leaf;
+        for (uint256 i = 0; i < _proof.length; i++) {
+            bytes32 sibling = _proof[i];
+            hash = hash < sibling
+                ? sha256(abi.encodePacked(bytes1(0x01), hash, sibling))
+                : sha256(abi.encodePacked(bytes1(0x01), sibling, hash));
+        }
+        return hash == _root;
+    }
+
     function getCertificate(
         string memory _certificate_id
     )
@@ -161,6 +303,51 @@ contract Certification {
         );
     }
 
+    function verifyCertificateFull(
+        string memory _certificate_id
+    ) public view returns (CertificateVerification memory) {
+        CertificateVerification memory result = _verification(_certificate_id);
+        require(result.exists, "Certificate with this ID does not exist");
+        return result;
+    }
+
+    // Unknown IDs come back with exists == false instead of reverting the whole batch
+    function getCertificatesBatch(
+        string[] memory _certificate_ids
+    ) public view returns (CertificateVerification[] memory) {
+        CertificateVerification[] memory results = new CertificateVerification[](_certificate_ids.length);
+        for (uint256 i = 0; i < _certificate_ids.length; i++) {
+            results[i] = _verification(_certificate_ids[i]);
+        }
+        return results;
+    }
+
+    function _verification(
+        string memory _certificate_id
+    ) internal view returns (CertificateVerification memory result) {
+        result.certificate = certificates[_certificate_id];
+        result.exists = bytes(result.certificate.ipfs_hash).length != 0;
+        if (!result.exists) {
+            return result;
+        }
+
+        result.is_revoked = revokedCertificates[_certificate_id];
+
+        Institute storage institute = institutes[result.certificate.institute_email];
+        result.institute_registered = bytes(institute.email).length != 0;
+        result.institute_name = institute.name;
+        result.institute_public_key = institute.public_key;
+        result.institute_verified = institute.is_verified;
+        result.institute_registered_at = institute.registered_at;
+    }
+
+    function getCertificateIdByIpfsHash(
+        string memory _ipfs_hash
+    ) public view returns (string memory) {
+        // Returns an empty string when no certificate was issued for this hash
+        return certificateIdByIpfsHash[_ipfs_hash];
+    }
+
     function isVerified(
         string memory _certificate_id
     ) public view returns (bool) {
@@ -198,6 +385,7 @@ contract Certification {
         return institutes[_email].is_verified;
     }
 
+    // Returns the whole array; prefer the paginated getters below on large deployments
     function getAllCertificateIds() public view returns (string[] memory) {
         return certificateIds;
     }
@@ -205,4 +393,60 @@ contract Certification {
     function getAllInstituteEmails() public view returns (string[] memory) {
         return instituteEmails;
     }
+
+    function getCertificateCount() public view returns (uint256) {
+        return certificateIds.length;
+    }
+
+    function getInstituteCount() public view returns (uint256) {
+        return instituteEmails.length;
+    }
+
+    function getInstituteCertificateCount(string memory _email) public view returns (uint256) {
+        return certificateIdsByInstitute[_email].length;
+    }
+
+    function getCertificateIds(
+        uint256 _offset,
+        uint256 _limit
+    ) public view returns (string[] memory) {
+        return _page(certificateIds, _offset, _limit);
+    }
+
+    function getInstituteEmails(
+        uint256 _offset,
+        uint256 _limit
+    ) public view returns (string[] memory) {
+        return _page(instituteEmails, _offset, _limit);
+    }
+
+    function getCertificateIdsByInstitute(
+        string memory _email,
+        uint256 _offset,
+        uint256 _limit
+    ) public view returns (string[] memory) {
+        return _page(certificateIdsByInstitute[_email], _offset, _limit);
+    }
+
+    // Copies at most _limit entries starting at _offset; empty once _offset is past the end
+    function _page(
+        string[] storage _items,
+        uint256 _offset,
+        uint256 _limit
+    ) internal view returns (string[] memory) {
+        if (_offset >= _items.length) {
+            return new string[](0);
+        }
+
+        uint256 end = _items.length;
+        if (_limit < end - _offset) {
+            end = _offset + _limit;
+        }
+
+        string[] memory page = new string[](end - _offset);
+        for (uint256 i = _offset; i < end; i++) {
+            page[i - _offset] = _items[i];
+        }
+        return page;
+    }
 }
@@ -0,0 +1,269 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.13;
+
+// Compact layout of Certification: certificates are keyed by bytes32 IDs and
+// store commitments instead of strings. The certificate fields (uid, name,
+// course, organisation) stay off chain; only keccak256(abi.encode(...)) of
+// them is kept. The IPFS CID is stored as its sha256 digest, the institute
+// as keccak256(email) and the signature as raw bytes.
+contract CertificationV2 {
+    struct Certificate {
+        bytes32 fields_commitment;
+        bytes32 ipfs_digest;
+        bytes32 institute_id;
+        // timestamp, signature_algorithm and revoked share one storage slot
+        uint64 timestamp;
+        uint8 signature_algorithm;
+        bool revoked;
+        bytes signature;
+    }
+
+    struct CertificateInput {
+        bytes32 certificate_id;
+        bytes32 fields_commitment;
+        bytes32 ipfs_digest;
+        uint8 signature_algorithm;
+        bytes signature;
+    }
+
+    struct Institute {
+        string email;
+        string name;
+        string public_key;
+        bool is_verified;
+        uint64 registered_at;
+    }
+
+    address public owner;
+    // The v1 Certification deployment this contract was migrated from
+    address public legacyContract;
+    bool public migrationOpen = true;
+
+    mapping(bytes32 => Certificate) private certificates;
+    mapping(bytes32 => Institute) private institutes;
+    mapping(bytes32 => bytes32) private certificateIdByIpfsDigest;
+    bytes32[] private certificateIds;
+    bytes32[] private instituteIds;
+
+    event certificateGenerated(bytes32 indexed certificate_id, bytes32 indexed institute_id);
+    event certificateRevoked(bytes32 indexed certificate_id);
+    event instituteRegistered(bytes32 indexed institute_id, string email, string name);
+    event instituteVerified(bytes32 indexed institute_id);
+
+    modifier onlyOwner() {
+        require(msg.sender == owner, "Only the owner can do this");
+        _;
+    }
+
+    modifier duringMigration() {
+        require(migrationOpen, "Migration is closed");
+        _;
+    }
+
+    constructor(address _legacyContract) {
+        owner = msg.sender;
+        legacyContract = _legacyContract;
+    }
+
+    function registerInstitute(
+        string memory _email,
+        string memory _name,
+        string memory _public_key
+    ) public {
+        _registerInstitute(_email, _name, _public_key, false, uint64(block.timestamp));
+    }
+
+    function verifyInstitute(string memory _email) public {
+        bytes32 instituteId = keccak256(bytes(_email));
+        require(bytes(institutes[instituteId].email).length != 0, "Institute not found");
+        require(!institutes[instituteId].is_verified, "Institute already verified");
+
+        institutes[instituteId].is_verified = true;
+
+        emit instituteVerified(instituteId);
+    }
+
+    function generateCertificate(
+        CertificateInput calldata _input,
+        bytes32 _institute_id
+    ) public {
+        require(
+            institutes[_institute_id].is_verified,
+            "Institute must be verified to issue certificates"
+        );
+
+        _storeCertificate(_input, _institute_id, uint64(block.timestamp), false);
+    }
+
+    function generateCertificatesBatch(
+        CertificateInput[] calldata _inputs,
+        bytes32 _institute_id
+    ) public {
+        require(
+            institutes[_institute_id].is_verified,
+            "Institute must be verified to issue certificates"
+        );
+
+        for (uint256 i = 0; i < _inputs.length; i++) {
+            _storeCertificate(_inputs[i], _institute_id, uint64(block.timestamp), false);
+        }
+    }
+
+    function revokeCertificate(bytes32 _certificate_id) public {
+        Certificate storage cert = certificates[_certificate_id];
+        require(cert.timestamp != 0, "Certificate with this ID does not exist");
+        require(!cert.revoked, "Certificate is already revoked");
+
+        cert.revoked = true;
+
+        emit certificateRevoked(_certificate_id);
+    }
+
+    function getCertificate(
+        bytes32 _certificate_id
+    ) public view returns (Certificate memory) {
+        Certificate memory cert = certificates[_certificate_id];
+        require(cert.timestamp != 0, "Certificate with this ID does not exist");
+        return cert;
+    }
+
+    // Valid when the certificate exists, is not revoked and matches the presented fields
+    function verifyCertificate(
+        bytes32 _certificate_id,
+        bytes32 _fields_commitment
+    ) public view returns (bool) {
+        Certificate storage cert = certificates[_certificate_id];
+        return cert.timestamp != 0 &&
+               !cert.revoked &&
+               cert.fields_commitment == _fields_commitment;
+    }
+
+    function isRevoked(bytes32 _certificate_id) public view returns (bool) {
+        return certificates[_certificate_id].revoked;
+    }
+
+    function getCertificateIdByIpfsDigest(bytes32 _ipfs_digest) public view returns (bytes32) {
+        return certificateIdByIpfsDigest[_ipfs_digest];
+    }
+
+    function getInstitute(
+        bytes32 _institute_id
+    ) public view returns (
+        string memory _email,
+        string memory _name,
+        string memory _public_key,
+        bool _is_verified,
+        uint64 _registered_at
+    ) {
+        Institute storage institute = institutes[_institute_id];
+        require(bytes(institute.email).length != 0, "Institute not found");
+
+        return (
+            institute.email,
+            institute.name,
+            institute.public_key,
+            institute.is_verified,
+            institute.registered_at
+        );
+    }
+
+    function getCertificateCount() public view returns (uint256) {
+        return certificateIds.length;
+    }
+
+    function getInstituteCount() public view returns (uint256) {
+        return instituteIds.length;
+    }
+
+    // --- Migration from the v1 contract ---
+
+    function importInstitute(
+        string memory _email,
+        string memory _name,
+        string memory _public_key,
+        bool _is_verified,
+        uint64 _registered_at
+    ) public onlyOwner duringMigration {
+        _registerInstitute(_email, _name, _public_key, _is_verified, _registered_at);
+    }
+
+    function importCertificates(
+        CertificateInput[] calldata _inputs,
+        bytes32[] calldata _institute_ids,
+        uint64[] calldata _timestamps,
+        bool[] calldata _revoked
+    ) public onlyOwner duringMigration {
+        require(
+            _inputs.length == _institute_ids.length &&
+            _inputs.length == _timestamps.length &&
+            _inputs.length == _revoked.length,
+            "Import arrays must have the same length"
+        );
+
+        for (uint256 i = 0; i < _inputs.length; i++) {
+            _storeCertificate(_inputs[i], _institute_ids[i], _timestamps[i], _revoked[i]);
+            if (_revoked[i]) {
+                emit certificateRevoked(_inputs[i].certificate_id);
+            }
+        }
+    }
+
+    function closeMigration() public onlyOwner {
+        migrationOpen = false;
+    }
+
+    function certificateExists(bytes32 _certificate_id) public view returns (bool) {
+        return certificates[_certificate_id].timestamp != 0;
+    }
+
+    function _registerInstitute(
+        string memory _email,
+        string memory _name,
+        string memory _public_key,
+        bool _is_verified,
+        uint64 _registered_at
+    ) internal {
+        bytes32 instituteId = keccak256(bytes(_email));
+        require(bytes(institutes[instituteId].email).length == 0, "Institute already registered");
+
+        institutes[instituteId] = Institute({
+            email: _email,
+            name: _name,
+            public_key: _public_key,
+            is_verified: _is_verified,
+            registered_at: _registered_at
+        });
+        instituteIds.push(instituteId);
+
+        emit instituteRegistered(instituteId, _email, _name);
+        if (_is_verified) {
+            emit instituteVerified(instituteId);
+        }
+    }
+
+    function _storeCertificate(
+        CertificateInput calldata _input,
+        bytes32 _institute_id,
+        uint64 _timestamp,
+        bool _revoked
+    ) internal {
+        require(
+            certificates[_input.certificate_id].timestamp == 0,
+            "Certificate with this ID already exists"
+        );
+
+        certificates[_input.certificate_id] = Certificate({
+            fields_commitment: _input.fields_commitment,
+            ipfs_digest: _input.ipfs_digest,
+            institute_id: _institute_id,
+            timestamp: _timestamp,
+            signature_algorithm: _input.signature_algorithm,
+            revoked: _revoked,
+            signature: _input.signature
+        });
+        certificateIdByIpfsDigest[_input.ipfs_digest] = _input.certificate_id;
+        certificateIds.push(_input.certificate_id);
+
+        emit certificateGenerated(_input.certificate_id, _institute_id);
+    }
+}
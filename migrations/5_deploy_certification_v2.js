@@ -0,0 +1,20 @@
+const Certification = artifacts.require("Certification");
+const CertificationV2 = artifacts.require("CertificationV2");
+const fs = require('fs');
+
+module.exports = async function (deployer) {
+  // The v2 contract records the v1 deployment it is migrated from
+  let configData = {};
+  if (fs.existsSync('./deployment_config.json')) {
+    configData = JSON.parse(fs.readFileSync('./deployment_config.json'));
+  }
+  const legacyAddress = configData.Certification || (await Certification.deployed()).address;
+
+  await deployer.deploy(CertificationV2, legacyAddress);
+  const deployedCertificationV2 = await CertificationV2.deployed();
+
+  configData.CertificationV2 = deployedCertificationV2.address;
+  fs.writeFileSync('./deployment_config.json', JSON.stringify(configData, null, 2));
+
+  console.log(`CertificationV2 contract deployed at address: ${deployedCertificationV2.address}`);
+};